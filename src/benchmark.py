@@ -0,0 +1,756 @@
+"""
+Rough benchmarks for comparing the solvers against each other. Not part of the test suite, since timings depend on
+the machine, but handy when working on performance.
+
+Run all benchmarks with "python src/benchmark.py", or a single one with "python src/benchmark.py <name>".
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from knights_tour.knight import Knight
+from knights_tour.gameengine import GameEngine
+from knights_tour.grid_pos import GridPos
+from knights_tour.board import Board, CostLayer, ParentLayer
+from knights_tour.heuristics import LongestPathSearchHeuristics as Heuristics, RegionHeuristic
+from knights_tour.move_graph import KNIGHT_MOVES, MoveGraph
+from knights_tour.move_masks import MoveMasks
+from knights_tour.path_cache import PathTreeCache
+from knights_tour.pieces import Pieces
+
+
+cwd = os.getcwd()
+split = os.path.split(cwd)
+parent_dir = split[-1]
+
+if(parent_dir == "src"):
+    board_dir = "../Boards"
+else:
+    board_dir = "Boards"
+
+board_32x32 = board_dir + "/32x32_board.txt"
+board_32x32_mod = board_dir + "/32x32_board_mod.txt"
+
+
+def open_board(height, width):
+    """
+    Build an empty (all '.') board of any size. Boards are only loaded from files, so write a temporary one.
+    """
+    board_str = "\n".join(" ".join(["."] * width) for _ in range(height))
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as file:
+        file.write(board_str)
+    try:
+        return Board(file.name)
+    finally:
+        os.remove(file.name)
+
+
+def shortest_path():
+    """
+    Expanded nodes and run time for each shortest path planner.
+    """
+    print("\n::::::::::Shortest path planners::::::::::")
+    cases = [
+        ("32x32_mod, far", lambda: Board(board_32x32_mod), GridPos(2, 2), GridPos(30, 30)),
+        ("32x32_mod, near", lambda: Board(board_32x32_mod), GridPos(2, 2), GridPos(6, 4)),
+        ("128x128, near", lambda: open_board(128, 128), GridPos(60, 60), GridPos(66, 70)),
+    ]
+    planners = [
+        ("flood", lambda knight: knight.plan_shortest_path()),
+        ("dijkstra", lambda knight: knight.plan_shortest_path_dijkstra()),
+        ("dijkstra (buckets)", lambda knight: knight.plan_shortest_path_dijkstra(bucket_queue=True)),
+        ("a-star", lambda knight: knight.plan_shortest_path_astar()),
+    ]
+
+    print(f"{'case':<20}{'planner':<20}{'cost':>6}{'expanded':>10}{'seconds':>10}")
+    for case_name, make_board, start_pos, end_pos in cases:
+        for planner_name, plan in planners:
+            knight = Knight(GameEngine(make_board()), start_pos=start_pos, end_pos=end_pos)
+            start_time = time.perf_counter()
+            plan(knight)
+            elapsed = time.perf_counter() - start_time
+            cost = knight.cost_map.get_value(end_pos)
+            print(f"{case_name:<20}{planner_name:<20}{cost:>6}{knight.expanded_nodes:>10}{elapsed:>10.3f}")
+
+
+def near_query():
+    """
+    Cold queries between nearby cells on huge open boards: the first query on the board, and the next one after an
+    edit far from the route. The planners read the move masks, so the time should grow with the route, not the board.
+    A flood fill would expand every cell (the last column).
+    """
+    print("\n::::::::::Near queries on huge boards::::::::::")
+    print(f"{'board':<12}{'planner':<10}{'expanded':>10}{'cold (s)':>10}{'edited (s)':>12}{'flood (cells)':>15}")
+    for size in [1024, 2048]:
+        for planner_name in ["dijkstra", "a-star"]:
+            board = open_board(size, size)
+            center = size // 2
+            knight = Knight(GameEngine(board), start_pos=GridPos(center, center), end_pos=GridPos(center + 4, center + 6))
+            plan = knight.plan_shortest_path_dijkstra if planner_name == "dijkstra" else knight.plan_shortest_path_astar
+            start_time = time.perf_counter()
+            plan()
+            cold = time.perf_counter() - start_time
+
+            board.set_element(GridPos(0, 0), "B")
+            start_time = time.perf_counter()
+            plan()
+            edited = time.perf_counter() - start_time
+            print(f"{f'{size}x{size}':<12}{planner_name:<10}{knight.expanded_nodes:>10}{cold:>10.3f}{edited:>12.4f}"
+                  f"{size * size:>15}")
+
+
+def board_memory():
+    """
+    Memory per cell of the board and the planner maps, against the original list of lists storage.
+    """
+    print("\n::::::::::Board memory::::::::::")
+    height, width = 512, 512
+    board = open_board(height, width)
+    cells = height * width
+
+    def measure(build):
+        tracemalloc.start()
+        obj = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del obj
+        return size / cells
+
+    print(f"{'storage':<35}{'bytes/cell':>12}")
+    print(f"{'list of lists (pieces)':<35}{measure(lambda: board._board_grid):>12.2f}")
+    print(f"{'list of lists (costs)':<35}{measure(lambda: [list(range(width)) for _ in range(height)]):>12.2f}")
+    print(f"{'Board.copy()':<35}{measure(board.copy):>12.2f}")
+    print(f"{'CostLayer':<35}{measure(lambda: CostLayer(height, width)):>12.2f}")
+    print(f"{'ParentLayer':<35}{measure(lambda: ParentLayer(height, width)):>12.2f}")
+
+
+def grid_pos_allocations():
+    """
+    GridPos objects created per expanded node. Hot paths work on packed int indices, and hand out the board's
+    interned GridPos instances, so this should be close to zero. get_possible_moves is also measured against listing
+    the moves with GridPos arithmetic, for every candidate move and every step of the barrier checks (what it did
+    before).
+    """
+    print("\n::::::::::GridPos allocations::::::::::")
+    created = [0]
+    original_init = GridPos.__init__
+
+    def counting_init(self, x, y):
+        created[0] += 1
+        original_init(self, x, y)
+
+    def step_clear(board, pos, stop, step):
+        while pos != stop:
+            pos += step
+            if board.get_value(pos) == Pieces.BARRIER.value:
+                return False
+        return True
+
+    def arithmetic_moves(game_engine, curr_pos):
+        board = game_engine.board
+        deltas = [GridPos(d_row, d_col) for d_row, d_col in KNIGHT_MOVES]
+        new_positions = []
+        for delta in deltas:
+            new_pos = curr_pos + delta
+            if not game_engine.validate_within_bounds(new_pos):
+                continue
+            sign = delta // abs(delta)
+            corner_x, corner_y = GridPos(new_pos.x, curr_pos.y), GridPos(curr_pos.x, new_pos.y)
+            if (step_clear(board, curr_pos, corner_x, GridPos(sign.x, 0)) and
+                    step_clear(board, corner_x, new_pos, GridPos(0, sign.y))) or \
+                    (step_clear(board, curr_pos, corner_y, GridPos(0, sign.y)) and
+                     step_clear(board, corner_y, new_pos, GridPos(sign.x, 0))):
+                new_positions.append(new_pos)
+        return new_positions
+
+    planners = [
+        ("flood", lambda knight: knight.plan_shortest_path()),
+        ("dijkstra", lambda knight: knight.plan_shortest_path_dijkstra()),
+        ("a-star", lambda knight: knight.plan_shortest_path_astar()),
+    ]
+    print(f"{'planner':<20}{'expanded':>10}{'GridPos/node':>14}")
+    GridPos.__init__ = counting_init
+    try:
+        for planner_name, plan in planners:
+            knight = Knight(GameEngine(Board(board_32x32_mod)), start_pos=GridPos(2, 2), end_pos=GridPos(30, 30))
+            created[0] = 0
+            plan(knight)
+            print(f"{planner_name:<20}{knight.expanded_nodes:>10}{created[0] / knight.expanded_nodes:>14.2f}")
+
+        game_engine = GameEngine(Board(board_32x32_mod))
+        pos = GridPos(10, 10)
+        for call_name, list_moves in [("get_possible_moves", GameEngine.get_possible_moves),
+                                      ("GridPos arithmetic", arithmetic_moves)]:
+            created[0] = 0
+            for _ in range(1000):
+                list_moves(game_engine, pos)
+            print(f"{call_name:<20}{'':>10}{created[0] / 1000:>14.2f}")
+    finally:
+        GridPos.__init__ = original_init
+
+
+def tour_search():
+    """
+    Nodes/second of the longest path search: the original recursive search (rocks written into the board) against
+    the TourSearch core (bitboard + flat degree array). An exhaustive search explores identical nodes in both, so the
+    ratio of run times is the speed up.
+    """
+    print("\n::::::::::Longest path search::::::::::")
+    sys.setrecursionlimit(10000)
+
+    print(f"{'case':<32}{'search':<12}{'nodes':>10}{'seconds':>10}{'nodes/s':>12}")
+    cases = [
+        ("4x5 exhaustive", lambda: open_board(4, 5), 1000, 60),
+        ("8x8, 3 seconds", lambda: Board(board_dir + "/8x8_board.txt"), 1000, 3),
+        ("32x32_mod, 3 seconds", lambda: Board(board_32x32_mod), 10000, 3),
+    ]
+    for case_name, make_board, cost_acceptance_thresh, time_allowed in cases:
+        nodes = None
+        for recursive in [False, True]:
+            knight = Knight(GameEngine(make_board()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=time_allowed, heuristic=Heuristics().identity_heuristic,
+                                           cost_acceptance_thresh=cost_acceptance_thresh, recursive=recursive)
+            elapsed = time.perf_counter() - start_time
+            if recursive:
+                # The recursive search doesn't count nodes, but explores the same ones when it runs to completion
+                node_str = f"{nodes:>10}" if elapsed < time_allowed else f"{'?':>10}"
+                rate_str = f"{nodes / elapsed:>12.0f}" if elapsed < time_allowed else f"{'?':>12}"
+            else:
+                nodes = knight.nodes_expanded
+                node_str, rate_str = f"{nodes:>10}", f"{nodes / elapsed:>12.0f}"
+            print(f"{case_name:<32}{'recursive' if recursive else 'core':<12}{node_str}{elapsed:>10.3f}{rate_str}")
+
+
+def pruning():
+    """
+    Nodes expanded before finding a full tour, with and without dead end/island pruning.
+    """
+    print("\n::::::::::Pruning::::::::::")
+    print(f"{'case':<32}{'prune':<8}{'cost':>6}{'nodes':>10}{'seconds':>10}")
+    cases = [
+        ("6x6, identity", lambda: open_board(6, 6), Heuristics().identity_heuristic),
+        ("7x7, identity", lambda: open_board(7, 7), Heuristics().identity_heuristic),
+        ("8x8, sparse", lambda: Board(board_dir + "/8x8_board.txt"), Heuristics().sparse_search_heuristic),
+        ("32x32_mod, dense", lambda: Board(board_32x32_mod), Heuristics().dense_search_heuristic),
+    ]
+    for case_name, make_board, heuristic in cases:
+        for prune in [False, True]:
+            knight = Knight(GameEngine(make_board()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=10, heuristic=heuristic, prune=prune)
+            elapsed = time.perf_counter() - start_time
+            print(f"{case_name:<32}{str(prune):<8}{knight.optimal_cost:>6}{knight.nodes_expanded:>10}{elapsed:>10.3f}")
+
+
+def branch_and_bound():
+    """
+    Exhaustive searches on small weighted boards (random water, lava and barriers), with and without the bound.
+    Both prove the same optimal cost; the bound just gets there in fewer nodes.
+    """
+    print("\n::::::::::Branch and bound::::::::::")
+    print(f"{'case':<20}{'bound':<8}{'cost':>6}{'nodes':>10}{'seconds':>10}{'proven':>8}")
+    for height, width, seed in [(5, 5, 4), (5, 6, 1), (6, 6, 2)]:
+        rng = random.Random(seed)
+        board = open_board(height, width)
+        for index in range(1, height * width):
+            board.set_element(GridPos(*divmod(index, width)), rng.choice([".", ".", ".", "W", "L", "B"]))
+        for bound in [False, True]:
+            knight = Knight(GameEngine(board.copy()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=60, heuristic=Heuristics().dense_search_heuristic,
+                                           cost_acceptance_thresh=10 ** 6, bound=bound)
+            elapsed = time.perf_counter() - start_time
+            print(f"{f'{height}x{width} (seed {seed})':<20}{str(bound):<8}{knight.optimal_cost:>6}"
+                  f"{knight.nodes_expanded:>10}{elapsed:>10.3f}{str(knight.optimal_proven):>8}")
+
+
+def split_search():
+    """
+    Throughput of the split search, against the number of worker processes. The searches can't finish exhaustively
+    in a reasonable time on 6x6 and 7x7, so each gets a fixed time, with an unreachable threshold, and the nodes/s
+    should scale close to linearly with the workers (until they outnumber the cores).
+    """
+    print("\n::::::::::Split search::::::::::")
+    print(f"{'case':<12}{'workers':>8}{'nodes':>12}{'nodes/s':>12}{'min/max worker nodes':>24}")
+    worker_counts = sorted({1, 2, os.cpu_count() or 1})
+    for height, width in [(6, 6), (7, 7)]:
+        for workers in worker_counts:
+            knight = Knight(GameEngine(open_board(height, width)), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_split(time_allowed=5, heuristic_name="identity_heuristic", split_depth=4,
+                                           max_workers=workers, cost_acceptance_thresh=10 ** 6)
+            elapsed = time.perf_counter() - start_time
+            nodes = list(knight.worker_nodes.values())
+            print(f"{f'{height}x{width}':<12}{workers:>8}{knight.nodes_expanded:>12}"
+                  f"{knight.nodes_expanded / elapsed:>12.0f}{f'{min(nodes)}/{max(nodes)}':>24}")
+
+
+def exact_oracle():
+    """
+    The exact search as an oracle: how close each heuristic search gets to the proven optimum in a short time, on
+    small weighted boards.
+    """
+    print("\n::::::::::Exact oracle::::::::::")
+    print(f"{'case':<20}{'search':<28}{'cost':>6}{'optimum':>9}{'seconds':>10}")
+    heuristics = ["identity_heuristic", "dense_search_heuristic", "sparse_search_heuristic"]
+    for height, width, seed in [(5, 5, 4), (5, 6, 1), (4, 7, 3), (5, 6, 5)]:
+        rng = random.Random(seed)
+        board = open_board(height, width)
+        for index in range(1, height * width):
+            board.set_element(GridPos(*divmod(index, width)), rng.choice([".", ".", ".", "W", "L", "B"]))
+        case_name = f"{height}x{width} (seed {seed})"
+
+        knight = Knight(GameEngine(board.copy()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+        start_time = time.perf_counter()
+        knight.find_longest_path_exact()
+        elapsed = time.perf_counter() - start_time
+        optimum = knight.optimal_cost
+        print(f"{case_name:<20}{'exact':<28}{optimum:>6}{optimum:>9}{elapsed:>10.3f}")
+
+        for heuristic_name in heuristics:
+            knight = Knight(GameEngine(board.copy()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=1, heuristic=getattr(Heuristics(), heuristic_name),
+                                           cost_acceptance_thresh=optimum)
+            elapsed = time.perf_counter() - start_time
+            print(f"{case_name:<20}{heuristic_name:<28}{knight.optimal_cost:>6}{optimum:>9}{elapsed:>10.3f}")
+
+
+def symmetry():
+    """
+    Exhaustive searches on open boards, with and without skipping mirror image moves. From the center, all 8
+    transforms leave the start in place, from a corner, only the diagonal reflection does, and from the middle of
+    an edge, only the reflection across it.
+    """
+    print("\n::::::::::Symmetry::::::::::")
+    print(f"{'case':<26}{'symmetry':<10}{'cost':>6}{'nodes':>12}{'seconds':>10}")
+    cases = [
+        ("5x5, center", 5, 5, GridPos(2, 2)),
+        ("5x5, corner", 5, 5, GridPos(0, 0)),
+        ("4x5, middle of an edge", 4, 5, GridPos(0, 2)),
+    ]
+    for case_name, height, width, start_pos in cases:
+        for use_symmetry in [False, True]:
+            knight = Knight(GameEngine(open_board(height, width)), start_pos=start_pos, end_pos=start_pos)
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=120, cost_acceptance_thresh=10 ** 6, symmetry=use_symmetry)
+            elapsed = time.perf_counter() - start_time
+            print(f"{case_name:<26}{str(use_symmetry):<10}{knight.optimal_cost:>6}{knight.nodes_expanded:>12}"
+                  f"{elapsed:>10.3f}")
+
+
+def constructive_tour():
+    """
+    Time to build a full tour of large open boards, which are far beyond any search. The time should grow linearly
+    with the number of cells (the block tours are only searched for once, and then reused), wherever it starts.
+    """
+    print("\n::::::::::Constructive tour::::::::::")
+    print(f"{'case':<20}{'start':>14}{'cells':>10}{'seconds':>10}{'cost':>10}")
+    for height, width, start in [(100, 100, (0, 0)), (500, 500, (0, 0)), (1000, 1000, (0, 0)),
+                                 (1000, 1000, (500, 500)), (999, 999, (500, 500)), (4, 10000, (0, 5000)),
+                                 (3, 10000, (1, 5001))]:
+        knight = Knight(GameEngine(open_board(height, width)), start_pos=GridPos(*start), end_pos=GridPos(0, 0))
+        start_time = time.perf_counter()
+        knight.find_tour_constructive()
+        elapsed = time.perf_counter() - start_time
+        print(f"{f'{height}x{width}':<20}{str(start):>14}{height * width:>10}{elapsed:>10.3f}"
+              f"{knight.optimal_cost:>10}")
+
+
+def path_extension():
+    """
+    The same time budget, spent all on the depth first search, or partly on extending its best path by rotations
+    afterwards (extend_time). The searches time out short of a full tour on all of these.
+    """
+    print("\n::::::::::Path extension::::::::::")
+    print(f"{'case':<24}{'extend_time':>12}{'cells':>8}{'cost':>8}{'gained':>8}{'seconds':>10}")
+    cases = [
+        ("32x32, identity", lambda: Board(board_32x32), Heuristics().identity_heuristic),
+        ("32x32, dense", lambda: Board(board_32x32), Heuristics().dense_search_heuristic),
+        ("40x40 open, identity", lambda: open_board(40, 40), Heuristics().identity_heuristic),
+    ]
+    for case_name, make_board, heuristic in cases:
+        for extend_time in [0, 2]:
+            knight = Knight(GameEngine(make_board()), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=10, heuristic=heuristic, cost_acceptance_thresh=10 ** 6,
+                                           extend_time=extend_time)
+            elapsed = time.perf_counter() - start_time
+            print(f"{case_name:<24}{extend_time:>12}{len(knight.optimal_path):>8}{knight.optimal_cost:>8}"
+                  f"{knight.cells_gained:>8}{elapsed:>10.3f}")
+
+
+def beam_search():
+    """
+    Depth first search against beam search (at a few widths) on 32x32_board_mod.txt, from a few starts, with the
+    same time limit. The beam searches usually finish well within it.
+    """
+    print("\n::::::::::Beam search::::::::::")
+    print(f"{'start':<12}{'search':<16}{'cells':>8}{'cost':>8}{'seconds':>10}")
+    for start in [GridPos(0, 0), GridPos(31, 5), GridPos(5, 31)]:
+        for width in [None, 8, 16, 64]:
+            knight = Knight(GameEngine(Board(board_32x32_mod)), start_pos=start, end_pos=GridPos(0, 0))
+            start_time = time.perf_counter()
+            if width is None:
+                knight.find_longest_path_entry(time_allowed=10, heuristic=Heuristics().dense_search_heuristic,
+                                               cost_acceptance_thresh=10 ** 6)
+            else:
+                knight.find_longest_path_beam(time_allowed=10, width=width, cost_acceptance_thresh=10 ** 6)
+            elapsed = time.perf_counter() - start_time
+            search = "depth first" if width is None else f"beam {width}"
+            print(f"{f'({start.x}, {start.y})':<12}{search:<16}{len(knight.optimal_path):>8}{knight.optimal_cost:>8}"
+                  f"{elapsed:>10.3f}")
+
+
+def restarts():
+    """
+    Time to reach cost_acceptance_thresh from a dozen starts on each board (a few seeds each): one long search with
+    random tie-breaks, against Luby restarts of the same heuristic. Runs that time out count as time_allowed.
+    """
+    print("\n::::::::::Randomized restarts::::::::::")
+    print(f"{'board':<24}{'search':<12}{'median':>10}{'worst':>10}{'failed':>10}")
+    time_allowed = 5
+    cases = [
+        ("8x8 open", lambda: open_board(8, 8), 64),
+        ("32x32", lambda: Board(board_32x32), None),
+        ("32x32_mod", lambda: Board(board_32x32_mod), None),
+    ]
+    for case_name, make_board, cost_acceptance_thresh in cases:
+        board = make_board()
+        starts = [pos for pos in board.find_all_elements(".")][::max(1, board.get_height() * board.get_width() // 12)]
+        for restart in [False, True]:
+            times = []
+            for start in starts[:12]:
+                for seed in range(3):
+                    knight = Knight(GameEngine(board.copy()), start_pos=start, end_pos=start)
+                    start_time = time.perf_counter()
+                    if restart:
+                        knight.find_longest_path_restarts(time_allowed=time_allowed, seed=seed,
+                                                          cost_acceptance_thresh=cost_acceptance_thresh)
+                    else:
+                        knight.find_longest_path_entry(time_allowed=time_allowed,
+                                                       heuristic=Heuristics(seed).random_dense_search_heuristic,
+                                                       cost_acceptance_thresh=cost_acceptance_thresh)
+                    reached = knight.optimal_cost >= knight.cost_acceptance_thresh
+                    times.append(time.perf_counter() - start_time if reached else time_allowed)
+            times.sort()
+            failed = sum(1 for elapsed in times if elapsed >= time_allowed)
+            print(f"{case_name:<24}{'restarts' if restart else 'single':<12}{times[len(times) // 2]:>10.3f}"
+                  f"{times[-1]:>10.3f}{f'{failed}/{len(times)}':>10}")
+
+
+def tie_breaking():
+    """
+    Backtracks (nodes expanded beyond the length of the path) before a full tour, for Warnsdorff's rule with the
+    default tie-break (the order moves were generated in) against the center distance and lookahead tie-breaks, from
+    8 random starts per open board. Timed out runs count the backtracks they made before giving up (marked +).
+    """
+    print("\n::::::::::Warnsdorff tie-breaking::::::::::")
+    print(f"{'board':<10}{'heuristic':<30}{'solved':>8}{'backtracks':>12}{'seconds':>10}")
+    heuristics = ["dense_search_heuristic", "center_tiebreak_heuristic", "lookahead_heuristic"]
+    for size in [8, 16, 32, 64, 100]:
+        rng = random.Random(size)
+        starts = [GridPos(rng.randrange(size), rng.randrange(size)) for _ in range(8)]
+        board = open_board(size, size)
+        for heuristic_name in heuristics:
+            solved = backtracks = 0
+            start_time = time.perf_counter()
+            for start in starts:
+                knight = Knight(GameEngine(board.copy()), start_pos=start, end_pos=start)
+                knight.find_longest_path_entry(time_allowed=2, heuristic=getattr(Heuristics(), heuristic_name),
+                                               cost_acceptance_thresh=size * size)
+                solved += knight.optimal_cost >= size * size
+                backtracks += knight.nodes_expanded - len(knight.optimal_path)
+            elapsed = time.perf_counter() - start_time
+            backtrack_str = f"{backtracks}{'+' if solved < len(starts) else ''}"
+            print(f"{f'{size}x{size}':<10}{heuristic_name:<30}{f'{solved}/{len(starts)}':>8}{backtrack_str:>12}"
+                  f"{elapsed:>10.3f}")
+
+
+def region_heuristic():
+    """
+    Best cost within the same time_allowed on 32x32_board_mod.txt (open fields mixed with barrier corridors), from
+    a few starts: dense and sparse search everywhere, against dense in the open fields and sparse along the barriers
+    (RegionHeuristic), and the same with the center tie-break in the open fields.
+    """
+    print("\n::::::::::Region heuristic::::::::::")
+    starts = [GridPos(0, 0), GridPos(31, 5), GridPos(5, 31), GridPos(20, 10), GridPos(28, 28), GridPos(2, 20)]
+    cases = [
+        ("dense", lambda: Heuristics().dense_search_heuristic),
+        ("sparse", lambda: Heuristics().sparse_search_heuristic),
+        ("region (dense/sparse)", RegionHeuristic),
+        ("region (center/sparse)", lambda: RegionHeuristic(open_heuristic=Heuristics().center_tiebreak_heuristic)),
+    ]
+    print(f"{'heuristic':<26}" + "".join(f"{f'({start.x}, {start.y})':>10}" for start in starts) + f"{'total':>8}")
+    for case_name, make_heuristic in cases:
+        costs = []
+        for start in starts:
+            knight = Knight(GameEngine(Board(board_32x32_mod)), start_pos=start, end_pos=start)
+            knight.find_longest_path_entry(time_allowed=5, heuristic=make_heuristic(), cost_acceptance_thresh=10 ** 6)
+            costs.append(knight.optimal_cost)
+        print(f"{case_name:<26}" + "".join(f"{cost:>10}" for cost in costs) + f"{sum(costs):>8}")
+
+
+def end_constrained():
+    """
+    Full tours of open boards, free to end anywhere, against tours that must end on end_pos (constrain_end=True):
+    the constrained search should be about as fast, rather than a slow filter over free tours.
+    """
+    print("\n::::::::::End constrained search::::::::::")
+    print(f"{'board':<10}{'end':<12}{'search':<14}{'nodes':>10}{'seconds':>10}{'ends on end':>13}")
+    for size in [8, 16, 32, 64]:
+        end_pos = GridPos(size // 2, size // 2 - 1)
+        for constrain_end in [False, True]:
+            knight = Knight(GameEngine(open_board(size, size)), start_pos=GridPos(0, 0), end_pos=end_pos)
+            start_time = time.perf_counter()
+            knight.find_longest_path_entry(time_allowed=10, heuristic=Heuristics().center_tiebreak_heuristic,
+                                           cost_acceptance_thresh=size * size, constrain_end=constrain_end)
+            elapsed = time.perf_counter() - start_time
+            search = "constrained" if constrain_end else "free"
+            print(f"{f'{size}x{size}':<10}{f'({end_pos.x}, {end_pos.y})':<12}{search:<14}{knight.nodes_expanded:>10}"
+                  f"{elapsed:>10.3f}{str(knight.optimal_path[-1] == end_pos):>13}")
+
+
+def piece_index():
+    """
+    Teleport lookups (find_all_elements) from the piece index, against scanning the board for them, and the shortest
+    path planners on open boards with a pair of teleports, which look them up on every expansion that lands on one.
+    The scan runs in C, so it only falls behind on large boards (the planners are skipped there, to save time).
+    """
+    print("\n::::::::::Piece index::::::::::")
+    print(f"{'board':<12}{'index (us)':>12}{'scan (us)':>12}{'flood (s)':>12}{'dijkstra (s)':>14}")
+    teleport = "T"
+    for size in [64, 256, 1024]:
+        board = open_board(size, size)
+        board.set_element(GridPos(1, 1), teleport)
+        board.set_element(GridPos(size - 2, size - 2), teleport)
+
+        repeats = 1000
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            board.find_all_elements(teleport)
+        indexed = (time.perf_counter() - start_time) / repeats * 10 ** 6
+
+        # What find_all_elements did before the index: scan the board for the teleport's code
+        code = board._codes[teleport]  # pylint: disable=protected-access
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            matches = []
+            index = board._cells.find(code)  # pylint: disable=protected-access
+            while index != -1:
+                matches.append(board.pos(index))
+                index = board._cells.find(code, index + 1)  # pylint: disable=protected-access
+        scanned = (time.perf_counter() - start_time) / repeats * 10 ** 6
+
+        timings = [float("nan")] * 2
+        for planner, plan in enumerate([Knight.plan_shortest_path, Knight.plan_shortest_path_dijkstra]):
+            if size > 256:
+                break
+            knight = Knight(GameEngine(board.copy()), start_pos=GridPos(0, 0), end_pos=GridPos(size - 1, size - 1))
+            start_time = time.perf_counter()
+            plan(knight)
+            timings[planner] = time.perf_counter() - start_time
+        print(f"{f'{size}x{size}':<12}{indexed:>12.1f}{scanned:>12.1f}{timings[0]:>12.3f}{timings[1]:>14.3f}")
+
+
+def teleport_networks():
+    """
+    Shortest paths on a 128x128 board with 24 teleport networks ('T<id>') of k teleports each, scattered at random.
+    Compiling the MoveGraph stores k - 1 exits per teleport, but the planners route each network through a single hub,
+    so their run time shouldn't grow with k (the routes just get cheaper, as the networks get denser).
+    """
+    print("\n::::::::::Teleport networks::::::::::")
+    print(f"{'teleports/network':<20}{'compile (s)':>12}{'edges':>10}{'planner':>10}{'cost':>6}{'expanded':>10}"
+          f"{'seconds':>10}")
+    size, networks = 128, 24
+    for teleports in [2, 8, 32]:
+        rng = random.Random(teleports)
+        board = open_board(size, size)
+        for network, index in enumerate(rng.sample(range(1, size * size - 1), networks * teleports)):
+            board.set_element(GridPos(*divmod(index, size)), f"T{network % networks}")
+
+        start_time = time.perf_counter()
+        graph = GameEngine(board).get_move_graph()
+        compile_time = time.perf_counter() - start_time
+        for planner_name in ["dijkstra", "a-star"]:
+            knight = Knight(GameEngine(board.copy()), start_pos=GridPos(0, 0), end_pos=GridPos(size - 1, size - 1))
+            start_time = time.perf_counter()
+            if planner_name == "dijkstra":
+                knight.plan_shortest_path_dijkstra()
+            else:
+                knight.plan_shortest_path_astar()
+            elapsed = time.perf_counter() - start_time
+            cost = knight.cost_map.get_value(GridPos(size - 1, size - 1))
+            print(f"{teleports:<20}{compile_time:>12.3f}{len(graph.targets):>10}{planner_name:>10}{cost:>6}"
+                  f"{knight.expanded_nodes:>10}{elapsed:>10.3f}")
+
+
+def move_masks():
+    """
+    Listing the knight moves out of every cell, from the move masks (get_possible_moves) against checking the rules
+    move by move (what get_possible_moves did before), and catching up on one edit against compiling every mask again.
+    The same for the MoveGraph built from the masks (get_move_graph), which patches the rows around each edit.
+    Boards are 20% barriers and rocks, scattered at random.
+    """
+    print("\n::::::::::Move masks::::::::::")
+    print(f"{'board':<12}{'masks (us/cell)':>16}{'rules (us/cell)':>16}{'edit (us)':>12}{'compile (ms)':>14}"
+          f"{'graph edit (ms)':>17}{'graph compile (ms)':>20}")
+    for size in [32, 128, 256]:
+        rng = random.Random(size)
+        board = open_board(size, size)
+        for index in rng.sample(range(size * size), size * size // 5):
+            board.set_element(GridPos(*divmod(index, size)), rng.choice(["B", "R"]))
+        game_engine = GameEngine(board)
+        cells = [GridPos(*divmod(index, size)) for index in range(size * size)]
+
+        game_engine.get_move_masks()
+        start_time = time.perf_counter()
+        for pos in cells:
+            game_engine.get_possible_moves(pos)
+        masked = (time.perf_counter() - start_time) / len(cells) * 10 ** 6
+
+        start_time = time.perf_counter()
+        for pos in cells:
+            # pylint: disable=protected-access
+            [board.pos((pos.x + d_row) * size + pos.y + d_col) for d_row, d_col in KNIGHT_MOVES
+             if game_engine._is_open(pos.x + d_row, pos.y + d_col) and
+             game_engine._is_barrier_clear(pos.x, pos.y, pos.x + d_row, pos.y + d_col)]
+        ruled = (time.perf_counter() - start_time) / len(cells) * 10 ** 6
+
+        edits = 1000
+        start_time = time.perf_counter()
+        for _ in range(edits):
+            board.set_element(rng.choice(cells), rng.choice([".", "B", "R", "W"]))
+            game_engine.get_move_masks()
+        edit_time = (time.perf_counter() - start_time) / edits * 10 ** 6
+
+        start_time = time.perf_counter()
+        MoveMasks(board)
+        compile_time = (time.perf_counter() - start_time) * 1000
+
+        game_engine.get_move_graph()
+        graph_edits = 100
+        start_time = time.perf_counter()
+        for _ in range(graph_edits):
+            board.set_element(rng.choice(cells), rng.choice([".", "B", "R", "W"]))
+            game_engine.get_move_graph()
+        graph_edit_time = (time.perf_counter() - start_time) / graph_edits * 1000
+
+        start_time = time.perf_counter()
+        MoveGraph(game_engine)
+        graph_compile_time = (time.perf_counter() - start_time) * 1000
+        print(f"{f'{size}x{size}':<12}{masked:>16.2f}{ruled:>16.2f}{edit_time:>12.1f}{compile_time:>14.1f}"
+              f"{graph_edit_time:>17.2f}{graph_compile_time:>20.1f}")
+
+
+def incremental():
+    """
+    Replanning after a few cells change, on an open board (10% water, scattered at random) with start and end at
+    opposite ends of a diagonal: the incremental planner repairs its last search, A* plans again from scratch. Edits
+    are lava on the route (which forces a detour), and water well off it (which changes nothing).
+    """
+    print("\n::::::::::Incremental replanning::::::::::")
+    print(f"{'board':<12}{'edit':<10}{'planner':>12}{'cost':>8}{'expanded':>10}{'seconds':>10}")
+    for size in [256, 1024]:
+        rng = random.Random(size)
+        board = open_board(size, size)
+        for index in rng.sample(range(size * size), size * size // 10):
+            board.set_element(GridPos(*divmod(index, size)), "W")
+        start_pos, end_pos = GridPos(0, 0), GridPos(size - 1, size - 1)
+        knight = Knight(GameEngine(board), start_pos=start_pos, end_pos=end_pos)
+
+        start_time = time.perf_counter()
+        knight.plan_shortest_path_incremental()
+        elapsed = time.perf_counter() - start_time
+        print(f"{f'{size}x{size}':<12}{'initial':<10}{'incremental':>12}{knight.incremental_planner.cost:>8}"
+              f"{knight.expanded_nodes:>10}{elapsed:>10.3f}")
+
+        for edit in ["on route", "off route"]:
+            route = knight.reconstruct_path()
+            if edit == "on route":
+                for pos in rng.sample(route[1:-1], 3):
+                    board.set_element(pos, "L")
+            else:
+                for _ in range(3):
+                    board.set_element(GridPos(rng.randrange(size // 2, size), rng.randrange(size // 8)), "W")
+
+            start_time = time.perf_counter()
+            knight.plan_shortest_path_incremental()
+            elapsed = time.perf_counter() - start_time
+            print(f"{'':<12}{edit:<10}{'incremental':>12}{knight.incremental_planner.cost:>8}"
+                  f"{knight.expanded_nodes:>10}{elapsed:>10.3f}")
+
+            fresh = Knight(GameEngine(board.copy()), start_pos=start_pos, end_pos=end_pos)
+            start_time = time.perf_counter()
+            fresh.plan_shortest_path_astar()
+            elapsed = time.perf_counter() - start_time
+            print(f"{'':<12}{'':<10}{'a-star':>12}{fresh.cost_map.get_value(end_pos):>8}{fresh.expanded_nodes:>10}"
+                  f"{elapsed:>10.3f}")
+
+
+def path_trees():
+    """
+    Many (start, end) queries on one 128x128 board (10% water, scattered at random), from a handful of starts: A* for
+    every query, against looking each one up in the shortest path tree of its start (see PathTreeCache).
+    """
+    print("\n::::::::::Shortest path tree cache::::::::::")
+    print(f"{'planner':<12}{'queries':>10}{'hits':>8}{'misses':>8}{'seconds':>10}{'ms/query':>10}")
+    size, queries = 128, 1000
+    rng = random.Random(size)
+    board = open_board(size, size)
+    for index in rng.sample(range(size * size), size * size // 10):
+        board.set_element(GridPos(*divmod(index, size)), "W")
+    game_engine = GameEngine(board)
+    starts = [GridPos(rng.randrange(size), rng.randrange(size)) for _ in range(5)]
+    pairs = [(rng.choice(starts), GridPos(rng.randrange(size), rng.randrange(size))) for _ in range(queries)]
+
+    cache = PathTreeCache()
+    for planner_name in ["a-star", "cached"]:
+        start_time = time.perf_counter()
+        for start_pos, end_pos in pairs:
+            knight = Knight(game_engine, start_pos=start_pos, end_pos=end_pos)
+            if planner_name == "a-star":
+                knight.plan_shortest_path_astar()
+            else:
+                knight.plan_shortest_path_cached(cache)
+            knight.reconstruct_path()
+        elapsed = time.perf_counter() - start_time
+        print(f"{planner_name:<12}{queries:>10}{cache.hits:>8}{cache.misses:>8}{elapsed:>10.3f}"
+              f"{elapsed / queries * 1000:>10.2f}")
+
+
+benchmarks = {
+    "shortest_path": shortest_path,
+    "near_query": near_query,
+    "board_memory": board_memory,
+    "grid_pos_allocations": grid_pos_allocations,
+    "tour_search": tour_search,
+    "split_search": split_search,
+    "pruning": pruning,
+    "branch_and_bound": branch_and_bound,
+    "constructive_tour": constructive_tour,
+    "exact_oracle": exact_oracle,
+    "symmetry": symmetry,
+    "path_extension": path_extension,
+    "beam_search": beam_search,
+    "restarts": restarts,
+    "tie_breaking": tie_breaking,
+    "region_heuristic": region_heuristic,
+    "end_constrained": end_constrained,
+    "piece_index": piece_index,
+    "teleport_networks": teleport_networks,
+    "move_masks": move_masks,
+    "incremental": incremental,
+    "path_trees": path_trees,
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2:
+        benchmarks[sys.argv[1]]()
+    else:
+        for benchmark in benchmarks.values():
+            benchmark()
@@ -0,0 +1,217 @@
+"""
+Purpose: Beam search for the longest (highest cost) path: a breadth first alternative to TourSearch.
+
+A depth first search commits to its heuristic's first few choices, and if one of them was a mistake (eg: an island
+of cells cut off early), it can spend its whole time budget backtracking through the subtree under it. Beam search
+grows every path one move at a time instead: each level, every partial path in the beam is extended by each of its
+unvisited moves, and only the best `width` of the extended paths are kept for the next level. A mistake costs one
+beam slot, rather than the rest of the search.
+
+Scoring: Paths in a level all have the same number of moves, so they're ranked by:
+    1. lost: the cost of the cells they've stranded (unvisited cells with no unvisited moves left, that aren't next to
+        the end of the path). No path can ever collect them, so a path's final cost is at most (total cost of the
+        reachable cells) - lost: a lower lost is a higher ceiling.
+    2. cost: the cost collected so far.
+    3. rank: the position of the move in the heuristic's order, among the parent's moves. The heuristic is handed
+        (degree, move) tuples, like in TourSearch, where a degree is the number of unvisited moves out of a cell (as
+        tracked in Knight.available_moves_map), so dense_search_heuristic gives Warnsdorff's rule.
+With width=1 and dense_search_heuristic, this is Warnsdorff's greedy tour (plus the stranded cell check).
+
+Memory: Paths are stored as linked nodes, each pointing to its parent, so paths in the beam share their common
+prefixes (which, a few levels back, is usually all of them). Only nodes in the current beam hold a visited bitboard
+(one byte per cell), so memory is O(width * cells + path length), however long the search runs. Paths that reach
+the same cell through the same set of cells are interchangeable from then on, so only the best of them is kept
+(detected with a Zobrist hash of the visited set).
+
+Cells are referred to by cell index (see MoveGraph.index()), and costs are counted like TourSearch: the sum of the
+landing costs of every cell on the path, including the start.
+"""
+import heapq
+import random
+import time
+from collections import deque
+
+from .heuristics import needs_tour_search
+
+
+class _Node:
+    """
+    A partial path: its last cell, and a link to the rest of it.
+    """
+    __slots__ = ("cell", "parent", "cost", "lost", "zobrist", "visited")
+
+    def __init__(self, cell, parent, cost, lost, zobrist, visited):
+        self.cell = cell
+        self.parent = parent
+        self.cost = cost
+        self.lost = lost
+        self.zobrist = zobrist
+        self.visited = visited  # bytearray bitboard while in the beam, None once expanded
+
+    def path(self):
+        path = []
+        node = self
+        while node is not None:
+            path.append(node.cell)
+            node = node.parent
+        return path[::-1]
+
+
+class BeamSearch:
+    """
+    Beam search for the highest cost path from start. See module notes.
+
+    Attributes (results):
+        optimal_path: List of cell indices of the best path found.
+        optimal_cost: Cost of optimal_path (sum of landing costs, including the start).
+        nodes: Number of partial paths expanded.
+        complete: Whether the search ran until no path could be extended (rather than stopping early).
+    """
+
+    def __init__(self, graph, start, heuristic, width=64, time_allowed=10, cost_acceptance_thresh=None):
+        """
+        Inputs:
+            graph: MoveGraph of the board.
+            start: Cell index the path starts from.
+            heuristic: Sorts [(degree, move), ...] into the order moves should be preferred
+                (see LongestPathSearchHeuristics). Not the tie-breaking heuristics or RegionHeuristic, which need a
+                TourSearch.
+            width: Number of partial paths kept at each level.
+            time_allowed: Seconds before the search gives up, and keeps the best path found so far.
+            cost_acceptance_thresh: Stop as soon as a path this good is found (default: every cell visited).
+        """
+        if width < 1:
+            raise ValueError(f"Beam width must be at least 1, not {width}")
+        if needs_tour_search(heuristic):
+            raise ValueError("The tie-breaking heuristics and RegionHeuristic read the state of a TourSearch, so they "
+                             "can't be used by BeamSearch")
+        self.graph = graph
+        self.start = start
+        self.heuristic = heuristic
+        self.width = width
+        self.time_allowed = time_allowed
+        if cost_acceptance_thresh is None:
+            cost_acceptance_thresh = sum(cost for cost in graph.landing_costs if cost > 0)
+        self.cost_acceptance_thresh = cost_acceptance_thresh
+
+        self.optimal_path = [start]
+        self.optimal_cost = graph.landing_costs[start]
+        self.nodes = 0
+        self.complete = False
+
+    def run(self):
+        """
+        Run the search. Results are stored in optimal_path/optimal_cost.
+        """
+        adjacency, landing_costs = self.graph.adjacency(), self.graph.landing_costs
+        heuristic = self.heuristic
+        deadline = time.time() + self.time_allowed
+        rng = random.Random(0)
+        zobrist_keys = [rng.getrandbits(64) for _ in range(self.graph.size)]
+        reachable_cost = self._reachable_cost()
+
+        visited = bytearray(self.graph.size)
+        visited[self.start] = 1
+        best = _Node(self.start, None, landing_costs[self.start], 0, zobrist_keys[self.start], visited)
+        beam = [best]
+
+        while beam:
+            if time.time() > deadline or best.cost >= self.cost_acceptance_thresh:
+                break
+
+            # Score every extension of every path in the beam: (lost, -cost, rank, parent, move, checked)
+            candidates = []
+            for parent_order, node in enumerate(beam):
+                self.nodes += 1
+                end, visited = node.cell, node.visited
+                moves = [move for move in adjacency[end] if not visited[move]]
+                degrees = [(sum(1 for next_move in adjacency[move] if not visited[next_move]), move)
+                           for move in moves]
+                for rank, (degree, move) in enumerate(heuristic(degrees)):
+                    cost = node.cost + landing_costs[move]
+                    if degree == 0:
+                        # The path ends here: everything it hasn't collected is lost
+                        candidates.append((reachable_cost - cost, -cost, rank, parent_order, move, True))
+                        continue
+                    # Leaving end strands its unvisited neighbors that have no other way in
+                    lost = node.lost
+                    for neighbor in moves:
+                        if neighbor != move and neighbor not in adjacency[move] and \
+                                all(visited[way_in] or way_in == move for way_in in adjacency[neighbor]):
+                            lost += landing_costs[neighbor]
+                    candidates.append((lost, -cost, rank, parent_order, move, False))
+
+            # Keep the best `width` distinct paths. The island check only ever raises lost, so it's left until a
+            # candidate reaches the front of the queue (and it goes back in if its lost went up)
+            heapq.heapify(candidates)
+            next_beam = []
+            seen = set()
+            while candidates and len(next_beam) < self.width:
+                lost, neg_cost, rank, parent_order, move, checked = heapq.heappop(candidates)
+                parent = beam[parent_order]
+                zobrist = parent.zobrist ^ zobrist_keys[move]
+                if (move, zobrist) in seen:
+                    continue
+                if not checked:
+                    island_lost = self._island_lost(parent, move, reachable_cost)
+                    if island_lost > lost:
+                        heapq.heappush(candidates, (island_lost, neg_cost, rank, parent_order, move, True))
+                        continue
+                seen.add((move, zobrist))
+                visited = bytearray(parent.visited)
+                visited[move] = 1
+                child = _Node(move, parent, -neg_cost, lost, zobrist, visited)
+                next_beam.append(child)
+                if child.cost > best.cost:
+                    best = child
+
+            for node in beam:
+                node.visited = None  # expanded: only the beam needs its bitboard
+            beam = next_beam
+        else:
+            self.complete = True
+
+        self.optimal_cost = best.cost
+        self.optimal_path = best.path()
+
+    def _reachable_cost(self):
+        """
+        Total landing cost of the cells reachable from start (including start): the most any path could collect.
+        """
+        adjacency, landing_costs = self.graph.adjacency(), self.graph.landing_costs
+        seen = {self.start}
+        queue = deque([self.start])
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if move not in seen:
+                    seen.add(move)
+                    queue.append(move)
+        return sum(landing_costs[cell] for cell in seen)
+
+    def _island_lost(self, node, move, reachable_cost):
+        """
+        lost for the path node + [move], counting every cell that moving on from node.cell cuts off from move (not
+        just the stranded neighbors). Only node.cell leaves the graph of unvisited cells, so it can only split if one
+        of node.cell's other unvisited neighbors can no longer reach move: BFS from move stops as soon as it has
+        reached all of them, which is usually within a few cells, and only covers the whole component when the graph
+        really has split (TourSearch's island check).
+        """
+        adjacency, landing_costs, visited = self.graph.adjacency(), self.graph.landing_costs, node.visited
+        targets = {neighbor for neighbor in adjacency[node.cell] if not visited[neighbor] and neighbor != move}
+        seen = {move}
+        queue = deque([move])
+        while queue:
+            curr = queue.popleft()
+            if not targets:
+                return node.lost
+            for neighbor in adjacency[curr]:
+                if not visited[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+                    targets.discard(neighbor)
+        if not targets:
+            return node.lost
+        # Split: everything outside move's component is lost (along with whatever was lost already)
+        alive = reachable_cost - node.cost - node.lost  # cost of the unvisited cells node could still collect
+        return node.lost + alive - sum(landing_costs[cell] for cell in seen)
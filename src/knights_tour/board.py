@@ -14,12 +14,103 @@ using list(list()) instead, despite the drawbacks to speed. Reasons include:
     3) No need to install numpy
     4) My application isn't vectorized (and the algorithm isn't really well-suited for that). That means I wouldn't
     get the performance gains anways, since I'm accessing random elements, rather than passing entire vectors/arrays.
+
+Update: list(list()) got too heavy for large boards (a pointer per cell, plus the objects they point to, and
+copy.deepcopy every time the knight needed a map the same shape as the board). Storage is now flat, still without
+numpy, and cells can also be addressed by integer index = row * width + col:
+    - Board: one byte per cell. Each distinct value is given a small code in a palette (pieces are single characters,
+        so a board rarely has more than a handful), which keeps support for str, num, and None values.
+    - CostLayer / ParentLayer: typed numeric layers for the planners (cost to reach a cell, and the cell we came
+        from), which replace deep copies of the board.
+All of them expose the same get_value/set_element API, using GridPos, and copies are a single memcpy.
+
+Piece index: Board also keeps the cell indices of every piece, other than its background (the most common value,
+usually '.'), so find_all_elements doesn't scan the board: GameEngine.teleport() looks up the teleports on every
+expansion that lands on one, and the planners would otherwise turn quadratic on large boards. It's built when the
+board is loaded, and kept current by set_element/reset_board. The background isn't indexed, since its index would
+cost a python int per cell (far more than the board itself), and finding it means visiting most of the board anyway.
+
+Edit journal: Board also remembers which cell each set_element() edited (up to JOURNAL_LIMIT of them), so anything
+derived from the board (eg: MoveMasks) can catch up on just the cells that changed since it last looked, rather than
+starting over (see edits_since()).
 """
+from array import array
 
 from .grid_pos import GridPos
+from .symmetry import symmetries
+
+# Most edits the journal remembers (see edits_since()). Anything further behind has to start over.
+JOURNAL_LIMIT = 1 << 16
+
+
+class _FlatGrid:
+    """
+    Shared bookkeeping for grids stored as a flat, row-major array.
+    """
+
+    def __init__(self, height, width):
+        self._height = height
+        self._width = width
+        self._positions = None  # interned GridPos for each cell, created on demand by pos()
+
+    def __getstate__(self):
+        # The interned positions are just a cache: don't pickle them (eg: when sending a board to another process)
+        state = self.__dict__.copy()
+        state["_positions"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def index(self, pos):
+        """
+        Convert a GridPos to a flat cell index.
+        """
+        return pos.x * self._width + pos.y
+
+    def pos(self, index):
+        """
+        Convert a flat cell index to a GridPos. The same (interned) instance is returned every time, so converting
+        back and forth in a hot loop doesn't allocate. Copies of a grid share the cache, since their shape matches.
+        """
+        positions = self._positions
+        if positions is None:
+            positions = self._positions = [None] * (self._height * self._width)
+        pos = positions[index]
+        if pos is None:
+            pos = positions[index] = GridPos.from_index(index, self._width)
+        return pos
+
+    def _checked_index(self, pos):
+        """
+        Cell index of pos, raising IndexError if pos is not on the grid.
+        """
+        try:
+            row, col = pos.x, pos.y
+        except AttributeError as err:
+            raise AttributeError(f"get_value failed because of data type. Instead of GridPos, it tried to get -> "
+                                 f"{type(pos)}: {pos}") from err
+        if not (0 <= row < self._height and 0 <= col < self._width):
+            print(f"Index out of range. Board size: {self.get_width(), self.get_height()}\tpos: {pos}")
+            raise IndexError("Board index out of range")
+        return row * self._width + col
+
+    def get_width(self):
+        """
+        Get the width, or number of columns of the board.
+        """
+        assert self._height
+        return self._width
+
+    def get_height(self):
+        """
+        Get the height, or number of rows of the board.
+        """
+        assert self._height
+        return self._height
 
 
-class Board:
+class Board(_FlatGrid):
     def __init__(self, file_path):
         """
         Reads the board from a text file, parsing and loading into memory
@@ -31,17 +122,117 @@ class Board:
             board_str = file.read()
 
         rows = board_str.split("\n")
-        self._board_grid = []
-        for row in rows:
-            self._board_grid.append(row.split(" "))
+        super().__init__(0, 0)  # the shape is set by _load_grid()
+        # Incremented on every edit, so anything derived from the board (eg: a compiled MoveGraph) can tell it's stale
+        self.version = 0
+        self._symmetries = None  # (version, symmetries) of the last call to symmetries()
+        self._background = None  # code of the most common value (see _build_index())
+        self._locations = {}  # code -> set of cell indices, for every code except the background
+        self._journal = []  # cell index edited by each set_element() since _journal_version, oldest first
+        self._journal_version = 0
+        self._load_grid([row.split(" ") for row in rows])
+
+    def _load_grid(self, grid):
+        """
+        Replace the contents of the board with a python list of lists, where element = grid[row][col].
+        """
+        height = len(grid)
+        width = len(grid[0]) if grid else 0
+        if any(len(row) != width for row in grid):
+            raise ValueError("Board is not rectangular. All rows must have the same number of elements.")
+        super().__init__(height, width)
+
+        self._palette = []  # code -> value
+        self._codes = {}  # value -> code
+        self._cells = bytearray(self._code(value) for row in grid for value in row)
+        self._build_index()
+        self.version += 1
+        self._reset_journal()
+
+    def __getstate__(self):
+        # The journal is only there to help catch up, so don't pickle it either
+        state = super().__getstate__()
+        state["_journal"] = []
+        state["_journal_version"] = self.version
+        return state
+
+    def _reset_journal(self):
+        """
+        Start a new edit journal (every cell may have changed, so older versions can't catch up from it).
+        """
+        self._journal = []
+        self._journal_version = self.version
+
+    def _build_index(self):
+        """
+        Index the cells of every value except the background (the most common one). See module notes.
+        """
+        cells = self._cells
+        self._background = max(range(len(self._palette)), key=cells.count) if cells else None
+        self._locations = {}
+        for code in range(len(self._palette)):
+            if code == self._background:
+                continue
+            locations = set()
+            index = cells.find(code)
+            while index != -1:
+                locations.add(index)
+                index = cells.find(code, index + 1)
+            if locations:
+                self._locations[code] = locations
+
+    @property
+    def _board_grid(self):
+        """
+        The board as a python list of lists (a copy, so editing it does not edit the board).
+        """
+        palette = self._palette
+        return [[palette[code] for code in self._cells[start:start + self._width]]
+                for start in range(0, len(self._cells), self._width)]
+
+    @_board_grid.setter
+    def _board_grid(self, grid):
+        self._load_grid(grid)
+
+    def _code(self, value):
+        """
+        Look up the palette code for a value, adding it to the palette if it's new.
+        """
+        try:
+            return self._codes[value]
+        except KeyError:
+            if len(self._palette) > 255:
+                raise ValueError(f"Board cannot hold more than 256 distinct values. Failed to add: {value}") from None
+            self._codes[value] = len(self._palette)
+            self._palette.append(value)
+            return self._codes[value]
+
+    def copy(self):
+        """
+        Copy of the board. The cells are copied in one block, rather than element by element.
+        """
+        state = self.__dict__.copy()
+        state.update(_cells=bytearray(self._cells),
+                     _palette=list(self._palette),
+                     _codes=dict(self._codes),
+                     _locations={code: set(locations) for code, locations in self._locations.items()},
+                     _journal=list(self._journal))
+        board = Board.__new__(Board)
+        board.__setstate__(state)
+        return board
+
+    def __deepcopy__(self, memo):
+        return self.copy()
 
     def reset_board(self, value=None):
         """
         Set all elements on the board to a specific value
         """
-        for i in range(self.get_width()):
-            for j in range(self.get_height()):
-                self.set_element(GridPos(i, j), value)
+        self._background = self._code(value)
+        self._cells = bytearray([self._background]) * len(self._cells)
+        self._locations = {}
+        self.version += 1
+        self._reset_journal()
 
     def get_value(self, pos):
         """
@@ -49,55 +240,107 @@ class Board:
         Input: Index pos
         Output: Element/piece Value
         """
-        try:
-            return self._board_grid[pos.x][pos.y]
-        except IndexError:
-            print(f"Index out of range. Board size: {self.get_width(), self.get_height()}\tpos: {pos}")
-            raise
-        except AttributeError as err:
-            raise AttributeError(f"get_value failed because of data type. Instead of GridPos, it tried to get -> "
-                                 f"{type(pos)}: {pos}") from err
+        return self._palette[self._cells[self._checked_index(pos)]]
 
+    def get_value_at(self, index):
+        """
+        Retrieve an element by flat cell index (see index()).
+        """
+        return self._palette[self._cells[index]]
 
+    def values(self):
+        """
+        All elements of the board, as a flat list in cell index order.
+        """
+        palette = self._palette
+        return [palette[code] for code in self._cells]
 
     def set_element(self, pos, value):
-        self._board_grid[pos.x][pos.y] = value
+        index = self._checked_index(pos)
+        old_code, code = self._cells[index], self._code(value)
+        if old_code != code:
+            if old_code != self._background:
+                locations = self._locations[old_code]
+                locations.discard(index)
+                if not locations:
+                    del self._locations[old_code]
+            if code != self._background:
+                self._locations.setdefault(code, set()).add(index)
+            self._cells[index] = code
+        self.version += 1
+        self._journal.append(index)
+        if len(self._journal) > JOURNAL_LIMIT:
+            # Forget the oldest half
+            del self._journal[:JOURNAL_LIMIT // 2]
+            self._journal_version += JOURNAL_LIMIT // 2
 
-
-    def find_all_elements(self, search_value):
+    def edits_since(self, version):
         """
-        Finds all locations of a specific element on the board.
-        Inputs: The element value to search for.
-        Outputs: List of element locations [y, x]
+        Cell indices edited by set_element() since the board was at version (an earlier value of self.version),
+        oldest first, and possibly with repeats. None if the journal doesn't go back that far: the board has been
+        loaded or reset since (so every cell may have changed), or edited more than JOURNAL_LIMIT times.
         """
-        matches = []
-        for row in enumerate(self._board_grid):
-            for element in enumerate(row[1]):
-                if element[1] == search_value:
-                    matches.append(GridPos(row[0], element[0]))
-        return matches
+        if version < self._journal_version:
+            return None
+        return self._journal[version - self._journal_version:]
 
+    def symmetries(self):
+        """
+        Rotations and reflections that leave the board unchanged (other than the identity), as permutations of cell
+        indices (see symmetry.py). Worked out on first use, and again only after the board is edited.
+        """
+        if self._symmetries is None or self._symmetries[0] != self.version:
+            self._symmetries = (self.version, symmetries(self._cells, self._height, self._width))
+        return self._symmetries[1]
 
-    def get_width(self):
+    def cell_flags(self, values):
         """
-        Get the width, or number of columns of the board.
+        One byte per cell (in cell index order): 1 where the cell holds one of values, else 0. Worked out once per
+        palette entry, and mapped over the cells in C, so it's fast enough to run over a whole (large) board.
         """
-        assert self._board_grid
-        return len(self._board_grid[0])
+        table = bytearray(256)
+        for value in values:
+            if value in self._codes:
+                table[self._codes[value]] = 1
+        return self._cells.translate(table)
 
+    def distinct_values(self):
+        """
+        Every value that's on the board (at least once), from the piece index.
+        """
+        codes = list(self._locations)
+        if self._background is not None and self._cells.find(self._background) != -1:
+            codes.append(self._background)
+        return [self._palette[code] for code in sorted(codes)]
 
-    def get_height(self):
+    def find_all_elements(self, search_value):
         """
-        Get the height, or number of rows of the board.
+        Finds all locations of a specific element on the board.
+        Inputs: The element value to search for.
+        Outputs: List of element locations [y, x], in cell index order
+
+        Looked up in the piece index, so it's O(matches) (see module notes), other than for the background value.
         """
-        assert self._board_grid
-        return len(self._board_grid)
+        if search_value not in self._codes:
+            return []
+
+        code = self._codes[search_value]
+        if code != self._background:
+            return [self.pos(index) for index in sorted(self._locations.get(code, ()))]
+
+        # bytearray.find() does the scanning in C
+        matches = []
+        index = self._cells.find(code)
+        while index != -1:
+            matches.append(self.pos(index))
+            index = self._cells.find(code, index + 1)
+        return matches
 
     def write_board(self, board=None, write_path="Boards/temp_board.txt"):
         """
         Writes a copy of the boards current state as a txt file.
         Inputs:
-            board: python list of lists, where element = board[row][col].
+            board: python list of lists, where element = board[row][col]. Defaults to this board.
 
             write_path: path that file will be written to
                 File Format: grid delimited by ' ' between elements and '\n' between rows.
@@ -106,6 +349,8 @@ class Board:
 
         Side Effects: Writes the board
         """
+        if board is None:
+            board = self._board_grid
         board_str = self.board_to_str(board)
         with open(write_path, "w", encoding="utf-8") as file:
             file.write(board_str)
@@ -131,3 +376,59 @@ class Board:
             board_str = board_str + "\n"
         board_str = board_str[:-1]  # remove trailing '\n'
         return board_str
+
+
+class _NumericLayer(_FlatGrid):
+    """
+    A typed numeric grid, the same shape as a board. -1 is reserved to represent None (empty).
+    """
+
+    def __init__(self, height, width):
+        super().__init__(height, width)
+        self.values = array("i", [-1]) * (height * width)
+
+    def copy(self):
+        layer = self.__class__.__new__(self.__class__)
+        layer.__dict__.update(self.__dict__)
+        layer.values = array("i", self.values)
+        return layer
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def reset_board(self, value=None):
+        """
+        Set all elements to a specific value
+        """
+        self.values = array("i", [self._encode(value)]) * len(self.values)
+
+    def get_value(self, pos):
+        return self._decode(self.values[self._checked_index(pos)])
+
+    def set_element(self, pos, value):
+        self.values[self._checked_index(pos)] = self._encode(value)
+
+    def _encode(self, value):
+        return -1 if value is None else value
+
+    def _decode(self, value):
+        return None if value == -1 else value
+
+
+class CostLayer(_NumericLayer):
+    """
+    Integer cost of reaching each cell (eg: Knight.cost_map). Unreached cells are None.
+    """
+
+
+class ParentLayer(_NumericLayer):
+    """
+    The cell each cell was reached from (eg: Knight.journey_map). Stored as cell indices, and returned as GridPos.
+    Cells without a parent (the start, or unreached cells) are None.
+    """
+
+    def _encode(self, value):
+        return -1 if value is None else self.index(value)
+
+    def _decode(self, value):
+        return None if value == -1 else self.pos(value)
@@ -0,0 +1,749 @@
+"""
+Purpose: Build knight's tours of open (obstacle free) rectangular boards directly, rather than searching for them.
+
+Searching (Knight.find_longest_path_entry) is the only option on boards with barriers and terrain, but on an open
+rectangle it's the wrong tool: we already know exactly when a tour exists, and how to build one.
+
+Existence (open tours, Conrad et al. 1994): an m x n board (m <= n) has a tour, except for:
+    1 x n (n > 1), 2 x n, 3 x 3, 3 x 5, 3 x 6 and 4 x 4
+The squares alternate colors on every move, so on a board with an odd number of squares, the tour must also start
+(and end) on the majority color: the color of the corners. On 4 x n boards, every move from the two outer rows lands
+on one of the two inner rows, which forces the tour to start (and end) on an outer row.
+
+Closed tours (the last square is a knight's move from the first), Schwenk 1991: an m x n board (m <= n) has one, unless
+    m and n are both odd, m is 1, 2 or 4, or m is 3 and n is 4, 6 or 8
+A closed tour can start anywhere: it's a cycle, so it's just walked from the start. So wherever Schwenk's conditions
+allow, we build a closed tour, and the start can be any square.
+
+Construction (divide and conquer, in the spirit of Parberry's): the board is cut into blocks of 5 to 11 rows and
+columns, and each block gets a closed tour of its own. Block tours are found by a small depth first search, but only
+once for each shape: a 1000x1000 board only has a handful of distinct blocks. Then neighboring tours are joined, one
+pair at a time, until only one is left: if a square a1 of one tour is a knight's move from a square b1 of the other,
+and their next squares a2 and b2 are too, dropping the moves a1-a2 and b1-b2 and adding a1-b1 and a2-b2 makes the two
+cycles a single one. Blocks are joined along a spanning tree of the block grid, so any arrangement of blocks works.
+
+Open tours only (both sides odd): the block containing the start gets an open tour from the start instead, closed by
+a virtual move back to the start, which is never dropped when joining. Walking the joined cycle from the start, away
+from the virtual move, gives the tour. The start's block is the only one with odd sides, and it's placed an even
+number of squares from the board's edges, so its corners have the same color as the board's (which the start must
+have).
+
+Boards only 3 rows high can't be joined that way (two 3 x n tours never have a pair of moves to swap), so they're swept
+along instead: a depth first search that may never run more than a few columns ahead of the first column with an
+unvisited square. That keeps the search local, and remembering dead ends (by the visited squares around the knight)
+makes it linear in the length of the strip. A closed tour is swept as a pair of paths, out along the strip together,
+and joined at the far end. An open tour from a start along the strip covers the part up to the start in the same way
+(out from the start and back to next to it), and then sweeps the rest.
+
+4 x n boards have no closed tours, and every tour has the same shape: out along the outer squares of the start's
+color and the inner squares of the other (class A), then a single inner to inner move, and back along the rest (class
+B). Each class is two lanes, zigzagging along the strip (rows 0 and 2, and rows 1 and 3, taking whichever square of
+the class is in each column), so from a start anywhere along the strip, the knight runs along its lane to one end,
+turns onto the other lane (a short search over the last few columns), runs to the other end, turns, and comes back
+along its own lane to the start. Then it does the same with class B. Starts near an end sweep along the strip, twice.
+
+Small boards that don't fit any of these (or on which the blocks fail) are searched as a whole, from the start.
+
+Squares are referred to by cell index (row * width + col, see MoveGraph.index()).
+"""
+from collections import deque
+
+from .move_graph import KNIGHT_MOVES
+
+# Block sizes. Even blocks can be combined into any even length >= 6, and adding one odd block covers every odd
+# length >= 5.
+BLOCK_SIZES = {"even": (6, 8, 10), "odd": (5, 7, 9, 11)}
+MAX_SINGLE_BLOCK = 15  # board dimensions this small are also tried as a single block
+CYCLE_STARTS = 8  # squares near a corner to try starting a block's closed tour from
+MAX_LAYOUTS = 4  # ways of cutting the board into blocks to try, before giving up
+LOOKBACK = 6  # how many columns a sweep may run ahead of the first column with an unvisited square
+
+NODE_LIMIT = 5000  # give up on a block tour after this many nodes
+START_NODE_LIMIT = 50000  # node limit for an open tour of the start's block
+SWEEP_NODES_PER_SQUARE = 200  # node limit for sweeping a strip, per square
+LAST_RESORT_NODE_LIMIT = 200000  # node limit for searching a whole small board, when its blocks fail
+
+
+def knight_tour_exists(height, width, start=None):
+    """
+    Whether an open knight's tour exists on an open height x width board (see module notes).
+    If start (row, col) is given, also check that the tour can start there (color parity, and outer rows on 4 x n).
+
+    These are necessary, but on tiny boards they aren't sufficient, eg: a 3x4 board has no tour from its center squares.
+    """
+    short, long = sorted((height, width))
+    if short == 1:
+        exists = long == 1
+    elif short == 2:
+        exists = False
+    elif short == 3:
+        exists = long == 4 or long >= 7
+    elif short == 4:
+        exists = long >= 5
+    else:
+        exists = True
+
+    if exists and start is not None:
+        if height * width % 2:
+            exists = sum(start) % 2 == 0  # corners are (0, 0): the majority color has an even row + col
+        if short == 4:
+            exists = exists and start[0 if height == 4 else 1] in (0, 3)
+    return exists
+
+
+def closed_tour_exists(height, width):
+    """
+    Whether a closed knight's tour (ending a knight's move from its start) exists on an open height x width board
+    (Schwenk's conditions, see module notes).
+    """
+    short, long = sorted((height, width))
+    if short % 2 and long % 2 or short in (1, 2, 4):
+        return False
+    return short != 3 or long not in (4, 6, 8)
+
+
+def _sweep_path(height, length, start, ends=None, blocked=None, lookback=None, node_limit=NODE_LIMIT):
+    """
+    Depth first search (Warnsdorff's rule) for a path through every square of a height x length grid.
+
+    Inputs:
+        start: (row, col) of the first square.
+        ends: Set of (row, col) the path may end on (default: anywhere).
+        blocked: Set of (row, col) to leave out of the path.
+        lookback: If set, the path sweeps along the columns: it may not visit a square more than lookback columns
+            past the first column with an unvisited square.
+        node_limit: Give up after this many nodes.
+
+    Returns: List of (row, col), or None if no path was found.
+
+    Dead ends are remembered by the visited squares from the first column with an unvisited square onwards, so the
+    same dead end is never searched twice. When sweeping, those are the only squares that can still matter, which
+    makes the search linear in the length of the grid.
+    """
+    # Squares are numbered down the columns (col * height + row), so each column is a contiguous slice
+    size = height * length
+    adjacency = [tuple((col + d_col) * height + row + d_row for d_row, d_col in KNIGHT_MOVES
+                       if 0 <= row + d_row < height and 0 <= col + d_col < length)
+                 for col in range(length) for row in range(height)]
+    visited = bytearray(size)
+    for row, col in blocked or ():
+        visited[col * height + row] = 1
+    total = size - sum(visited)
+
+    if ends is not None:
+        # Every move changes color, so the path can only end on one of them
+        end_color = (sum(start) + total - 1) % 2
+        ends = {col * height + row for row, col in ends if (row + col) % 2 == end_color}
+        if not ends:
+            return None
+        # Tie break towards squares far from the ends, leaving the squares near the ends for last
+        order = [size] * size
+        for end in ends:
+            order[end] = 0
+        queue = deque(ends)
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if order[move] == size:
+                    order[move] = order[curr] - 1
+                    queue.append(move)
+    else:
+        # Tie break towards the lower columns, so the sweep doesn't leave squares behind
+        order = [index // height for index in range(size)]
+    if lookback is None:
+        lookback = length
+    window = (lookback + 3) * height
+
+    def open_col_from(col):
+        while col < length and all(visited[col * height:(col + 1) * height]):
+            col += 1
+        return col
+
+    def children(curr, open_col):
+        moves = [move for move in adjacency[curr] if not visited[move] and move // height - open_col < lookback]
+        degrees = {move: sum(1 for next_move in adjacency[move] if not visited[next_move]) for move in moves}
+        # A move left with no other way in can only be visited last, so it has to be next (and the end)
+        forced = [move for move in moves if degrees[move] == 0]
+        if forced:
+            return forced if len(forced) == 1 and len(path) + 1 == total else []
+        return sorted(moves, key=lambda move: (degrees[move], order[move]))
+
+    dead_ends = set()
+    first = start[1] * height + start[0]
+    visited[first] = 1
+    path = [first]
+    open_col = open_col_from(0)
+    # Frames: [moves, index of the next move, first column with an unvisited square, dead end key]
+    stack = [[children(first, open_col), 0, open_col, None]]
+    nodes = 0
+    while stack:
+        frame = stack[-1]
+        moves, move_index, open_col, key = frame
+        if len(path) == total and (ends is None or path[-1] in ends):
+            return [(index % height, index // height) for index in path]
+
+        if move_index < len(moves):
+            frame[1] += 1
+            move = moves[move_index]
+            visited[move] = 1
+            path.append(move)
+            next_open_col = open_col_from(open_col)
+            window_start = next_open_col * height
+            next_key = (move - window_start, bytes(visited[window_start:window_start + window]),
+                        length - next_open_col)
+            if next_key in dead_ends:
+                visited[path.pop()] = 0
+                continue
+
+            nodes += 1
+            if nodes > node_limit:
+                return None
+            stack.append([children(move, next_open_col), 0, next_open_col, next_key])
+            continue
+
+        if key is not None:
+            dead_ends.add(key)
+        visited[path.pop()] = 0
+        stack.pop()
+    return None
+
+
+class _BlockSolver:
+    """
+    Tours of a single block: closed ones for most blocks, and open ones from the start for the start's block. Tours
+    are memoized, since the same blocks come up over and over on a large board.
+    """
+
+    def __init__(self, node_limit=NODE_LIMIT):
+        self.node_limit = node_limit
+        self._cycles = {}
+        self._paths = {}
+
+    def cycle(self, height, width):
+        """
+        Closed tour of a height x width block (a tuple of local cell indices, row * width + col), or None if none was
+        found within node_limit.
+        """
+        key = (height, width)
+        if key not in self._cycles:
+            self._cycles[key] = None
+            # A closed tour is a path that ends a move away from its start. Which start makes that easy for the search
+            # depends on the shape, so try the squares near a corner, on the block and on its transpose.
+            starts = sorted(((row, col) for row in range(min(height, 4)) for col in range(min(width, 4))), key=sum)
+            for start in starts[:CYCLE_STARTS]:
+                for transpose in (False, True):
+                    shape = (width, height) if transpose else (height, width)
+                    row, col = start[::-1] if transpose else start
+                    ends = {(row + d_row, col + d_col) for d_row, d_col in KNIGHT_MOVES
+                            if 0 <= row + d_row < shape[0] and 0 <= col + d_col < shape[1]}
+                    path = _sweep_path(*shape, (row, col), ends=ends, node_limit=self.node_limit)
+                    if path is not None:
+                        squares = [square[::-1] if transpose else square for square in path]
+                        self._cycles[key] = tuple(path_row * width + path_col for path_row, path_col in squares)
+                        return self._cycles[key]
+        return self._cycles[key]
+
+    def path(self, height, width, start):
+        """
+        Open tour of a height x width block from start (row, col), as a tuple of local cell indices, or None if none
+        was found within START_NODE_LIMIT.
+        """
+        key = (height, width, start)
+        if key not in self._paths:
+            path = _sweep_path(height, width, start, node_limit=max(self.node_limit, START_NODE_LIMIT))
+            self._paths[key] = None if path is None else tuple(row * width + col for row, col in path)
+        return self._paths[key]
+
+
+def _split_even(length, sizes):
+    """
+    Split an even length into block lengths from sizes, mostly of the middle size. Returns a list of lengths (empty
+    for 0), or None if there is no such split.
+    """
+    preferred = sorted(sizes, key=lambda size: abs(size - sizes[len(sizes) // 2]))
+    last_size = [None] * (length + 1)  # last_size[n]: size of the last block in a split of n, if n can be split
+    last_size[0] = 0
+    for total in range(1, length + 1):
+        for size in preferred:
+            if size <= total and last_size[total - size] is not None:
+                last_size[total] = size
+                break
+
+    if last_size[length] is None:
+        return None
+    parts, total = [], length
+    while total:
+        parts.append(last_size[total])
+        total -= last_size[total]
+    return parts
+
+
+def _split_around(length, position, sizes, start_sizes):
+    """
+    Ways to split a board dimension into block lengths, as a generator of (lengths, index of the start's block).
+    The start's block contains position, and its length is one of start_sizes; every other block's length is one of
+    sizes (see BLOCK_SIZES). Dimensions up to MAX_SINGLE_BLOCK are tried as a single block first.
+    """
+    if length <= MAX_SINGLE_BLOCK:
+        yield [length], 0
+    for start_size in sorted(start_sizes, key=lambda size: abs(size - start_sizes[len(start_sizes) // 2])):
+        if start_size >= length:
+            continue  # a single block, if it's small enough (above)
+        for before in range(max(0, position - start_size + 1), min(position, length - start_size) + 1):
+            head, tail = _split_even(before, sizes), _split_even(length - before - start_size, sizes)
+            if head is not None and tail is not None:
+                yield head + [start_size] + tail, len(head)
+                break
+
+
+def _is_move(width, curr, other):
+    """
+    Whether cells curr and other (indices on a board width squares wide) are a knight's move apart.
+    """
+    return abs(curr // width - other // width) * abs(curr % width - other % width) == 2
+
+
+def _join(width, links, virtual, first_block, second_block):
+    """
+    Join the cycles through two neighboring blocks into one (see module notes), by swapping two moves near the edge
+    they share. Blocks are (row, col, height, width), and the second one is right of, or below, the first.
+
+    Inputs:
+        links: The two neighbors of each cell on its cycle, as [neighbors_0, neighbors_1] lists. Updated in place.
+        virtual: The (start, end) of the start block's open tour, whose virtual move can't be dropped.
+
+    Returns: True if they were joined.
+    """
+    row, col, height, block_width = first_block
+    next_row, next_col, next_height, next_width = second_block
+    if next_col > col:  # side by side: the first block's last 2 columns
+        edge = [(edge_row, edge_col) for edge_row in range(row, row + height)
+                for edge_col in range(next_col - 2, next_col)]
+    else:  # one above the other: the first block's last 2 rows
+        edge = [(edge_row, edge_col) for edge_row in range(next_row - 2, next_row)
+                for edge_col in range(col, col + block_width)]
+    neighbors_0, neighbors_1 = links
+
+    for edge_row, edge_col in edge:
+        curr = edge_row * width + edge_col
+        for d_row, d_col in KNIGHT_MOVES:
+            other_row, other_col = edge_row + d_row, edge_col + d_col
+            if not (next_row <= other_row < next_row + next_height and next_col <= other_col < next_col + next_width):
+                continue
+            other = other_row * width + other_col
+            for curr_next in (neighbors_0[curr], neighbors_1[curr]):
+                if {curr, curr_next} == set(virtual):
+                    continue
+                for other_next in (neighbors_0[other], neighbors_1[other]):
+                    if {other, other_next} == set(virtual) or not _is_move(width, curr_next, other_next):
+                        continue
+                    # Drop curr-curr_next and other-other_next, add curr-other and curr_next-other_next
+                    for cell, old, new in ((curr, curr_next, other), (curr_next, curr, other_next),
+                                           (other, other_next, curr), (other_next, other, curr_next)):
+                        if neighbors_0[cell] == old:
+                            neighbors_0[cell] = new
+                        else:
+                            neighbors_1[cell] = new
+                    return True
+    return False
+
+
+def _block_tour(height, width, start, solver):
+    """
+    Tour of a board at least 5 squares in both dimensions, by joining block tours (see module notes). Up to
+    MAX_LAYOUTS ways of cutting the board into blocks are tried, since a block with no usable tour, or blocks that
+    don't join, may be fine in a layout of other sizes.
+
+    Returns a list of cell indices, or None if it failed.
+    """
+    closed = closed_tour_exists(height, width)
+    row_splits = list(_split_around(height, start[0], BLOCK_SIZES["even"],
+                                    BLOCK_SIZES["odd" if height % 2 else "even"]))
+    col_splits = list(_split_around(width, start[1], BLOCK_SIZES["even"],
+                                    BLOCK_SIZES["odd" if width % 2 else "even"]))
+
+    layouts = 0
+    for col_parts, start_col_part in col_splits:
+        for row_parts, start_row_part in row_splits:
+            if layouts == MAX_LAYOUTS:
+                return None
+            layouts += 1
+            tour = _join_blocks(height, width, start, row_parts, col_parts,
+                                None if closed else (start_row_part, start_col_part), solver)
+            if tour is not None:
+                return tour
+    return None
+
+
+def _join_blocks(height, width, start, row_parts, col_parts, start_part, solver):
+    """
+    Tour of the blocks given by splitting the rows and columns into row_parts and col_parts (see _block_tour()).
+    start_part is the (row, col) of the start's block in the block grid, if it needs an open tour from the start, or
+    None if every block gets a closed tour. Returns a list of cell indices, or None if it failed.
+    """
+    row_starts = [sum(row_parts[:index]) for index in range(len(row_parts))]
+    col_starts = [sum(col_parts[:index]) for index in range(len(col_parts))]
+    size = height * width
+    neighbors_0, neighbors_1 = [0] * size, [0] * size
+    first = start[0] * width + start[1]
+    virtual = (first, first)
+
+    offsets = {}
+    for part_row, (block_row, block_height) in enumerate(zip(row_starts, row_parts)):
+        for part_col, (block_col, block_width) in enumerate(zip(col_starts, col_parts)):
+            if start_part == (part_row, part_col):
+                path = solver.path(block_height, block_width, (start[0] - block_row, start[1] - block_col))
+                key = None
+            else:
+                path = solver.cycle(block_height, block_width)
+                key = (block_height, block_width)
+            if path is None:
+                return None
+            # Position of each cell of the tour, relative to the block's corner, on the board
+            if key not in offsets:
+                offsets[key] = [row * width + col for row, col in (divmod(local, block_width) for local in path)]
+            corner = block_row * width + block_col
+            cells = [corner + offset for offset in offsets[key]]
+            for prev, curr, nxt in zip(cells[-1:] + cells[:-1], cells, cells[1:] + cells[:1]):
+                neighbors_0[curr], neighbors_1[curr] = prev, nxt
+            if key is None:
+                virtual = (cells[0], cells[-1])
+
+    # Join neighboring blocks along a spanning tree of the block grid (union-find over the blocks)
+    blocks = [(block_row, block_col, block_height, block_width)
+              for block_row, block_height in zip(row_starts, row_parts)
+              for block_col, block_width in zip(col_starts, col_parts)]
+    parents = list(range(len(blocks)))
+
+    def find(block):
+        while parents[block] != block:
+            parents[block] = parents[parents[block]]
+            block = parents[block]
+        return block
+
+    pairs = [(index, index + 1) for index in range(len(blocks)) if (index + 1) % len(col_parts)]
+    pairs += [(index, index + len(col_parts)) for index in range(len(blocks) - len(col_parts))]
+    components = len(blocks)
+    for first_block, second_block in pairs:
+        roots = find(first_block), find(second_block)
+        if roots[0] != roots[1] and _join(width, (neighbors_0, neighbors_1), virtual,
+                                          blocks[first_block], blocks[second_block]):
+            parents[roots[1]] = roots[0]
+            components -= 1
+    if components > 1:
+        return None
+
+    # Walk the cycle from the start, away from the virtual move (if there is one)
+    tour = [first]
+    prev, curr = virtual[1] if start_part is not None else neighbors_0[first], first
+    for _ in range(size - 1):
+        prev, curr = curr, neighbors_1[curr] if neighbors_0[curr] == prev else neighbors_0[curr]
+        tour.append(curr)
+    return tour
+
+
+def _lane_tour(length, start):
+    """
+    Tour of a 4 x length strip, from start (row, col) anywhere along it but the last few columns, by running along
+    the lanes of each class (see module notes). Returns a list of (row, col), or None if it failed.
+    """
+    color = sum(start) % 2
+
+    def in_first_class(row, col):
+        return ((row + col) % 2 == color) == (row in (0, 3))
+
+    def in_second_class(row, col):
+        return not in_first_class(row, col)
+
+    first_half = _lane_path(length, in_first_class, start)
+    if first_half is None:
+        return None
+    # The single inner to inner move, into the second class
+    row, col = first_half[-1]
+    for turn_col in (col - 2, col + 2):
+        if 0 <= turn_col < length:
+            second_half = _lane_path(length, in_second_class, (3 - row, turn_col))
+            if second_half is not None:
+                return first_half + second_half
+    return None
+
+
+def _lane_path(length, in_class, start):
+    """
+    Path through every square of a class (in_class(row, col)) of a 4 x length strip, from start: along its lane to
+    the left end, back along the other lane to the right end, and back along its lane to the column after start.
+    Returns a list of (row, col), or None if it failed.
+    """
+    def lane(lane_row, col):
+        return next((row, col) for row in (lane_row, lane_row + 2) if in_class(row, col))
+
+    row, col = start
+    own, other = row % 2, 1 - row % 2
+    for turn_width in range(1, LOOKBACK):
+        if not turn_width <= col < length - 1 - turn_width:
+            break
+        left_turn = _lane_turn(in_class, range(turn_width), lane(own, turn_width), lane(other, turn_width))
+        right_turn = _lane_turn(in_class, range(length - 1, length - 1 - turn_width, -1),
+                                lane(other, length - 1 - turn_width), lane(own, length - 1 - turn_width))
+        if left_turn is not None and right_turn is not None:
+            return ([lane(own, path_col) for path_col in range(col, turn_width - 1, -1)] + left_turn +
+                    [lane(other, path_col) for path_col in range(turn_width, length - turn_width)] + right_turn +
+                    [lane(own, path_col) for path_col in range(length - 1 - turn_width, col, -1)])
+    return None
+
+
+def _lane_turn(in_class, cols, before, after):
+    """
+    Path through every square of a class in cols (the last few columns at an end of a 4 x n strip, from the end
+    inwards), coming from the square before, and going on to the square after. Returns a list of (row, col), or None.
+    """
+    squares = [(row, col) for col in cols for row in range(4) if in_class(row, col)]
+    local = {(row, col): (row, index) for index, col in enumerate(cols) for row in range(4)}
+    blocked = {local[(row, col)] for col in cols for row in range(4) if not in_class(row, col)}
+    ends = {local[square] for square in squares if _is_square_move(square, after)}
+    for first in squares:
+        if _is_square_move(first, before):
+            path = _sweep_path(4, len(cols), local[first], ends=ends, blocked=blocked)
+            if path is not None:
+                return [(row, cols[index]) for row, index in path]
+    return None
+
+
+def _is_square_move(square, other):
+    """
+    Whether squares (row, col) are a knight's move apart.
+    """
+    return abs(square[0] - other[0]) * abs(square[1] - other[1]) == 2
+
+
+def _sweep_pair(height, length, starts, blocked=None, lookback=LOOKBACK, node_limit=NODE_LIMIT):
+    """
+    Like _sweep_path(), but for two paths at once, from starts (two (row, col) near the left end), which between them
+    visit every square, and end a knight's move apart. Joined at their ends, they make a single path that runs out
+    along the strip and back again (and if the starts are a knight's move apart too, a closed tour).
+
+    The path that's further behind always moves next, so the two sweep along together, and dead ends are remembered
+    by both their squares along with the visited squares (see _sweep_path()).
+
+    Returns: The two paths, as lists of (row, col), or None if they weren't found.
+    """
+    size = height * length
+    adjacency = [tuple((col + d_col) * height + row + d_row for d_row, d_col in KNIGHT_MOVES
+                       if 0 <= row + d_row < height and 0 <= col + d_col < length)
+                 for col in range(length) for row in range(height)]
+    visited = bytearray(size)
+    for row, col in blocked or ():
+        visited[col * height + row] = 1
+    heads = [col * height + row for row, col in starts]
+    for head in heads:
+        visited[head] = 1
+    left = size - sum(visited)
+    # Joined, they make a path through every square, and every move changes color
+    if (sum(starts[0]) + sum(starts[1]) + left + 1) % 2:
+        return None
+    window = (lookback + 3) * height
+
+    def open_col_from(col):
+        while col < length and all(visited[col * height:(col + 1) * height]):
+            col += 1
+        return col
+
+    def children(open_col):
+        head = 0 if heads[0] // height <= heads[1] // height else 1
+        other = heads[1 - head]
+        moves = [move for move in adjacency[heads[head]]
+                 if not visited[move] and move // height - open_col < lookback]
+        # Ways into each move, counting the other path's head (which it can end next to)
+        degrees = {move: sum(1 for next_move in adjacency[move] if not visited[next_move] or next_move == other)
+                   for move in moves}
+        forced = [move for move in moves if degrees[move] == 0]
+        if forced:
+            return head, forced if len(forced) == 1 and left == 1 else []
+        return head, sorted(moves, key=lambda move: (degrees[move], move // height))
+
+    paths = [[head] for head in heads]
+    dead_ends = set()
+    open_col = open_col_from(0)
+    # Frames: [head moved, moves, index of the next move, first column with an unvisited square, dead end key]
+    stack = [[*children(open_col), 0, open_col, None]]
+    nodes = 0
+    while stack:
+        frame = stack[-1]
+        head, moves, move_index, open_col, key = frame
+        if not left:
+            if heads[1] in adjacency[heads[0]]:
+                return [[(index % height, index // height) for index in path] for path in paths]
+            move_index = len(moves)
+
+        if move_index < len(moves):
+            frame[2] += 1
+            move = moves[move_index]
+            visited[move] = 1
+            left -= 1
+            paths[head].append(move)
+            heads[head] = move
+            next_open_col = open_col_from(open_col)
+            window_start = next_open_col * height
+            next_key = (heads[0] - window_start, heads[1] - window_start,
+                        bytes(visited[window_start:window_start + window]), length - next_open_col)
+            if next_key not in dead_ends:
+                nodes += 1
+                if nodes > node_limit:
+                    return None
+                stack.append([*children(next_open_col), 0, next_open_col, next_key])
+                continue
+        elif key is not None:
+            dead_ends.add(key)
+            stack.pop()
+            head = stack[-1][0] if stack else None
+        else:
+            return None
+        # Undo the last move (a known dead end, or one that's been fully searched)
+        paths[head].pop()
+        visited[heads[head]] = 0
+        left += 1
+        heads[head] = paths[head][-1]
+    return None
+
+
+def _three_row_tour(length, start):
+    """
+    Tour of a 3 x length strip from start (row, col) anywhere along it. Returns a list of (row, col), or None if it
+    failed.
+
+    Where there is a closed tour, it's swept out along the strip and back as a pair of paths (see _sweep_pair()), and
+    walked from the start. Otherwise, the part of the strip up to the start is swept out and back from the start,
+    ending next to it, and the rest of the strip is swept from there. Starts near the right end are mirrored.
+    """
+    node_limit = NODE_LIMIT + SWEEP_NODES_PER_SQUARE * 3 * length
+    row, col = start
+    if closed_tour_exists(3, length):
+        # The move (1, 0) - (0, 2) is in every closed tour, since (1, 0) has only two moves
+        pair = _sweep_pair(3, length, [(1, 0), (0, 2)], node_limit=node_limit)
+        if pair is None:
+            return None
+        cycle = pair[0] + pair[1][::-1]
+        first = cycle.index(start)
+        return cycle[first:] + cycle[:first]
+
+    mirrored = length - 1 - col < col
+    if mirrored:
+        col = length - 1 - col
+    path = _strip_tour(3, length, (row, col)) if col < LOOKBACK else None
+    # Out and back over columns [0, split), mirrored so the pair sweeps rightwards from the start, then the rest
+    for split in range(col + 1, min(col + 4, length - 2)):
+        if path is not None:
+            break
+        for turn in ((turn_row, turn_col) for turn_col in range(split - 2, split) for turn_row in range(3)):
+            rest = [(turn[0] + d_row, turn[1] + d_col - split) for d_row, d_col in KNIGHT_MOVES
+                    if 0 <= turn[0] + d_row < 3 and split <= turn[1] + d_col < split + 2]
+            if turn == (row, col) or not rest:
+                continue
+            pair = _sweep_pair(3, split, [(row, split - 1 - col), (turn[0], split - 1 - turn[1])],
+                               node_limit=node_limit)
+            if pair is None:
+                continue
+            rest_path = next(filter(None, (_strip_tour(3, length - split, first) for first in rest)), None)
+            if rest_path is not None:
+                path = ([(path_row, split - 1 - path_col) for path_row, path_col in pair[0] + pair[1][::-1]] +
+                        [(path_row, path_col + split) for path_row, path_col in rest_path])
+                break
+    if path is None or not mirrored:
+        return path
+    return [(path_row, length - 1 - path_col) for path_row, path_col in path]
+
+
+def _strip_tour(height, length, start):
+    """
+    Tour of a strip (a board 3 or 4 rows high), sweeping along it from start (row, col) near its left end.
+    Returns a list of (row, col), or None if it failed.
+    """
+    node_limit = NODE_LIMIT + SWEEP_NODES_PER_SQUARE * height * length
+    if height != 4:
+        return _sweep_path(height, length, start, lookback=LOOKBACK, node_limit=node_limit)
+
+    # Out along the outer squares of the start's color (and the inner squares of the other), then a single inner to
+    # inner move near the right end, and back along the rest. The way back is mirrored, so it also sweeps rightwards.
+    color = sum(start) % 2
+    squares = {(row, col) for row in range(height) for col in range(length)}
+    outward = {(row, col) for row, col in squares if ((row + col) % 2 == color) == (row in (0, 3))}
+    back = squares - outward
+    mirrored_outward = {(row, length - 1 - col) for row, col in outward}
+    turns = sorted(((row, col) for row, col in back if row in (1, 2) and col >= length - LOOKBACK),
+                   key=lambda square: -square[1])
+    for row, col in turns:
+        back_path = _sweep_path(height, length, (row, length - 1 - col), blocked=mirrored_outward,
+                                lookback=LOOKBACK, node_limit=node_limit)
+        if back_path is None:
+            continue
+        ends = {(3 - row, col + d_col) for d_col in (-2, 2)} & outward
+        out_path = _sweep_path(height, length, start, ends=ends, blocked=back, lookback=LOOKBACK,
+                               node_limit=node_limit)
+        if out_path is not None:
+            return out_path + [(back_row, length - 1 - back_col) for back_row, back_col in back_path]
+    return None
+
+
+def _four_row_tour(length, start):
+    """
+    Tour of a 4 x length strip from start (row, col) anywhere along it: by lanes, or by sweeping from the nearer
+    end, if the start is too close to it for the lanes' turns. Returns a list of (row, col), or None if it failed.
+    """
+    row, col = start
+    mirrored = length - 1 - col < col
+    if mirrored:
+        col = length - 1 - col
+    path = _lane_tour(length, (row, col))
+    if path is None and col < LOOKBACK:
+        path = _strip_tour(4, length, (row, col))
+    if path is None or not mirrored:
+        return path
+    return [(path_row, length - 1 - path_col) for path_row, path_col in path]
+
+
+def build_tour(height, width, start, solver=None):
+    """
+    Build an open knight's tour of an open height x width board, from any square it can start on.
+    Where Schwenk's conditions allow (see closed_tour_exists()), the tour is closed: its last square is a knight's
+    move from the start.
+
+    Inputs:
+        start: (row, col) of the first square.
+        solver: A _BlockSolver, to share memoized block tours between calls.
+
+    Returns: List of cell indices, in the order the knight visits them.
+    Raises: ValueError if no tour exists from start (see knight_tour_exists()), or none was found: only possible on
+        small boards, where the conditions aren't sufficient (eg: the middle row of a 3x4 board).
+    """
+    if not knight_tour_exists(height, width, start):
+        raise ValueError(f"No knight's tour of a {height}x{width} board starts at {start}")
+    if solver is None:
+        solver = _BlockSolver()
+
+    # Work on a transposed copy of the board (the frame), if needed, so it's no higher than it is wide
+    transpose = height > width
+    frame_height, frame_width = (width, height) if transpose else (height, width)
+    frame_start = start[::-1] if transpose else start
+
+    tour = None
+    if frame_height == 4:
+        path = _four_row_tour(frame_width, frame_start)
+        if path is not None:
+            tour = [row * frame_width + col for row, col in path]
+    elif frame_height == 3:
+        path = _three_row_tour(frame_width, frame_start)
+        if path is not None:
+            tour = [row * frame_width + col for row, col in path]
+    elif frame_height >= 5:
+        tour = _block_tour(frame_height, frame_width, frame_start, solver)
+    if tour is None and frame_width <= MAX_SINGLE_BLOCK:
+        # Last resort on small boards: a longer search of the whole board
+        path = _sweep_path(frame_height, frame_width, frame_start, node_limit=LAST_RESORT_NODE_LIMIT)
+        if path is not None:
+            tour = [row * frame_width + col for row, col in path]
+    if tour is None:
+        raise ValueError(f"Failed to build a tour of a {height}x{width} board from {start}")
+
+    if transpose:
+        return [(index % frame_width) * width + index // frame_width for index in tour]
+    return tour
@@ -0,0 +1,203 @@
+"""
+Purpose: Exact (guaranteed optimal) highest cost paths on small boards, by dynamic programming over visited sets.
+
+TourSearch can prove a path optimal by running to completion (see bound=True), but it explores every path to get
+there, and paths that visit the same cells and end on the same cell are explored over and over. The best way to
+continue only depends on where the knight is, and which cells it has already visited, so ExactSearch memoizes:
+    best(cell, visited) = max over unvisited moves m of: landing cost of m + best(m, visited + m)
+The visited set is a bitmask over the cells reachable from the start (bit i for the i-th of them), so there are at
+most cells * 2^cells states. In practice only a small fraction of them can be reached by a knight, which keeps
+boards of up to about 30 open cells within a few seconds (MAX_CELLS).
+
+A branch stops early once it finds a path collecting every unvisited cell, since nothing can beat that. That's what
+makes boards with full tours fast: the first tour found ends the search.
+
+Results can be stored in an ExactCache (opt in, by giving it a file), a JSON file keyed by the board (its size,
+pieces, costs) and the start, so asking again about the same board is instant, even from another process or a later
+run. Keys are canonical (see symmetry.canonical_form()): a rotated or reflected board, with its start moved to match,
+finds the same entry. That makes the exact optimum cheap to use as an oracle, when benchmarking the heuristic searches.
+
+Cells are referred to by cell index (see MoveGraph.index()), and costs are counted like TourSearch: the sum of the
+landing costs of every cell on the path, including the start.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from collections import deque
+
+from .symmetry import canonical_form, inverse
+
+MAX_CELLS = 30  # most cells reachable from the start that ExactSearch will take on (states double with each cell)
+
+
+class ExactSearch:
+    """
+    Highest cost path from start, by dynamic programming over (cell, visited cells) states. See module notes.
+
+    Attributes (results):
+        optimal_path: List of cell indices of the best path.
+        optimal_cost: Cost of optimal_path (sum of landing costs, including the start).
+        nodes: Number of states evaluated (0 if the result came from the cache).
+        cells: Number of cells reachable from start.
+    """
+
+    def __init__(self, graph, start, max_cells=MAX_CELLS, cache=None):
+        """
+        Inputs:
+            graph: MoveGraph of the board.
+            start: Cell index the path starts from.
+            max_cells: Raise ValueError (on run()) if more cells than this are reachable from start.
+            cache: Optional ExactCache, to look results up in (and store them to).
+        """
+        self.graph = graph
+        self.start = start
+        self.max_cells = max_cells
+        self.cache = cache
+
+        self.optimal_path = [start]
+        self.optimal_cost = graph.landing_costs[start]
+        self.nodes = 0
+        self.cells = 0
+
+    def key(self):
+        """
+        Cache key: identifies the board (size, pieces and costs), the barrier rules and the start, up to rotations and
+        reflections. Returns (key, perm), where perm maps cell indices to the canonical board (see
+        symmetry.canonical_form()).
+        """
+        graph = self.graph
+        cells = [(str(value), cost) for value, cost in zip(graph.board.values(), graph.landing_costs)]
+        form, perm = canonical_form(cells, graph.height, graph.width, self.start)
+        if graph.staircase:
+            form = (form, "staircase")  # (the default rules keep their original keys)
+        return hashlib.sha256(repr(form).encode("utf-8")).hexdigest(), perm
+
+    def run(self):
+        """
+        Find the highest cost path. Results are stored in optimal_path/optimal_cost.
+        """
+        key, perm = self.key() if self.cache is not None else (None, None)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                to_board = inverse(perm)
+                self.optimal_cost = cached["cost"]
+                self.optimal_path = [to_board[index] for index in cached["path"]]
+                self.cells = len(self._reachable())
+                return
+
+        cells = self._reachable()
+        self.cells = len(cells)
+        if len(cells) > self.max_cells:
+            raise ValueError(f"{len(cells)} cells are reachable from the start. The exact search is limited to "
+                             f"{self.max_cells} (see MAX_CELLS).")
+
+        # Work on local indices (bit positions) of the reachable cells
+        local = {cell: bit for bit, cell in enumerate(cells)}
+        adjacency = self.graph.adjacency()
+        moves = [tuple(local[move] for move in adjacency[cell] if move in local) for cell in cells]
+        costs = [self.graph.landing_costs[cell] for cell in cells]
+        count = len(cells)
+        best = {}  # mask * count + cell: highest cost of continuing from cell, having visited mask
+
+        def continuation(curr, mask, remaining):
+            """
+            Highest cost of continuing from curr, where mask is the visited cells, and remaining is the cost of the
+            unvisited ones (no path can collect more than that).
+            """
+            state = mask * count + curr
+            value = best.get(state)
+            if value is None:
+                value = 0
+                for move in moves[curr]:
+                    if not mask >> move & 1:
+                        cost = costs[move] + continuation(move, mask | 1 << move, remaining - costs[move])
+                        if cost > value:
+                            value = cost
+                            if value == remaining:
+                                break  # collected every cell: nothing can do better
+                best[state] = value
+            return value
+
+        # The recursion is only as deep as the path, which is at most max_cells long
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * len(cells) + 100))
+        mask = 1  # the start is local index 0
+        continuation(0, mask, sum(costs) - costs[0])
+        self.nodes = len(best)
+
+        # Follow the best continuations to rebuild the path
+        path, curr = [0], 0
+        while True:
+            target = best[mask * count + curr]
+            if target == 0:
+                break
+            for move in moves[curr]:
+                state = (mask | 1 << move) * count + move
+                if not mask >> move & 1 and state in best and costs[move] + best[state] == target:
+                    path.append(move)
+                    curr, mask = move, mask | 1 << move
+                    break
+        self.optimal_path = [cells[bit] for bit in path]
+        self.optimal_cost = sum(costs[bit] for bit in path)
+
+        if key is not None:
+            self.cache.put(key, {"cost": self.optimal_cost, "path": [perm[index] for index in self.optimal_path]})
+
+    def _reachable(self):
+        """
+        Cells reachable from start (breadth first, so start is first).
+        """
+        adjacency = self.graph.adjacency()
+        cells = [self.start]
+        seen = {self.start}
+        queue = deque(cells)
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if move not in seen:
+                    seen.add(move)
+                    cells.append(move)
+                    queue.append(move)
+        return cells
+
+
+class ExactCache:
+    """
+    Persistent store of ExactSearch results: a JSON file of {key: {"cost": cost, "path": [cell indices]}}, with paths
+    on the canonical board (see ExactSearch.key()).
+    The file is read once, on first use, and rewritten (atomically) whenever a result is added: once per search.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._results = None
+
+    def _load(self):
+        if self._results is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._results = json.load(file)
+            except FileNotFoundError:
+                self._results = {}
+        return self._results
+
+    def get(self, key):
+        """
+        The stored result for key, or None.
+        """
+        return self._load().get(key)
+
+    def put(self, key, result):
+        """
+        Store a result, and write the cache to disk.
+        """
+        self._load()[key] = result
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as file:
+            json.dump(self._results, file)
+        os.replace(file.name, self.path)
+
+    def __len__(self):
+        return len(self._load())
@@ -0,0 +1,113 @@
+"""
+Purpose: Lengthen a path after the depth first search runs out of time, by rotating its end (Pósa's rotations).
+
+When TourSearch times out on a large board, its best path usually covers most of the board, and the cells it missed
+are stuck behind the end of the path. More backtracking rarely helps: the mistake was made thousands of moves ago.
+Rotations fix the end of the path instead. If the end of the path v0 ... vi vi+1 ... vk has a move to vi, then
+    v0 ... vi vk ... vi+1
+is a path through exactly the same cells, ending on vi+1 instead. The start stays where it is. Whenever the end has
+a move to an unvisited cell, the path is extended (picking the move with the fewest onward moves, like Warnsdorff's
+rule), and otherwise it's rotated: towards an end that can be extended, if any, otherwise at random.
+
+Rotations need the moves to work both ways, which they do on every board: knight moves are reversible, barriers
+block both L-shaped paths of a move in both directions, and every teleport in a network can reach every other.
+
+Rotations never lose cells, so the path only ever gets longer (and higher cost, since costs are >= 0).
+"""
+import random
+import time
+from collections import deque
+
+
+class PathExtender:
+    """
+    Time boxed rotation/extension local search on a path (see module notes).
+
+    Attributes (results):
+        path: The extended path (cell indices). It starts where the original path did.
+        cost: Cost of path (sum of landing costs, including the start).
+        gained: Number of cells added to the original path.
+        rotations, extensions: Number of each step taken.
+    """
+
+    def __init__(self, graph, path, time_allowed=1, seed=None):
+        """
+        Inputs:
+            graph: MoveGraph of the board.
+            path: Path to extend (cell indices), eg: TourSearch.optimal_path.
+            time_allowed: Seconds before giving up (it stops sooner if every reachable cell is on the path).
+            seed: Random seed for choosing rotations.
+        """
+        self.graph = graph
+        self.path = list(path)
+        self.time_allowed = time_allowed
+        self.rng = random.Random(seed)
+
+        self.cost = sum(graph.landing_costs[cell] for cell in self.path)
+        self.gained = 0
+        self.rotations = 0
+        self.extensions = 0
+
+    def run(self):
+        """
+        Extend the path. Results are stored in path, cost and gained.
+        """
+        adjacency, landing_costs = self.graph.adjacency(), self.graph.landing_costs
+        path = self.path
+        deadline = time.time() + self.time_allowed
+        visited = bytearray(self.graph.size)
+        position = {}  # cell -> index on the path
+        for index, cell in enumerate(path):
+            visited[cell] = 1
+            position[cell] = index
+        missing = self._reachable(path[0]) - len(path)
+
+        def unvisited_moves(cell):
+            return [move for move in adjacency[cell] if not visited[move]]
+
+        steps = 0
+        while missing > 0:
+            steps += 1
+            if steps % 256 == 0 and time.time() > deadline:
+                break
+
+            end = path[-1]
+            moves = unvisited_moves(end)
+            if moves:
+                # Fewest onward moves first (don't strand cells), then the most expensive
+                move = min(moves, key=lambda move: (len(unvisited_moves(move)), -landing_costs[move]))
+                visited[move] = 1
+                position[move] = len(path)
+                path.append(move)
+                self.cost += landing_costs[move]
+                self.extensions += 1
+                missing -= 1
+                continue
+
+            # Rotate: each move back onto the path (other than to the cell before the end) gives a new end
+            pivots = [position[move] for move in adjacency[end] if position.get(move, len(path)) < len(path) - 2]
+            if not pivots:
+                break  # a dead end, with no way to rotate out of it
+            extendable = [pivot for pivot in pivots if unvisited_moves(path[pivot + 1])]
+            pivot = self.rng.choice(extendable or pivots)
+            path[pivot + 1:] = path[:pivot:-1]
+            for index in range(pivot + 1, len(path)):
+                position[path[index]] = index
+            self.rotations += 1
+
+        self.gained = self.extensions
+
+    def _reachable(self, start):
+        """
+        Number of cells reachable from start.
+        """
+        adjacency = self.graph.adjacency()
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if move not in seen:
+                    seen.add(move)
+                    queue.append(move)
+        return len(seen)
@@ -0,0 +1,71 @@
+"""
+Purpose: Priority queues for the shortest path planners (the open list, or "frontier", of a search).
+
+Both queues return entries in order of increasing cost, and both allow the same item to be pushed more than once.
+Stale entries (pushed before a cheaper route was found) are left in the queue, so the caller is expected to skip
+any popped entry whose cost no longer matches its recorded cost. This "lazy deletion" is much cheaper than
+searching the queue for an entry to update.
+"""
+import heapq
+import itertools
+from collections import deque
+
+
+class HeapFrontier:
+    """
+    Binary heap frontier. Works for any non-negative costs (including floats).
+    Ties are broken in insertion order, so results are deterministic.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()  # tie-breaker, so items never need to be comparable
+
+    def push(self, cost, item):
+        heapq.heappush(self._heap, (cost, next(self._counter), item))
+
+    def pop(self):
+        """
+        Return the (cost, item) pair with the lowest cost.
+        """
+        cost, _, item = heapq.heappop(self._heap)
+        return cost, item
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class BucketFrontier:
+    """
+    Bucket queue (Dial's algorithm). Costs must be integers, and every push must be within max_step_cost of the
+    cost most recently popped, which always holds for Dijkstra, since a new cost = popped cost + one step cost.
+    Push and pop are O(1), rather than O(log n) for the heap.
+
+    Only max_step_cost + 1 buckets are needed, since they are reused in a circular fashion.
+    """
+
+    def __init__(self, max_step_cost):
+        self._buckets = [deque() for _ in range(max_step_cost + 1)]
+        self._cost = 0  # cost of the bucket currently being emptied
+        self._size = 0
+
+    def push(self, cost, item):
+        self._buckets[cost % len(self._buckets)].append(item)
+        self._size += 1
+
+    def pop(self):
+        """
+        Return the (cost, item) pair with the lowest cost.
+        """
+        if self._size == 0:
+            raise IndexError("pop from an empty BucketFrontier")
+
+        while True:
+            bucket = self._buckets[self._cost % len(self._buckets)]
+            if bucket:
+                self._size -= 1
+                return self._cost, bucket.popleft()
+            self._cost += 1
+
+    def __len__(self):
+        return self._size
@@ -4,9 +4,10 @@ Purpose: Provide the rules of the game, governing legal moves and cost of those
 Created by: Trevor Clark
 Created on: 4/27/2017
 """
-from .grid_pos import GridPos
 from .user_interface import TextUI
-from .pieces import Pieces
+from .pieces import Pieces, teleport_network
+from .move_graph import MoveGraph
+from .move_masks import MoveMasks, MASK_MOVES
 
 
 class GameEngine:
@@ -18,9 +19,44 @@ class GameEngine:
     Decoupled from any gameplay.
     """
 
-    def __init__(self, board, UI=TextUI):
+    def __init__(self, board, UI=TextUI, staircase=False):
+        """
+        Inputs:
+            board: The Board to play on.
+            UI: Display class.
+            staircase: Barrier rules. By default a move is blocked if barriers block both of its L-shaped paths, and
+                staircase=True adds the third pattern, a staircase through the middle (see move_masks.py).
+        """
         self.board = board
         self.UI = UI
+        self.staircase = staircase
+        self._move_graph = None
+        self._move_masks = None
+        self._teleports = None  # (board, version, {teleport cell index: its network}), see get_teleport_table()
+
+    def get_move_graph(self):
+        """
+        Return the legal moves of the current board, compiled into a MoveGraph. Compiling is O(board size), so the
+        graph is cached. After that, edits (set_element) are patched into it (see MoveGraph.sync()), and it's only
+        compiled again if the board has been replaced, reloaded or reset.
+        """
+        graph = self._move_graph
+        if graph is None or graph.board is not self.board or graph.staircase != self.staircase or \
+                not graph.sync(self):
+            graph = self._move_graph = MoveGraph(self)
+        return graph
+
+    def get_move_masks(self):
+        """
+        Return the legal knight moves out of every cell, as a MoveMasks. Compiled on first use, and after that only
+        the cells around each edit (set_element) are updated, as the board changes.
+        """
+        masks = self._move_masks
+        if masks is None or masks.board is not self.board:
+            masks = self._move_masks = MoveMasks(self.board, staircase=self.staircase)
+        else:
+            masks.sync()
+        return masks
 
     ################ Validation of compliance with game rules ##################
 
@@ -43,12 +79,15 @@ class GameEngine:
         Input: Target position
         Output: True if in bounds, False if outside
         """
-        y_on_board = (target_pos.x >= 0) and (target_pos.x < self.board.get_height())
-        x_on_board = (target_pos.y >= 0) and (target_pos.y < self.board.get_width())
-
+        return self._is_open(target_pos.x, target_pos.y)
 
-        if x_on_board and y_on_board:
-            value = self.board.get_value(target_pos)
+    def _is_open(self, x, y):
+        """
+        validate_within_bounds() on raw coordinates, so hot loops don't have to build a GridPos.
+        """
+        board = self.board
+        if 0 <= x < board.get_height() and 0 <= y < board.get_width():
+            value = board.get_value_at(x * board.get_width() + y)
             if value == Pieces.BARRIER.value or value == Pieces.ROCK.value:
                 return False
             else:
@@ -62,27 +101,21 @@ class GameEngine:
         """
         Checks if jogging horizontal will collide with barrier.
         """
-        travel_pos = GridPos(start_x, y)  # create copy, rather than reference
-        horizontal_path_clear = True
-        while travel_pos.x != stop_x:  # take 1 or 2 steps (depending on the move)
-            travel_pos += GridPos(sign, 0)  # take one step in horizontal direction
-            if self.board.get_value(travel_pos) == Pieces.BARRIER.value:
-                horizontal_path_clear = False
-
-        return horizontal_path_clear
+        width = self.board.get_width()
+        for x in range(start_x + sign, stop_x + sign, sign):  # take 1 or 2 steps (depending on the move)
+            if self.board.get_value_at(x * width + y) == Pieces.BARRIER.value:
+                return False
+        return True
 
     def _is_vertical_motion_clear_of_barriers(self, start_y, stop_y, x, sign):
         """
         Checks if jogging vertical will collide with barrier
         """
-        travel_pos = GridPos(x, start_y)  # create copy, rather than reference
-        vertical_path_clear = True
-        while travel_pos.y != stop_y:  # take 1 or 2 steps (depending on the move)
-            travel_pos += GridPos(0, sign)  # take one step in horizontal direction
-            if self.board.get_value(travel_pos) == Pieces.BARRIER.value:
-                vertical_path_clear = False
-
-        return vertical_path_clear
+        width = self.board.get_width()
+        for y in range(start_y + sign, stop_y + sign, sign):  # take 1 or 2 steps (depending on the move)
+            if self.board.get_value_at(x * width + y) == Pieces.BARRIER.value:
+                return False
+        return True
 
     def validate_barrier_clear(self, curr_node, next_node):
         """
@@ -98,11 +131,18 @@ class GameEngine:
             False if barriers invalidate move
         Assumptions: Input moves are properly formatted (L-shaped and in-bounds).
         """
-        delta = next_node - curr_node
-        if self.validate_L_move(delta) == False:
+        return self._is_barrier_clear(curr_node.x, curr_node.y, next_node.x, next_node.y)
+
+    def _is_barrier_clear(self, curr_x, curr_y, next_x, next_y):
+        """
+        validate_barrier_clear() on raw coordinates, so hot loops don't have to build a GridPos for every step.
+        """
+        delta_x, delta_y = next_x - curr_x, next_y - curr_y
+        if not ((abs(delta_x) == 2 and abs(delta_y) == 1) or (abs(delta_x) == 1 and abs(delta_y) == 2)):
             return  # the move is not valid (probably a teleport, so return without throwing an exception)
 
-        sign = delta // abs(delta)
+        sign_x = 1 if delta_x > 0 else -1
+        sign_y = 1 if delta_y > 0 else -1
 
         # long, long, short
 
@@ -110,48 +150,47 @@ class GameEngine:
         # S 1 2
         # . . 3
         horizontal_first_clear = self._is_horizontal_motion_clear_of_barriers(
-            start_x=curr_node.x, stop_x=next_node.x, y=curr_node.y, sign=sign.x
+            start_x=curr_x, stop_x=next_x, y=curr_y, sign=sign_x
         ) and self._is_vertical_motion_clear_of_barriers(
-            start_y=curr_node.y, stop_y=next_node.y, x=next_node.x, sign=sign.y
+            start_y=curr_y, stop_y=next_y, x=next_x, sign=sign_y
         )
 
         # Vertical first --> then horizontal
         # S . .
         # 1 2 3
         vertical_first_clear = self._is_vertical_motion_clear_of_barriers(
-            start_y=curr_node.y, stop_y=next_node.y, x=curr_node.x, sign=sign.y
+            start_y=curr_y, stop_y=next_y, x=curr_x, sign=sign_y
         ) and self._is_horizontal_motion_clear_of_barriers(
-            start_x=curr_node.x, stop_x=next_node.x, y=next_node.y, sign=sign.x
+            start_x=curr_x, stop_x=next_x, y=next_y, sign=sign_x
         )
 
-        return horizontal_first_clear or vertical_first_clear
+        if horizontal_first_clear or vertical_first_clear or not self.staircase:
+            return horizontal_first_clear or vertical_first_clear
+
+        # Staircase through the middle (long, short, long)
+        # S 1 .
+        # . 2 3
+        if abs(delta_x) == 2:
+            steps = [(curr_x + sign_x, curr_y), (curr_x + sign_x, next_y)]
+        else:
+            steps = [(curr_x, curr_y + sign_y), (next_x, curr_y + sign_y)]
+        width = self.board.get_width()
+        return all(self.board.get_value_at(x * width + y) != Pieces.BARRIER.value for x, y in steps)
 
     def get_possible_moves(self, curr_pos):
         """
         From any position, return a list of all valid moves. That includes any knight's move that would stay on the
         board, and any teleports.
+
+        The knight moves are read from the move masks (see get_move_masks()), rather than re-checking the board, and
+        the returned positions are the board's interned GridPos instances, so the only object allocated is the list.
         """
-        delta_moves = [
-            GridPos(-2, -1),
-            GridPos(-2, 1),
-            GridPos(-1, -2),
-            GridPos(-1, 2),
-            GridPos(1, -2),
-            GridPos(1, 2),
-            GridPos(2, -1),
-            GridPos(2, 1),
-        ]
-
-        new_positions = []
-        for move in delta_moves:
-            new_pos = curr_pos + move
-            if self.validate_within_bounds(new_pos) and \
-               self.validate_barrier_clear(curr_pos, new_pos):
-                new_positions.append(new_pos)
-
-        teleport = self.teleport(curr_pos)
-        if self.teleport(curr_pos) is not None:
-            new_positions.append(teleport)
+        board = self.board
+        masks = self.get_move_masks()
+        index = board.index(curr_pos)
+        move_offsets = masks.move_offsets
+        new_positions = [board.pos(index + move_offsets[move]) for move in MASK_MOVES[masks.masks[index]]]
+        new_positions.extend(self.teleport_exits(curr_pos))
 
         return new_positions
 
@@ -170,40 +209,75 @@ class GameEngine:
                 Pieces.START.value: 0,  # mute point, since costs acrue upon landing
                 Pieces.END.value: 1,
             }  # 'E' is empty (eg: don't allow it to be water, lava, teleport, etc.)
+            if value not in value_lookup and teleport_network(value) is not None:
+                value = Pieces.TELEPORT.value  # every network costs the same to land on
             return value_lookup[value]
         except KeyError as err:
             raise KeyError(f"KeyError: Could not lookup value for {type(value)}: {value}") from err
 
-    def teleport(self, curr_pos):
+    def get_max_cost(self):
         """
-        Returns the coupled teleport position.
-        Assumptions:
-            There are only 2 teleport positions (for more, we'd need to start adding IDs)
-        Input: None
-        Output: The location [y,x] of the exit teleport.
+        Return the most expensive move possible on any board (ignoring pieces that can't be visited).
         """
+        return max(cost for _, cost in self.cost_table() if cost is not None)
 
-        # TODO: Consider 2 generalizations
-        #  1) multiple sets of teleport networks
-        #       mark as "T[id]", and then find_all_elements with that id, rather than all teleports
-        #  2) teleport networks with >= 2 nodes
-        #       return all teleport locations that are not self
-
-        # No teleportation available from here
-        if self.board.get_value(curr_pos) != Pieces.TELEPORT.value:
-            return None
+    def cost_table(self):
+        """
+        The cost of landing on each piece, as a tuple of (piece value, cost) pairs (None if it can't be visited). A
+        hashable summary of get_cost(), so results that depend on the costs can be keyed by them (eg: PathTreeCache).
+        """
+        return tuple((piece.value, self.get_cost(piece.value)) for piece in Pieces)
 
-        teleports = self.board.find_all_elements(Pieces.TELEPORT.value)
+    def teleport_networks(self):
+        """
+        The teleport networks on the board (see pieces.teleport_network()), as tuples of cell indices in cell index
+        order, sorted by network id. A network needs at least 2 teleports to lead anywhere, so lone teleports are left
+        out. Looked up in the board's piece index, so it's O(teleports), rather than a scan of the board.
+        """
+        board = self.board
+        networks = {}
+        for value in board.distinct_values():
+            network = teleport_network(value)
+            if network is not None:
+                networks[network] = tuple(board.index(pos) for pos in board.find_all_elements(value))
+        return [members for _, members in sorted(networks.items()) if len(members) > 1]
+
+    def get_teleport_table(self):
+        """
+        Map each teleport (cell index) to its network (the tuple from teleport_networks(), shared by every teleport in
+        it, so a network of k teleports takes O(k) memory, not k^2 exits). Compiled once per version of the board,
+        like get_move_graph(), so expanding a move reads its exits rather than searching for them.
+        """
+        cached = self._teleports
+        if cached is None or cached[0] is not self.board or cached[1] != self.board.version:
+            table = {member: members for members in self.teleport_networks() for member in members}
+            cached = self._teleports = (self.board, self.board.version, table)
+        return cached[2]
 
-        if len(teleports) != 2:
-            print("Board does not have 2 teleports. Don't know where it leads, and I was always told not to venture through mystery portals.")
-            return None
+    def teleport_exits(self, curr_pos):
+        """
+        Every position the knight can teleport to from curr_pos: all the other teleports in its network, in cell
+        index order. Empty if curr_pos isn't a teleport (or it's the only one in its network).
+        """
+        table = self.get_teleport_table()
+        if not table:
+            return []
+        board = self.board
+        index = board.index(curr_pos)
+        return [board.pos(member) for member in table.get(index, ()) if member != index]
 
-        # If there are 2, they connect, so just return the other
-        if teleports[0] == curr_pos:
-            return teleports[1]
-        if teleports[1] == curr_pos:
-            return teleports[0]
+    def teleport(self, curr_pos):
+        """
+        Returns the coupled teleport position, for a teleport in a network of 2 (the original rules: a single pair
+        of teleports).
+        Input: None
+        Output: The location [y,x] of the exit teleport, or None if there's no teleportation available from here.
+        Raises: ValueError if the network has more than one exit (use teleport_exits() for those).
+        """
+        exits = self.teleport_exits(curr_pos)
+        if len(exits) > 1:
+            raise ValueError(f"Teleport at {curr_pos} has {len(exits)} exits. Use teleport_exits() to get them all.")
+        return exits[0] if exits else None
 
     def validate_pos_sequence(self, pos_sequence):
         """
@@ -1,13 +1,36 @@
 class GridPos:
     """
     Coordinates of tiles/spaces on the board
+
+    Treat instances as immutable: boards hand out shared (interned) instances from Board.pos(), so editing x or y
+    in place would move that position for everyone holding it. The arithmetic operators all return new objects.
+
+    Packed encoding: inside the solvers, a position is often just an int, index = x * width + y (see to_index() and
+    from_index()). That avoids allocating objects in hot loops, and the public API converts back to GridPos.
     """
 
+    __slots__ = ("x", "y")  # no per-instance __dict__: smaller and faster to create
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+    def to_index(self, width):
+        """
+        Pack into a single int, for a board with the given width.
+        """
+        return self.x * width + self.y
+
+    @classmethod
+    def from_index(cls, index, width):
+        """
+        Unpack an int created by to_index().
+        """
+        return cls(*divmod(index, width))
+
     def __eq__(self, other):
+        if not isinstance(other, GridPos):
+            return NotImplemented
         if self.x == other.x and self.y == other.y:
             return True
         return False
@@ -28,4 +51,4 @@ class GridPos:
         return "%r,%r" % (self.x, self.y)
 
     def __hash__(self):
-        return hash((self.x, self.y)) # needed as dict key
\ No newline at end of file
+        return hash((self.x, self.y)) # needed as dict key
@@ -1,5 +1,8 @@
 import random
 
+from .pieces import Pieces
+
+
 class LongestPathSearchHeuristics:
     """
     These heuristics are used to determine the order of in which to navigate through the search space.
@@ -8,6 +11,32 @@ class LongestPathSearchHeuristics:
     Technical Note: Python sort() is stable, which allows us to use it within our heuristic deterministically.
     """
 
+    def __init__(self, seed=None):
+        """
+        Inputs:
+            seed: Seed for the random heuristics, so runs can be reproduced (eg: in separate processes).
+        """
+        self.rng = random.Random(seed)
+
+        # Live search state, for the tie-breaking heuristics (see attach())
+        self.adjacency = None
+        self.degrees = None
+        self.visited = None
+        self.center_distances = None
+
+    def attach(self, search):
+        """
+        Called by TourSearch when it's handed one of our heuristics, so the tie-breaking heuristics can read its
+        (incrementally updated) degrees and visited cells, rather than recomputing moves.
+        """
+        graph = search.graph
+        self.adjacency = search.adjacency
+        self.degrees = search.degrees
+        self.visited = search.visited
+        # Squared distance from the center of the board, doubled so it stays an integer on even boards
+        self.center_distances = [(2 * row - (graph.height - 1)) ** 2 + (2 * col - (graph.width - 1)) ** 2
+                                 for row in range(graph.height) for col in range(graph.width)]
+
     def identity_heuristic(self, moves):
         return moves
 
@@ -48,6 +77,226 @@ class LongestPathSearchHeuristics:
         degree_move_tuples.sort(key=lambda value: value[0], reverse=True)
         return degree_move_tuples
 
+    def center_tiebreak_heuristic(self, degree_move_tuples):
+        """
+        dense_search_heuristic, with ties broken in favor of the move farthest from the center of the board.
+
+        Warnsdorff's rule leaves a lot of ties (most cells on an open board have degree 8), and the stable sort breaks
+        them in whatever order the moves were generated, which sends the knight sweeping across the board in one
+        direction, leaving strips along the far edges to come back for. Taking the outermost move first keeps it
+        hugging the edges, where the cells with fewest moves are, so it rarely has to backtrack (Roth's rule).
+
+        TourSearch only (moves must be cell indices), see attach().
+        """
+        center_distances = self.center_distances
+        degree_move_tuples.sort(key=lambda value: (value[0], -center_distances[value[1]]))
+        return degree_move_tuples
+
+    def lookahead_heuristic(self, degree_move_tuples):
+        """
+        dense_search_heuristic, with ties broken by looking one move further ahead: the move whose own unvisited
+        moves have the lowest total degree comes first (Pohl's rule). That's the move whose neighborhood is closest
+        to being cut off, so it's the one to fill in now. Any ties left are broken like center_tiebreak_heuristic.
+
+        The degrees come straight from the search's degree array, so this costs 8 lookups per move, rather than
+        generating the moves of every move. TourSearch only (moves must be cell indices), see attach().
+        """
+        adjacency, degrees, visited = self.adjacency, self.degrees, self.visited
+        center_distances = self.center_distances
+
+        def degree_sum(move):
+            return sum(degrees[next_move] for next_move in adjacency[move] if not visited[next_move])
+
+        degree_move_tuples.sort(key=lambda value: (value[0], degree_sum(value[1]), -center_distances[value[1]]))
+        return degree_move_tuples
+
     def random_search_heuristic(self, moves):
-        random.shuffle(moves)
-        return moves
\ No newline at end of file
+        self.rng.shuffle(moves)
+        return moves
+
+    def random_dense_search_heuristic(self, degree_move_tuples):
+        """
+        dense_search_heuristic, with ties between moves of the same degree broken at random (shuffle, then a stable
+        sort). Each seed still follows Warnsdorff's rule, but takes a different tour, which is what randomized
+        restarts need (see restarts.py).
+        """
+        self.rng.shuffle(degree_move_tuples)
+        degree_move_tuples.sort(key=lambda value: value[0])
+        return degree_move_tuples
+
+
+def needs_tour_search(heuristic):
+    """
+    Whether a heuristic reads the live state of a TourSearch (see LongestPathSearchHeuristics.attach()), so it can't be
+    used by the searches that don't have one: the recursive search (Knight.find_longest_path_entry(recursive=True)),
+    and BeamSearch. That's the tie-breaking heuristics, and RegionHeuristic (which needs to know where the knight is).
+    """
+    if isinstance(heuristic, RegionHeuristic):
+        return True
+    return getattr(heuristic, "__func__", None) in (LongestPathSearchHeuristics.center_tiebreak_heuristic,
+                                                    LongestPathSearchHeuristics.lookahead_heuristic)
+
+
+class RegionHeuristic:
+    """
+    Smart context mapper: a different heuristic for each region of the board, picked by where the knight is.
+
+    Each heuristic shines in some places and flounders in others. dense_search_heuristic fills open fields without
+    leaving gaps, but on boards that mix open fields with barrier corridors (eg: 32x32_board_mod.txt), it fills
+    whatever field it starts in, and strands the cells on the far side of a corridor. sparse_search_heuristic is
+    the opposite: it keeps moving on to fresh ground, which is what gets it through corridors, but it leaves gaps
+    everywhere else.
+
+    So the board is split into regions once, when a search starts (attach()), by local open cell density: the
+    fraction of the cells within `radius` of a cell (a square window, cut off at the edges of the board) that can
+    be landed on. Cells at least `threshold` open are part of an open field, and get open_heuristic; the rest (next
+    to barriers and rocks) get constrained_heuristic. The edges of the board don't count as closed, since they're
+    where Warnsdorff's rule needs to start filling. The result is a table of heuristics, one per cell, so choosing
+    one costs a single lookup per node.
+
+    Only for TourSearch (moves must be cell indices), which tells us where the knight is (TourSearch.path).
+    """
+
+    def __init__(self, open_heuristic=None, constrained_heuristic=None, radius=1, threshold=0.9):
+        """
+        Inputs:
+            open_heuristic: Heuristic for open fields (default: dense_search_heuristic).
+            constrained_heuristic: Heuristic for everywhere else (default: sparse_search_heuristic).
+            radius: Size of the window the density is measured over (cells in each direction).
+            threshold: Fraction of the window that must be open, for a cell to be in an open field.
+        """
+        heuristics = LongestPathSearchHeuristics()
+        self.open_heuristic = open_heuristic or heuristics.dense_search_heuristic
+        self.constrained_heuristic = constrained_heuristic or heuristics.sparse_search_heuristic
+        self.radius = radius
+        self.threshold = threshold
+        self.regions = None  # heuristic for each cell, set by attach()
+        self.search = None
+
+    def attach(self, search):
+        """
+        Called by TourSearch when the search starts: split the board into regions (see class notes).
+        """
+        for heuristic in {self.open_heuristic, self.constrained_heuristic}:
+            attach = getattr(getattr(heuristic, "__self__", heuristic), "attach", None)
+            if attach is not None:
+                attach(search)
+        self.search = search
+        self.regions = [self.open_heuristic if density >= self.threshold else self.constrained_heuristic
+                        for density in self.densities(search.graph)]
+
+    def densities(self, graph):
+        """
+        Fraction of the cells within radius of each cell (a square window, cut off at the edges of the board) that can
+        be landed on, in cell index order. Summed over the window with a 2D prefix sum, so it's O(cells) for any radius.
+        """
+        height, width, radius = graph.height, graph.width, self.radius
+        # sums[row][col]: open cells in the rectangle above and left of (row, col)
+        sums = [[0] * (width + 1) for _ in range(height + 1)]
+        for row in range(height):
+            running = 0
+            for col in range(width):
+                running += graph.landing_costs[row * width + col] >= 0
+                sums[row + 1][col + 1] = sums[row][col + 1] + running
+
+        densities = []
+        for row in range(height):
+            top, bottom = max(row - radius, 0), min(row + radius + 1, height)
+            for col in range(width):
+                left, right = max(col - radius, 0), min(col + radius + 1, width)
+                open_cells = sums[bottom][right] - sums[top][right] - sums[bottom][left] + sums[top][left]
+                densities.append(open_cells / ((bottom - top) * (right - left)))
+        return densities
+
+    def __call__(self, degree_move_tuples):
+        return self.regions[self.search.path[-1]](degree_move_tuples)
+
+
+def knight_distance(delta_x, delta_y):
+    """
+    Minimum number of knight moves to travel (delta_x, delta_y) on an infinite, obstacle free board.
+    Closed form, so it's O(1). Edges, barriers and rocks can only make a route longer, so this is a lower bound
+    for any real board.
+    """
+    delta_x, delta_y = abs(delta_x), abs(delta_y)
+    if delta_x < delta_y:
+        delta_x, delta_y = delta_y, delta_x
+
+    # The two exceptions to the general pattern
+    if delta_x == 1 and delta_y == 0:
+        return 3
+    if delta_x == 2 and delta_y == 2:
+        return 4
+
+    delta = delta_x - delta_y
+    if delta_y > delta:
+        return delta - 2 * ((delta - delta_y) // 3)
+    return delta - 2 * ((delta - delta_y) // 4)
+
+
+class ShortestPathHeuristic:
+    """
+    Admissible (and consistent) A* heuristic for plan_shortest_path_astar: a lower bound on the cost to reach end_pos.
+
+    Explanation:
+        Every move costs at least min_cost (the cheapest space we could land on), so
+            knight_distance(pos, end_pos) * min_cost
+        never overestimates. Teleports let the knight skip distance: a jump is 1 move to any other teleport in the
+        same network, and a route can chain jumps through several networks. So the number of moves is bounded by the
+        shortest route on a relaxed board, where every teleport jumps as usual, and the knight gets between any two
+        cells in their knight_distance (ignoring edges, barriers and rocks). Routes from each teleport to end_pos
+        are worked out once (Dijkstra over the teleports), so an estimate is the smaller of going straight to end_pos,
+        and going to some teleport, then on from there.
+    """
+
+    def __init__(self, game_engine, start_pos, end_pos):
+        board = game_engine.board
+        self.end_pos = end_pos
+
+        # Landing on start_pos is never part of a lowest cost path, but any other 'S' on the board would be
+        costs = [game_engine.get_cost(piece.value) for piece in Pieces if piece != Pieces.START]
+        if any(pos != start_pos for pos in board.find_all_elements(Pieces.START.value)):
+            costs.append(game_engine.get_cost(Pieces.START.value))
+        self.min_cost = min(cost for cost in costs if cost is not None)
+
+        # (teleport, moves from it to end_pos on the relaxed board), in order of increasing moves
+        self.teleports = self._teleport_moves(game_engine)
+
+    def __call__(self, pos):
+        return self.estimate(pos.x, pos.y)
+
+    def estimate(self, row, col):
+        """
+        Same as calling the heuristic with GridPos(row, col), for callers working with raw coordinates.
+        """
+        moves = knight_distance(row - self.end_pos.x, col - self.end_pos.y)
+        for tele, tele_moves in self.teleports:
+            if tele_moves >= moves:
+                break  # sorted, so no teleport left can help
+            moves = min(moves, knight_distance(row - tele.x, col - tele.y) + tele_moves)
+        return moves * self.min_cost
+
+    def _teleport_moves(self, game_engine):
+        """
+        Fewest moves from each teleport to end_pos on the relaxed board (see class notes), by Dijkstra from end_pos.
+        Every teleport can reach every other one, so it's the O(teleports^2) version of Dijkstra, without a heap.
+        """
+        board, end_pos = game_engine.board, self.end_pos
+        teleports = []  # (pos, network)
+        for network, members in enumerate(game_engine.teleport_networks()):
+            teleports.extend((board.pos(member), network) for member in members)
+
+        moves = [knight_distance(tele.x - end_pos.x, tele.y - end_pos.y) for tele, _ in teleports]
+        unsettled = set(range(len(teleports)))
+        while unsettled:
+            settled = min(unsettled, key=moves.__getitem__)
+            unsettled.remove(settled)
+            settled_pos, settled_network = teleports[settled]
+            for other in unsettled:
+                other_pos, other_network = teleports[other]
+                step = 1 if other_network == settled_network else \
+                    knight_distance(other_pos.x - settled_pos.x, other_pos.y - settled_pos.y)
+                moves[other] = min(moves[other], moves[settled] + step)
+
+        return sorted(((tele, tele_moves) for (tele, _), tele_moves in zip(teleports, moves)), key=lambda item: item[1])
+
@@ -0,0 +1,317 @@
+"""
+Purpose: Shortest path planning that keeps its search between calls, and repairs it after the board changes
+(Lifelong Planning A*, Koenig, Likhachev and Furcy, 2004), rather than starting over.
+
+When cells change while a knight is en route (eg: empty turning to lava, or a barrier going up), the other planners
+can only start again from scratch, and most of what they work out hasn't changed. LPA* keeps two numbers per cell:
+    g: the cost of the best route to it found so far.
+    rhs: a one move lookahead, the cheapest of g(predecessor) + landing cost, over every move onto the cell.
+A cell is consistent when they match. The search only ever expands inconsistent cells, in A* order, and stops once
+end_pos is consistent and nothing left in the queue could improve on it. An edit only changes the moves of the cells
+within 2 rows and columns of it (moves that land on it, leave from it, or pass over it), so replanning recomputes
+rhs for those cells and carries on: only the cells whose cost actually changed, and could matter to end_pos, are
+expanded again.
+
+Teleports are handled like the other planners (see MoveGraph): each network is a virtual hub node, which every
+teleport in it moves onto for free, and which moves onto each of them for its landing cost.
+
+Edits are read from the board's journal (Board.edits_since()), and the moves from the engine's move masks, which
+catch up on the same edits. A board that's been reloaded or reset since the last plan is planned again from scratch.
+
+Costs are counted like the other planners: the sum of the landing costs of every move (not including the start).
+"""
+import heapq
+
+from .board import CostLayer, ParentLayer
+from .heuristics import ShortestPathHeuristic
+from .move_graph import KNIGHT_MOVES
+from .pieces import Pieces, teleport_network
+
+INF = float("inf")
+
+
+class IncrementalPlanner:
+    """
+    LPA* from start_pos to end_pos, on a board that may change between plans. See module notes.
+
+    Attributes (results of the last replan()):
+        cost: Cost of the lowest cost route, or None if end_pos can't be reached.
+        cost_map, journey_map: The route, in the same format as Knight.cost_map/journey_map (so reconstruct_path()
+            works), but only the cells on the route are filled in.
+        expanded_nodes: Number of nodes (cells and teleport hubs) expanded.
+    """
+
+    def __init__(self, game_engine, start_pos, end_pos):
+        """
+        Inputs:
+            game_engine: GameEngine of the board (and its rules).
+            start_pos, end_pos: GridPos the route starts and ends on.
+        """
+        self.game_engine = game_engine
+        self.board = game_engine.board
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+
+        self.cost = None
+        self.expanded_nodes = 0
+        self.cost_map = CostLayer(self.board.get_height(), self.board.get_width())
+        self.journey_map = ParentLayer(self.board.get_height(), self.board.get_width())
+        self._route = []  # cell indices of the route written into the maps
+        self._reset()
+
+    def _reset(self):
+        """
+        Forget everything, and start a new search.
+        """
+        board, game_engine = self.board, self.game_engine
+        self.version = board.version
+        self.height, self.width = board.get_height(), board.get_width()
+        self.size = self.height * self.width
+        self.start = board.index(self.start_pos)
+        self.goal = board.index(self.end_pos)
+        self._masks = game_engine.get_move_masks()
+
+        landing_costs = {value: self._landing_cost(value) for value in board.distinct_values()}
+        self._landing = [landing_costs[value] for value in board.values()]
+
+        # Nodes are cells (their index), and teleport hubs (size + the order their network was first seen)
+        self._g = [INF] * self.size
+        self._rhs = [INF] * self.size
+        self._parents = [-1] * self.size
+
+        self._network_of = {}  # teleport cell -> network id
+        self._members = {}  # network id -> set of teleport cells
+        self._hubs = {}  # network id -> hub node
+        for value in board.distinct_values():
+            network = teleport_network(value)
+            if network is not None:
+                for pos in board.find_all_elements(value):
+                    self._add_teleport(board.index(pos), network)
+
+        self._heuristic = ShortestPathHeuristic(game_engine, self.start_pos, self.end_pos)
+        self._hub_estimates = {}  # network id -> heuristic of its hub, worked out on demand
+
+        self._queue = []  # heap of (key, node), including stale entries
+        self._queued = {}  # node -> its current key, for every node in the queue
+        self._rhs[self.start] = 0
+        self._update_node(self.start)
+
+    def _landing_cost(self, value):
+        """
+        Cost to land on a cell holding value, or -1 if it can't be landed on.
+        """
+        if value in (Pieces.BARRIER.value, Pieces.ROCK.value):
+            return -1
+        return self.game_engine.get_cost(value)
+
+    def _add_teleport(self, index, network):
+        self._network_of[index] = network
+        self._members.setdefault(network, set()).add(index)
+        if network not in self._hubs:
+            self._hubs[network] = self.size + len(self._hubs)
+            self._g.append(INF)
+            self._rhs.append(INF)
+            self._parents.append(-1)
+
+    def _remove_teleport(self, index, network):
+        del self._network_of[index]
+        self._members[network].discard(index)
+
+    def _network_of_hub(self, hub):
+        # Hubs are numbered in the order their networks were added to the (insertion ordered) dict
+        return list(self._hubs)[hub - self.size]
+
+    def _estimate(self, node):
+        """
+        Lower bound on the cost from node to end_pos (see ShortestPathHeuristic). A hub can only go on through one of
+        its teleports, so its bound is the smallest of theirs (plus landing on it), which keeps it consistent.
+        """
+        if node < self.size:
+            return self._heuristic.estimate(*divmod(node, self.width))
+        network = self._network_of_hub(node)
+        estimate = self._hub_estimates.get(network)
+        if estimate is None:
+            estimate = min((self._landing[member] + self._heuristic.estimate(*divmod(member, self.width))
+                            for member in self._members[network]), default=0)
+            self._hub_estimates[network] = estimate
+        return estimate
+
+    def _key(self, node):
+        best = min(self._g[node], self._rhs[node])
+        return (best + self._estimate(node), best)
+
+    def _successors(self, node):
+        """
+        Nodes reachable in one move from node.
+        """
+        if node >= self.size:
+            return list(self._members[self._network_of_hub(node)])
+        successors = self._masks.targets(node)
+        network = self._network_of.get(node)
+        if network is not None:
+            successors.append(self._hubs[network])
+        return successors
+
+    def _update_node(self, node):
+        """
+        Recompute rhs (and the parent it comes from) for node, and queue it if it's inconsistent.
+        """
+        g, landing = self._g, self._landing
+        if node != self.start:
+            best, parent = INF, -1
+            if node >= self.size:
+                # A hub: entered for free from any of its teleports
+                for member in self._members[self._network_of_hub(node)]:
+                    if g[member] < best:
+                        best, parent = g[member], member
+            elif landing[node] >= 0:
+                masks, width = self._masks.masks, self.width
+                move_offsets = self._masks.move_offsets
+                row, col = divmod(node, width)
+                for move, (d_row, d_col) in enumerate(KNIGHT_MOVES):
+                    if 0 <= row - d_row < self.height and 0 <= col - d_col < width:
+                        source = node - move_offsets[move]
+                        if masks[source] >> move & 1 and landing[source] >= 0 and g[source] < best:
+                            best, parent = g[source], source
+                network = self._network_of.get(node)
+                if network is not None and g[self._hubs[network]] < best:
+                    best, parent = g[self._hubs[network]], self._hubs[network]
+                best += landing[node]
+            self._rhs[node] = best
+            self._parents[node] = parent
+
+        self._queued.pop(node, None)  # any entry still in the heap is now stale
+        if g[node] != self._rhs[node]:
+            key = self._key(node)
+            self._queued[node] = key
+            heapq.heappush(self._queue, (key, node))
+
+    def _top_key(self):
+        """
+        Key of the first (valid) entry in the queue, or None if it's empty.
+        """
+        queue, queued = self._queue, self._queued
+        while queue:
+            key, node = queue[0]
+            if queued.get(node) == key:
+                return key
+            heapq.heappop(queue)
+        return None
+
+    def _rekey(self):
+        """
+        Work out every queued key again (after the heuristic changed).
+        """
+        self._queued = {node: self._key(node) for node in self._queued}
+        self._queue = [(key, node) for node, key in self._queued.items()]
+        heapq.heapify(self._queue)
+
+    def _compute(self):
+        """
+        Expand inconsistent nodes until the route to end_pos can't get any better.
+        """
+        g, rhs, goal = self._g, self._rhs, self.goal
+        self.expanded_nodes = 0
+        while True:
+            top_key = self._top_key()
+            if top_key is None or (top_key >= self._key(goal) and rhs[goal] == g[goal]):
+                break
+            _, node = heapq.heappop(self._queue)
+            del self._queued[node]
+            self.expanded_nodes += 1
+
+            if g[node] > rhs[node]:
+                g[node] = rhs[node]  # cheaper than before
+                for successor in self._successors(node):
+                    self._update_node(successor)
+            else:
+                g[node] = INF  # more expensive than before: work it out again, along with everything relying on it
+                self._update_node(node)
+                for successor in self._successors(node):
+                    self._update_node(successor)
+
+    def _apply_edits(self, edits):
+        """
+        Catch up on edited cells: recompute rhs of every node whose moves in may have changed.
+        """
+        board = self.board
+        self._masks = self.game_engine.get_move_masks()
+        touched = set()
+        new_heuristic = False
+        for index in dict.fromkeys(edits):
+            value = board.get_value_at(index)
+            landing_cost = self._landing_cost(value)
+            self._landing[index] = landing_cost
+            # eg: a second 'S' (cost 0) would make the heuristic overestimate
+            new_heuristic = new_heuristic or 0 <= landing_cost < self._heuristic.min_cost
+
+            old_network, network = self._network_of.get(index), teleport_network(value)
+            if old_network != network:
+                new_heuristic = True
+                if old_network is not None:
+                    self._remove_teleport(index, old_network)
+                    touched.add(self._hubs[old_network])
+                if network is not None:
+                    self._add_teleport(index, network)
+                    touched.add(self._hubs[network])
+
+            # Moves that land on the cell, leave from it, or pass over it, all land within 2 rows and columns of it
+            row, col = divmod(index, self.width)
+            for near_row in range(max(row - 2, 0), min(row + 3, self.height)):
+                for near_col in range(max(col - 2, 0), min(col + 3, self.width)):
+                    touched.add(near_row * self.width + near_col)
+
+        if new_heuristic:
+            self._heuristic = ShortestPathHeuristic(self.game_engine, self.start_pos, self.end_pos)
+            self._hub_estimates = {}
+            self._rekey()
+        for node in touched:
+            self._update_node(node)
+
+    def replan(self):
+        """
+        Bring the route up to date with the board: catch up on any edits since the last plan, then search until the
+        route is the lowest cost again. Results are stored in cost, cost_map and journey_map.
+        """
+        edits = self.board.edits_since(self.version)
+        if edits is None:
+            self._reset()
+        elif edits:
+            self._apply_edits(edits)
+        self.version = self.board.version
+        self._compute()
+        self._write_route()
+
+    def route(self):
+        """
+        Cell indices of the lowest cost route, from start_pos to end_pos (empty if there isn't one). Teleport hubs
+        are left out, so a jump is just a move from one teleport to another.
+        """
+        if self._g[self.goal] == INF:
+            return []
+        route = [self.goal]
+        node = self.goal
+        while node != self.start:
+            if len(route) > len(self._g):
+                raise RuntimeError("Route from end_pos doesn't lead back to start_pos")
+            node = self._parents[node]
+            if node >= self.size:
+                node = self._parents[node]  # left through a hub: carry on from the teleport it was entered from
+            route.append(node)
+        return route[::-1]
+
+    def _write_route(self):
+        """
+        Replace the previous route in cost_map and journey_map with the current one.
+        """
+        costs, parents = self.cost_map.values, self.journey_map.values
+        for index in self._route:
+            costs[index] = -1
+            parents[index] = -1
+        self._route = self.route()
+        previous = -1
+        for index in self._route:
+            costs[index] = self._g[index]
+            parents[index] = previous
+            previous = index
+        self.cost = self._g[self.goal] if self._route else None
@@ -1,11 +1,25 @@
 import copy
 import time
+from collections import Counter
 
-from .pieces import Pieces
+from .pieces import Pieces, teleport_network
 from .grid_pos import GridPos
 from .gameengine import GameEngine
+from .board import CostLayer, ParentLayer
+from .frontier import HeapFrontier, BucketFrontier
+from .move_masks import MASK_MOVES
 from .user_interface import UI
 from .heuristics import LongestPathSearchHeuristics as Heuristics
+from .heuristics import ShortestPathHeuristic, needs_tour_search
+from .tour_search import TourSearch
+from .parallel import run_portfolio, run_split
+from .constructive import build_tour
+from .exact import ExactSearch, ExactCache, MAX_CELLS
+from .extension import PathExtender
+from .beam import BeamSearch
+from .restarts import RestartSearch
+from .incremental import IncrementalPlanner
+from .path_cache import PATH_TREES
 
 
 class Knight:
@@ -37,16 +51,25 @@ class Knight:
             self.end_pos = end_pos
 
         # Initialize maps for the travel cost and path of journey (empty except for 0 cost at start)
-        self.journey_map = copy.deepcopy(self.game_engine.board)
-        self.journey_map.reset_board()
-        self.cost_map = copy.deepcopy(self.game_engine.board)
-        self.cost_map.reset_board()
+        self.journey_map, self.cost_map = self._new_search_maps()
+        self.expanded_nodes = 0  # number of positions expanded by the last shortest path plan
+        self.incremental_planner = None  # search kept between calls to plan_shortest_path_incremental()
 
         # Initialize general parameters for longest_path
         self.available_moves_map = None
         self.start_time = None
         self.optimal_cost = 0
         self.optimal_path = [self.start_pos]
+        self.nodes_expanded = 0  # number of nodes expanded by the last longest path search
+        self.portfolio_results = None
+        self.worker_nodes = None
+        self.prune = False
+        self.bound = False
+        self.symmetry = False
+        self.constrain_end = False
+        self.cells_gained = 0  # number of cells added by the last extend_longest_path()
+        self.restarts = 0  # number of searches run by the last find_longest_path_restarts()
+        self.optimal_proven = False  # whether the last longest path search proved optimal_path is the best possible
 
         # Config for longest path
         self.time_allowed = 10 # time allowed to explore (in seconds)
@@ -55,6 +78,13 @@ class Knight:
         # This would be every step on the board (so no obstructions, and a perfect score)
         self.cost_acceptance_thresh = self.game_engine.board.get_height() * self.game_engine.board.get_width() - 1
 
+    def _new_search_maps(self):
+        """
+        Empty journey_map and cost_map, the same shape as the board.
+        """
+        height, width = self.game_engine.board.get_height(), self.game_engine.board.get_width()
+        return ParentLayer(height, width), CostLayer(height, width)
+
     ################## Solver ##################
     def reconstruct_path(self):
         """
@@ -95,16 +125,15 @@ class Knight:
         active_list = [self.start_pos]  # Init list with a start pos
 
         # Initialize maps for the travel cost and path of journey (empty except for 0 cost at start)
-        self.journey_map = copy.deepcopy(self.game_engine.board)
-        self.journey_map.reset_board()
-        self.cost_map = copy.deepcopy(self.game_engine.board)
-        self.cost_map.reset_board()
+        self.journey_map, self.cost_map = self._new_search_maps()
         self.cost_map.set_element(self.start_pos, 0)
+        self.expanded_nodes = 0
 
         while True:
             # Rational moves are allowed for a knight, land on the board, and land
             # upon unexplored spaces
             exploratory_node = active_list.pop(0)
+            self.expanded_nodes += 1
 
             new_nodes = self._explore_moves(exploratory_node)
 
@@ -115,6 +144,183 @@ class Knight:
             if active_list == []:
                 return
 
+    def plan_shortest_path_dijkstra(self, bucket_queue=False):
+        """
+        Plans the same lowest cost path as plan_shortest_path(), but expands positions in order of increasing cost
+        (Dijkstra's algorithm). Each position is expanded at most once, and the search stops as soon as end_pos is
+        settled, rather than flooding the whole board. Moves are read from the move masks (see _search_graph()).
+
+        Inputs:
+            bucket_queue: Use a bucket queue rather than a binary heap. Move costs are small integers, so buckets
+                give O(1) push/pop.
+
+        Side-Effects:
+            Populates self.cost_map and self.journey_map, just like plan_shortest_path(), so reconstruct_path()
+            works unchanged. Because of the early exit, values are only final for positions that were settled
+            (end_pos and anything cheaper); others may hold a tentative cost, or None if never reached.
+
+        Assumptions:
+            costs are all >= 0 (required by Dijkstra), and integers if bucket_queue is used.
+        """
+        if bucket_queue:
+            frontier = BucketFrontier(self.game_engine.get_max_cost())
+        else:
+            frontier = HeapFrontier()
+        self._search_graph(frontier, heuristic=None)
+
+    def plan_shortest_path_astar(self):
+        """
+        A* version of plan_shortest_path_dijkstra(). Positions are expanded in order of
+            cost so far + lower bound on the remaining cost (see ShortestPathHeuristic),
+        so the search is pulled towards end_pos. When start and end are close, the number of expanded positions grows
+        with the length of the route rather than the area of the board.
+
+        The heuristic is consistent, so (like Dijkstra) each position is expanded at most once, and the search stops
+        as soon as end_pos is reached.
+
+        Side-Effects:
+            Populates self.cost_map and self.journey_map (see plan_shortest_path_dijkstra), and self.expanded_nodes.
+        """
+        heuristic = ShortestPathHeuristic(self.game_engine, self.start_pos, self.end_pos)
+        self._search_graph(HeapFrontier(), heuristic=heuristic)
+
+    def plan_shortest_path_cached(self, cache=PATH_TREES):
+        """
+        Plans the same lowest cost path as plan_shortest_path_dijkstra(), for many queries on the same board. The
+        first query from a start_pos runs Dijkstra to completion, which finds the lowest cost route to every position
+        (a shortest path tree), and stores it in the cache. Queries from the same start_pos, on the same version of
+        the board (with the same rules and costs), then read their route from the stored tree, to any end_pos,
+        without planning at all (see PathTreeCache).
+
+        Inputs:
+            cache: PathTreeCache to look in, and store new trees in. By default, one shared by every Knight.
+
+        Side-Effects:
+            Sets self.cost_map and self.journey_map to the tree, so reconstruct_path() works unchanged. The maps are
+            shared with the cache (and other knights), so treat them as read only. Sets self.expanded_nodes (0 if the
+            tree was found in the cache).
+        """
+        key = cache.key(self.game_engine, self.start_pos)
+        tree = cache.get(key)
+        if tree is not None:
+            self.cost_map, self.journey_map = tree
+            self.expanded_nodes = 0
+            return
+        self._search_graph(HeapFrontier(), heuristic=None, flood=True)
+        cache.put(key, self.game_engine.board, self.cost_map, self.journey_map)
+
+    def plan_shortest_path_incremental(self):
+        """
+        Plans the same lowest cost path as plan_shortest_path_astar(), but keeps the search between calls. When the
+        board is edited (set_element()) between plans, the next call only repairs the part of the search the edits
+        affect (see IncrementalPlanner), so replanning after a few cells change costs milliseconds, even on a
+        1024x1024 board. Changing start_pos or end_pos (or the board) starts a new search.
+
+        Side-Effects:
+            Populates self.cost_map and self.journey_map, so reconstruct_path() works unchanged, but only the cells on
+            the route are filled in. Sets self.expanded_nodes (nodes expanded by this call only).
+        """
+        planner = self.incremental_planner
+        if planner is None or planner.game_engine is not self.game_engine or planner.board is not \
+                self.game_engine.board or planner.start_pos != self.start_pos or planner.end_pos != self.end_pos:
+            planner = self.incremental_planner = IncrementalPlanner(self.game_engine, self.start_pos, self.end_pos)
+        planner.replan()
+        self.cost_map, self.journey_map = planner.cost_map, planner.journey_map
+        self.expanded_nodes = planner.expanded_nodes
+
+    def _search_graph(self, frontier, heuristic, flood=False):
+        """
+        Best-first search, shared by Dijkstra (heuristic=None) and A*. Moves are read from the engine's move masks,
+        like IncrementalPlanner, rather than the compiled MoveGraph: the masks compile much faster, and only the
+        expanded nodes are looked at, so a query between nearby cells costs next to nothing, even on a huge board.
+
+        Inputs:
+            frontier: An empty HeapFrontier or BucketFrontier
+            heuristic: ShortestPathHeuristic, or None to expand in order of cost alone
+            flood: Don't stop at end_pos: settle every reachable position (the full shortest path tree from start_pos)
+        """
+        game_engine = self.game_engine
+        board = game_engine.board
+        masks = game_engine.get_move_masks()
+        cell_masks, move_offsets = masks.masks, masks.move_offsets
+        size, width = board.get_height() * board.get_width(), board.get_width()
+        get_value_at = board.get_value_at
+        landing_cost = {value: game_engine.get_cost(value) for value in board.distinct_values()}
+        networks = game_engine.teleport_networks()
+        network_of = {member: network for network, members in enumerate(networks) for member in members}
+        start = board.index(self.start_pos)
+        end = board.index(self.end_pos)
+
+        # Search directly in the typed arrays behind the maps (-1 = None)
+        self.journey_map, self.cost_map = self._new_search_maps()
+        path_costs = self.cost_map.values
+        parents = self.journey_map.values
+        path_costs[start] = 0
+
+        # Each teleport network is a virtual hub node, size + network (see MoveGraph), so expanding a teleport pushes
+        # one entry, rather than one per exit. The hub remembers the teleport it was reached from, so paths through
+        # it come out as a plain jump from that teleport
+        hub_costs = [-1] * len(networks)
+        hub_entries = [-1] * len(networks)
+        hub_estimates = None  # only used by A*
+        if heuristic is not None:
+            # Consistent, since the heuristic already is across the jumps the hub stands in for
+            hub_estimates = [min(landing_cost[get_value_at(member)] + heuristic.estimate(*divmod(member, width))
+                                 for member in members) for members in networks]
+
+        def relax(target, total_cost, parent):
+            recorded_total_cost = path_costs[target]
+            if recorded_total_cost == -1 or total_cost < recorded_total_cost:
+                path_costs[target] = total_cost
+                parents[target] = parent
+                if heuristic is None:
+                    frontier.push(total_cost, target)
+                else:
+                    frontier.push((total_cost + heuristic.estimate(*divmod(target, width)), -total_cost), target)
+
+        # A* priority is (f, -g): on ties, prefer the node closest to the goal
+        if heuristic is None:
+            frontier.push(0, start)
+        else:
+            frontier.push((heuristic(self.start_pos), 0), start)
+        self.expanded_nodes = 0
+
+        while len(frontier) > 0:
+            priority, index = frontier.pop()
+
+            if index >= size:
+                network = index - size
+                hub_cost = hub_costs[network]
+                if (priority if heuristic is None else -priority[1]) > hub_cost:
+                    continue  # stale
+                for target in networks[network]:
+                    relax(target, hub_cost + landing_cost[get_value_at(target)], hub_entries[network])
+                continue
+
+            path_cost = path_costs[index]
+
+            # Stale entry: a cheaper route to this node was found after it was queued, and has already been expanded
+            if (priority if heuristic is None else -priority[1]) > path_cost:
+                continue
+
+            # Costs are non-negative (and the heuristic is consistent), so nothing popped later can improve on end_pos
+            if index == end and not flood:
+                return
+
+            self.expanded_nodes += 1
+            for move in MASK_MOVES[cell_masks[index]]:  # knight moves (teleports go via the hub)
+                target = index + move_offsets[move]
+                relax(target, path_cost + landing_cost[get_value_at(target)], index)
+
+            network = network_of.get(index)
+            if network is not None and (hub_costs[network] == -1 or path_cost < hub_costs[network]):
+                hub_costs[network] = path_cost
+                hub_entries[network] = index
+                if heuristic is None:
+                    frontier.push(path_cost, size + network)
+                else:
+                    frontier.push((path_cost + hub_estimates[network], -path_cost), size + network)
+
     def _explore_moves(self, curr_pos):
         """
         Consider all valid moves from a given position. Each move would land in a new position, with a specific total
@@ -134,13 +340,13 @@ class Knight:
                 - self.journey_map is updated with the current_position (where it moved from)
         """
         better_moves = []  # moves that are better (lower cost than previously encountered)
+        path_cost = self.cost_map.get_value(curr_pos)
         for new_pos in self.game_engine.get_possible_moves(curr_pos):
             try:
                 move_cost = self.game_engine.get_cost(self.game_engine.board.get_value(new_pos))
             except:
                 print(new_pos)
                 raise
-            path_cost = self.cost_map.get_value(curr_pos)
             total_cost = path_cost + move_cost
 
             # Save lowest cost
@@ -155,7 +361,13 @@ class Knight:
     def find_longest_path_entry(self,
                                 time_allowed = 10,
                                 heuristic = Heuristics().identity_heuristic,
-                                cost_acceptance_thresh=None):
+                                cost_acceptance_thresh=None,
+                                recursive=False,
+                                prune=False,
+                                bound=False,
+                                symmetry=False,
+                                extend_time=0,
+                                constrain_end=False):
         """
         This is the entry point for a depth first search, seeking the highest cost path. Heuristics can be used to
         determine the order of the nodes it seeks out, but it will still fundamentally be depth-first.
@@ -183,25 +395,324 @@ class Knight:
         This is an NP-complete problem, so the 32x32 has no known GUARANTEED solution (to my knowledge). However,
         we can use heuristics to explore in a smart way. This still doesn't guarantee success, but it improves our odds.
 
+        The search runs on an explicit stack by default (_find_longest_path_iterative), since the recursive version
+        hits python's recursion limit once a path gets ~1000 steps long. Set recursive=True to run the original
+        recursive version; both explore exactly the same nodes in the same order.
+
+        When the goal is a full tour, set prune=True to skip branches that have cut off cells they can never come back
+        for (see TourSearch). Not supported by the recursive version.
+
+        On weighted boards (eg: water and lava), set bound=True to skip branches that can't beat the best path found
+        so far, even by collecting every cell they could still reach (see TourSearch). If the search then runs to
+        completion (neither time_allowed nor cost_acceptance_thresh cut it short), self.optimal_proven is set: no
+        higher cost path exists. Not supported by the recursive version.
+
+        On boards that look the same when rotated or reflected (eg: an empty 8x8), set symmetry=True to skip moves
+        that are mirror images of moves already explored, as long as the path so far is its own mirror image (eg:
+        the first move from a corner, which has 2 mirror image moves). Up to 8x fewer nodes, for the same best cost
+        (but possibly a mirror image of the path). See symmetry.py. Not supported by the recursive version.
+
+        By default paths can end anywhere. Set constrain_end=True to only accept paths that finish on self.end_pos: the
+        search stops a path as soon as it gets there, and cuts branches that can no longer get there through unvisited
+        cells (see TourSearch). If it finds no path to end_pos, it raises ValueError (and clears self.optimal_path),
+        rather than leaving a path that ends elsewhere. Not supported by the recursive version. Path extension
+        (extend_time) moves the end of the path, so it's skipped.
+
+        On boards that mix open fields with barrier corridors (eg: 32x32_board_mod.txt), heuristic=RegionHeuristic()
+        uses the dense heuristic in the open and the sparse one along the barriers (see heuristics.py). Like the
+        tie-breaking heuristics, it's not supported by the recursive version.
+
+        Set extend_time (seconds, out of time_allowed) to stop the search that much sooner, and spend the rest
+        lengthening its best path by rotations (see extend_longest_path()). When the search times out a few dozen
+        cells short of a tour, that's usually a better use of the time than more backtracking.
+        """
+        if recursive and (prune or bound or symmetry or constrain_end):
+            raise ValueError("prune, bound, symmetry and constrain_end are only supported by the iterative search "
+                             "(recursive=False)")
+        if recursive and needs_tour_search(heuristic):
+            raise ValueError("The tie-breaking heuristics and RegionHeuristic read the state of the iterative search, "
+                             "so they're only supported by it (recursive=False)")
+        if cost_acceptance_thresh is not None:
+            self.cost_acceptance_thresh = cost_acceptance_thresh
+        self.time_allowed = time_allowed - extend_time
+        self.heuristic = heuristic
+        self.prune = prune
+        self.bound = bound
+        self.symmetry = symmetry
+        self.constrain_end = constrain_end
+        if constrain_end and self.optimal_path[-1] != self.end_pos:
+            # The best path from an earlier (free) search ends elsewhere, so it can't seed this one
+            self.optimal_cost = 0
+            self.optimal_path = [self.start_pos]
+
+        # Initialize total available moves (degree of each position on the empty board)
+        graph = self.game_engine.get_move_graph()
+        self.available_moves_map = CostLayer(graph.height, graph.width)
+        for index, moves in enumerate(graph.adjacency()):
+            if graph.landing_costs[index] >= 0:
+                self.available_moves_map.values[index] = len(moves)
+
+        self.start_time = time.time()
+
+        if recursive:
+            self._find_longest_path_recursive(path=[self.start_pos], cost=0)  # storing in self.journey_map
+        else:
+            self._find_longest_path_iterative()
+
+        if constrain_end and self.optimal_path[-1] != self.end_pos:
+            self.optimal_cost, self.optimal_path = 0, []
+            if self.optimal_proven:
+                raise ValueError(f"No path from start_pos {self.start_pos} reaches end_pos {self.end_pos}")
+            raise ValueError(f"No path from start_pos {self.start_pos} to end_pos {self.end_pos} was found in "
+                             f"time_allowed ({time_allowed} seconds)")
+
+        if extend_time > 0 and not self.optimal_proven and self.optimal_cost < self.cost_acceptance_thresh \
+                and not constrain_end:
+            self.extend_longest_path(extend_time)
+
+    def extend_longest_path(self, time_allowed=1, seed=None):
+        """
+        Lengthen self.optimal_path (eg: after find_longest_path_entry() times out) by rotating its end: when the end
+        can move back onto the path, reversing the part of the path after that cell gives a path through the same
+        cells with a new end, which may be able to move on to unvisited cells. The start stays where it is.
+        See extension.py.
+
+        inputs:
+            time_allowed: Seconds before giving up (it stops sooner if every reachable cell is on the path).
+            seed: Random seed for choosing rotations.
+
+        outputs:
+            The number of cells added to the path (also stored in self.cells_gained).
 
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost
+        """
+        graph = self.game_engine.get_move_graph()
+        extender = PathExtender(graph, [graph.index(pos) for pos in self.optimal_path], time_allowed, seed)
+        initial_cost = extender.cost
+        extender.run()
+
+        self.cells_gained = extender.gained
+        if extender.gained:
+            self.optimal_cost += extender.cost - initial_cost
+            self.optimal_path = [graph.pos(index) for index in extender.path]
+        return extender.gained
+
+    def find_longest_path_portfolio(self,
+                                    time_allowed=10,
+                                    portfolio=None,
+                                    max_workers=None,
+                                    cost_acceptance_thresh=None,
+                                    prune=False,
+                                    bound=False):
+        """
+        Parallel version of find_longest_path_entry(): runs a portfolio of heuristics and random seeds, one search
+        per process, and keeps the best path found by any of them. All searches stop as soon as one of them reaches
+        cost_acceptance_thresh. See parallel.py.
+
+        inputs:
+            time_allowed: Seconds for the whole portfolio.
+            portfolio: List of (heuristic name, seed) pairs, eg: [("dense_search_heuristic", None),
+                ("random_search_heuristic", 7)]. Default: dense, sparse, identity, then random seeds, with one
+                entry per worker.
+            max_workers: Number of processes (default: one per core).
+            cost_acceptance_thresh, prune, bound: see find_longest_path_entry()
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost (and self.optimal_proven)
+            self.portfolio_results: The result of every search, best first (heuristic, seed, cost, path, nodes, pid).
+        """
+        if cost_acceptance_thresh is not None:
+            self.cost_acceptance_thresh = cost_acceptance_thresh
+        self.time_allowed = time_allowed
+
+        board = self.game_engine.board
+        self.portfolio_results = run_portfolio(board, board.index(self.start_pos), time_allowed,
+                                               self.cost_acceptance_thresh, portfolio=portfolio,
+                                               max_workers=max_workers, prune=prune, bound=bound,
+                                               staircase=self.game_engine.staircase)
+
+        self.nodes_expanded = sum(result["nodes"] for result in self.portfolio_results)
+        self.optimal_proven = not prune and any(result["complete"] for result in self.portfolio_results)
+        best = self.portfolio_results[0]
+        if best["cost"] > self.optimal_cost:
+            self.optimal_cost = best["cost"]
+            self.optimal_path = [board.pos(index) for index in best["path"]]
+
+    def find_longest_path_split(self,
+                                time_allowed=10,
+                                heuristic_name="identity_heuristic",
+                                seed=None,
+                                split_depth=3,
+                                max_workers=None,
+                                cost_acceptance_thresh=None,
+                                prune=False,
+                                bound=False):
+        """
+        Parallel version of find_longest_path_entry(), running a single heuristic: the first split_depth levels of
+        the search tree are enumerated into independent subproblems, which are handed out to a process pool in
+        heuristic priority order. An exhaustive search expands the same nodes as _find_longest_path_recursive().
+        See parallel.py.
+
+        inputs:
+            time_allowed: see find_longest_path_entry()
+            heuristic_name: Name of a LongestPathSearchHeuristics method (eg: "dense_search_heuristic").
+            seed: Random seed for the heuristic (only used by random_search_heuristic).
+            split_depth: Number of moves enumerated up front, to create the subproblems.
+            max_workers: Number of processes (default: one per core).
+            cost_acceptance_thresh, prune, bound: see find_longest_path_entry()
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost (and self.optimal_proven)
+            self.nodes_expanded: Total number of nodes expanded.
+            self.worker_nodes: {pid: nodes expanded} for each worker process.
+        """
+        if cost_acceptance_thresh is not None:
+            self.cost_acceptance_thresh = cost_acceptance_thresh
+        self.time_allowed = time_allowed
+
+        board = self.game_engine.board
+        result = run_split(board, board.index(self.start_pos), time_allowed, self.cost_acceptance_thresh,
+                           heuristic_name=heuristic_name, seed=seed, split_depth=split_depth,
+                           max_workers=max_workers, prune=prune, bound=bound,
+                           staircase=self.game_engine.staircase)
+
+        self.nodes_expanded = result["nodes"]
+        self.worker_nodes = result["worker_nodes"]
+        self.optimal_proven = result["complete"] and not prune
+        if result["cost"] > self.optimal_cost:
+            self.optimal_cost = result["cost"]
+            self.optimal_path = [board.pos(index) for index in result["path"]]
+
+    def find_longest_path_restarts(self,
+                                   time_allowed=10,
+                                   seed=None,
+                                   unit=1000,
+                                   cost_acceptance_thresh=None,
+                                   prune=False):
+        """
+        Restarting version of find_longest_path_entry(): many short depth first searches, each breaking ties between
+        moves of the same degree at random, under node budgets that follow the Luby sequence (unit * 1, 1, 2, 1, 1,
+        2, 4, ...). One long search can get stuck under an unlucky early move for its whole time_allowed; restarts
+        cut those runs short. See restarts.py.
+
+        inputs:
+            time_allowed, cost_acceptance_thresh, prune: see find_longest_path_entry()
+            seed: Seeds the random tie-breaks, so the search can be reproduced.
+            unit: Node budget of the shortest runs.
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost
+            self.nodes_expanded: Total number of nodes expanded.
+            self.restarts: Number of searches run.
+        """
+        if cost_acceptance_thresh is not None:
+            self.cost_acceptance_thresh = cost_acceptance_thresh
+        self.time_allowed = time_allowed
+
+        graph = self.game_engine.get_move_graph()
+        search = RestartSearch(graph, graph.index(self.start_pos), time_allowed=time_allowed,
+                               cost_acceptance_thresh=self.cost_acceptance_thresh, seed=seed, unit=unit, prune=prune)
+        search.run()
+
+        self.nodes_expanded = search.nodes
+        self.restarts = search.restarts
+        self.optimal_proven = False
+        if search.optimal_cost > self.optimal_cost:
+            self.optimal_cost = search.optimal_cost
+            self.optimal_path = [graph.pos(index) for index in search.optimal_path]
+
+    def find_longest_path_beam(self,
+                               time_allowed=10,
+                               heuristic=Heuristics().dense_search_heuristic,
+                               width=64,
+                               cost_acceptance_thresh=None):
+        """
+        Beam search version of find_longest_path_entry(): rather than diving deep into the heuristic's first choice,
+        paths are grown a move at a time, keeping the best `width` of them at each step (those that have cut off the
+        fewest cells, then the highest cost, then in heuristic order). Gives steadier results on irregular boards
+        (eg: 32x32_board_mod.txt), where the depth first search can get stuck under an early mistake. See beam.py.
+
+        inputs:
+            time_allowed, heuristic, cost_acceptance_thresh: see find_longest_path_entry(). The tie-breaking
+                heuristics and RegionHeuristic aren't supported (see heuristics.needs_tour_search()).
+            width: Number of paths kept at each step. Wider is slower per step, but less likely to get stuck.
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost
+            self.nodes_expanded: Number of partial paths expanded.
         """
         if cost_acceptance_thresh is not None:
             self.cost_acceptance_thresh = cost_acceptance_thresh
         self.time_allowed = time_allowed
         self.heuristic = heuristic
 
-        # Initialize total available moves
-        self.available_moves_map = copy.deepcopy(self.game_engine.board)
-        for row in range(self.available_moves_map.get_height()):
-            for col in range(self.available_moves_map.get_width()):
-                pos = GridPos(row, col)
-                if not self.game_engine.board.get_value(pos) in (Pieces.ROCK.value, Pieces.BARRIER.value):
-                    moves = self.game_engine.get_possible_moves(pos)
-                    self.available_moves_map.set_element(pos, len(moves))
+        graph = self.game_engine.get_move_graph()
+        search = BeamSearch(graph, graph.index(self.start_pos), heuristic, width=width, time_allowed=time_allowed,
+                            cost_acceptance_thresh=self.cost_acceptance_thresh)
+        search.run()
 
-        self.start_time = time.time()
+        self.nodes_expanded = search.nodes
+        self.optimal_proven = False
+        if search.optimal_cost > self.optimal_cost:
+            self.optimal_cost = search.optimal_cost
+            self.optimal_path = [graph.pos(index) for index in search.optimal_path]
+
+    def find_longest_path_exact(self, max_cells=MAX_CELLS, cache_path=None):
+        """
+        Exact version of find_longest_path_entry(), for small boards: dynamic programming over (position, visited
+        positions) states finds the highest cost path, guaranteed. No time limit or heuristic, but the work doubles
+        with each open cell, so it's limited to max_cells cells reachable from the start. See exact.py.
+
+        inputs:
+            max_cells: Raise ValueError if more cells than this are reachable from the start.
+            cache_path: JSON file to keep results in (see ExactCache), so asking about the same board again is
+                instant, even in a later run. None (the default) to always search, without writing any files.
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost (and self.optimal_proven)
+            self.nodes_expanded: Number of states evaluated (0 if the result was cached).
+        """
+        graph = self.game_engine.get_move_graph()
+        cache = ExactCache(cache_path) if cache_path is not None else None
+        search = ExactSearch(graph, graph.index(self.start_pos), max_cells=max_cells, cache=cache)
+        search.run()
+
+        self.nodes_expanded = search.nodes
+        self.optimal_proven = True
+        self.optimal_cost = search.optimal_cost
+        self.optimal_path = [graph.pos(index) for index in search.optimal_path]
+
+    def find_tour_constructive(self):
+        """
+        Build a knight's tour (a path through every cell) of an open board directly, rather than searching for it.
+        Runs in time linear in the number of cells, so it handles boards far too large to search (eg: 1000x1000).
+        See constructive.py.
 
-        self._find_longest_path_recursive(path=[self.start_pos], cost=0)  # storing in self.journey_map
+        Only supported on open boards: no barriers, rocks or teleports, which would change the moves available. Water
+        and lava are fine, since a tour visits every cell anyway (which also makes it the highest cost path).
+        The start can be any cell a tour can start from. Where the board has a closed tour, the tour found is closed.
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost (and self.optimal_proven)
+
+        Raises: ValueError if the board isn't open, or no tour starts at start_pos (eg: 3x3 boards, or the minority
+            color of a board with an odd number of cells).
+        """
+        board = self.game_engine.board
+        values = board.values()
+        blocked = {value for value in set(values)
+                   if value in (Pieces.BARRIER.value, Pieces.ROCK.value) or teleport_network(value) is not None}
+        if blocked:
+            raise ValueError(f"Constructive tours only support open boards. Board contains: {sorted(blocked)}")
+
+        tour = build_tour(board.get_height(), board.get_width(), (self.start_pos.x, self.start_pos.y))
+        self.nodes_expanded = 0
+        self.optimal_proven = True
+        self.optimal_path = [board.pos(index) for index in tour]
+        # Every cell is landed on once (counting the start, like TourSearch)
+        get_cost = self.game_engine.get_cost
+        self.optimal_cost = sum(get_cost(value) * count for value, count in Counter(values).items())
 
     def _find_longest_path_recursive(self, path, cost):
         """
@@ -280,6 +791,40 @@ class Knight:
         self.game_engine.board.set_element(curr_pos, nominal_value)
 
 
+    def _find_longest_path_iterative(self):
+        """
+        Same search as _find_longest_path_recursive(), node for node, but run by TourSearch on an explicit stack:
+            - One shared path list is pushed/popped, rather than building path + [next_move] for every node.
+            - A new best path is only copied when it is about to be overwritten (when backtracking out of it).
+            - Visited positions and degrees live in flat arrays, rather than in the board and available_moves_map,
+              so the board is never modified.
+        Heuristics receive cell indices (see MoveGraph.index()) rather than GridPos.
+
+        Side-effects:
+            Solutions will will be load into: self.optimal_path and self.optimal_cost
+        """
+        graph = self.game_engine.get_move_graph()
+        search = TourSearch(graph, graph.index(self.start_pos), self.heuristic,
+                            time_allowed=self.time_allowed - (time.time() - self.start_time),
+                            cost_acceptance_thresh=self.cost_acceptance_thresh,
+                            optimal_cost=self.optimal_cost,
+                            prune=self.prune,
+                            bound=self.bound,
+                            symmetries=graph.board.symmetries() if self.symmetry else None,
+                            end=graph.index(self.end_pos) if self.constrain_end else None)
+        search.run()
+        self._store_tour_search(search)
+
+    def _store_tour_search(self, search):
+        """
+        Copy the results of a TourSearch, if it improved on the best path found so far.
+        """
+        self.nodes_expanded = search.nodes
+        self.optimal_proven = search.complete and not search.prune
+        if search.optimal_cost > self.optimal_cost:
+            self.optimal_cost = search.optimal_cost
+            self.optimal_path = [search.graph.pos(index) for index in search.optimal_path]
+
     def print_longest_path(self):
         print("Highest cost path found...")
         print(f"Highest Cost: {self.optimal_cost}")
@@ -0,0 +1,303 @@
+"""
+Purpose: Compile the rules of the game (GameEngine) for a specific board into a compact graph of legal moves.
+
+GameEngine.get_possible_moves() answers for one position at a time: reading its move mask (see move_masks.py),
+building a list of GridPos objects, and looking up its teleports. That's fine for validating a handful of moves, but
+the solvers ask the same questions millions of times. MoveGraph asks them once per position, and stores the answers
+in flat integer arrays (compressed sparse row format):
+
+    The moves out of cell i are targets[offsets[i]:offsets[i+1]], with landing costs costs[offsets[i]:offsets[i+1]]
+
+Cells are referred to by integer index (row * width + col), rather than GridPos. Use index()/pos() to convert.
+
+Teleports: each cell's knight moves come first, then its teleport exits (from teleport_offsets[i] on), so searches
+that want every move just read the whole range. A network of k teleports adds k - 1 exits to each of them, k^2 in
+all, which is fine for a tour (each one still only lands on one of them), but a shortest path planner would push
+every exit of every teleport it settles. So the networks are also kept as a whole (teleport_networks/network_of),
+for planners to treat each one as a single virtual hub: every teleport moves onto its hub for free, and the hub
+moves onto each teleport for its landing cost, which is 2k edges per network (see Knight._search_graph()).
+
+Edits: GameEngine.get_move_graph() compares the board's version against the graph's, and when the board has been
+edited (set_element()), the graph catches up in place (see sync()): only the cells around each edit are compiled
+again, so boards edited live don't pay for a full compile after every change. If the board has been reloaded or reset
+since, a new graph is compiled.
+"""
+import re
+import sys
+from array import array
+from itertools import accumulate, compress
+
+from .pieces import Pieces, teleport_network
+
+# (d_row, d_col) of each knight move, in the same order as GameEngine.get_possible_moves()
+KNIGHT_MOVES = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+
+# Cells compiled at a time: the slots of a block take 8 entries per cell (see MoveGraph._compile_cells())
+COMPILE_CELLS = 1 << 16
+
+_ITEM_SIZE = array("l").itemsize
+_ONE = array("l", [1]).tobytes()
+# Tables for bytes.translate(), over the 256 move masks: bit move of the mask (0 or 1), and the number of moves set
+_MOVE_BITS = [bytes(mask >> move & 1 for mask in range(256)) for move in range(len(KNIGHT_MOVES))]
+_MOVE_COUNTS = bytes(bin(mask).count("1") for mask in range(256))
+_FLAG_TO_BYTE = bytes([0, 0xFF]) + bytes(254)
+_ALL_MOVES = re.compile(b"\xff+")
+
+
+def _shifted(values, shift):
+    """
+    An array of values, with shift added to each of them. The array is read as one big integer, so python does it in
+    C: adding shift * (1 + 2^64 + 2^128 + ...) adds shift to every entry at once, and since none of the results is
+    negative, no entry carries or borrows from the next.
+    """
+    ones = int.from_bytes(_ONE * len(values), sys.byteorder)
+    total = int.from_bytes(values.tobytes(), sys.byteorder) + shift * ones
+    shifted = array("l")
+    shifted.frombytes(total.to_bytes(len(values) * _ITEM_SIZE, sys.byteorder))
+    return shifted
+
+
+class MoveGraph:
+    """
+    Every legal move on a board, compiled into flat arrays. See module docstring.
+
+    Attributes:
+        height, width, size: Board dimensions (size = height * width = number of cells).
+        landing_costs: Cost to land on each cell, or -1 if it can't be landed on (barrier or rock).
+        offsets: size + 1 entries. Moves out of cell i are stored in entries offsets[i] to offsets[i+1].
+        targets: Cell index each move lands on.
+        costs: Cost of each move (the landing cost of its target).
+        teleport_offsets: size entries. The teleport exits out of cell i are entries teleport_offsets[i] to
+            offsets[i+1] (the entries before them are knight moves).
+        teleport_networks: Cell indices of the teleports in each network (see GameEngine.teleport_networks()).
+        network_of: The network (index into teleport_networks) of each cell, or -1 if it isn't in one.
+        staircase: The barrier rules the moves were compiled with (see GameEngine).
+        version: board.version at the time of compiling.
+    """
+
+    def __init__(self, game_engine):
+        board = game_engine.board
+        self.board = board
+        self.version = board.version
+        self.staircase = game_engine.staircase
+        self.height = board.get_height()
+        self.width = board.get_width()
+        self.size = self.height * self.width
+
+        blocked_values = (Pieces.BARRIER.value, Pieces.ROCK.value)
+        cost_of = {value: -1 if value in blocked_values else game_engine.get_cost(value)
+                   for value in board.distinct_values()}
+        self.landing_costs = array("l", map(cost_of.__getitem__, board.values()))
+
+        self.teleport_networks = game_engine.teleport_networks()
+        self.network_of = array("l", [-1]) * self.size
+        for network, members in enumerate(self.teleport_networks):
+            for member in members:
+                self.network_of[member] = network
+
+        # The knight moves come from the engine's move masks, which have already applied the barrier rules
+        masks = game_engine.get_move_masks()
+        self.offsets = array("l")
+        self.teleport_offsets = array("l")
+        self.targets = array("l")
+        self.costs = array("l")
+        for start in range(0, self.size, COMPILE_CELLS):
+            stop = min(start + COMPILE_CELLS, self.size)
+            offsets, teleport_offsets, targets, costs = self._compile_cells(masks, start, stop, len(self.targets))
+            self.offsets.extend(offsets)
+            self.teleport_offsets.extend(teleport_offsets)
+            self.targets.extend(targets)
+            self.costs.extend(costs)
+        self.offsets.append(len(self.targets))
+
+        self._adjacency = None
+
+    def _compile_cells(self, masks, start, stop, first_edge):
+        """
+        The moves out of cells start to stop - 1, worked out a block of cells at a time rather than cell by cell (like
+        MoveMasks._compile_masks()), so python does the work in C: every cell gets a slot for each of the 8 knight
+        moves, and itertools.compress() drops the slots of the moves that aren't in its mask. Teleport exits are then
+        spliced in after the knight moves of each teleport.
+
+        Returns:
+            offsets, teleport_offsets: One entry per cell (see class notes), numbering the edges from first_edge.
+            targets, costs: The edges.
+        """
+        count = stop - start
+        landing_costs, size = self.landing_costs, self.size
+
+        # A cell that can't be landed on (barrier or rock) has no moves out of it
+        closed = bytes(map((0).__gt__, landing_costs[start:stop])).translate(_FLAG_TO_BYTE)
+        cell_masks = (int.from_bytes(masks.masks[start:stop], "big") & ~int.from_bytes(closed, "big")) \
+            .to_bytes(count, "big")
+
+        # Slot 8 * cell + move holds the target of that move (and its landing cost), whether it's legal or not
+        legal = bytearray(8 * count)
+        slot_targets = array("l", bytes(8 * count * _ITEM_SIZE))
+        slot_costs = array("l", bytes(8 * count * _ITEM_SIZE))
+        lowest = min(masks.move_offsets)
+        cells = array("l", range(start + lowest, stop + max(masks.move_offsets)))
+        for move, d_index in enumerate(masks.move_offsets):
+            first, last = start + d_index, stop + d_index
+            legal[move::8] = cell_masks.translate(_MOVE_BITS[move])
+            slot_targets[move::8] = cells[d_index - lowest:d_index - lowest + count]
+            # Targets off the board cost 0, but their moves are never legal
+            on_board = landing_costs[min(max(first, 0), size):max(min(last, size), 0)]
+            before = min(max(-first, 0), count)
+            slot_costs[move::8] = array("l", bytes(before * _ITEM_SIZE)) + on_board + \
+                array("l", bytes((count - before - len(on_board)) * _ITEM_SIZE))
+        # Runs of cells with every move legal (most of an open board) are copied whole
+        targets, costs = array("l"), array("l")
+        copied = 0
+        for run in _ALL_MOVES.finditer(cell_masks):
+            first, last = 8 * run.start(), 8 * run.end()
+            targets.extend(compress(slot_targets[copied:first], legal[copied:first]))
+            costs.extend(compress(slot_costs[copied:first], legal[copied:first]))
+            targets.extend(slot_targets[first:last])
+            costs.extend(slot_costs[first:last])
+            copied = last
+        targets.extend(compress(slot_targets[copied:], legal[copied:]))
+        costs.extend(compress(slot_costs[copied:], legal[copied:]))
+
+        move_counts = list(cell_masks.translate(_MOVE_COUNTS))
+        edges = array("l", accumulate(move_counts, initial=first_edge))
+        offsets, teleport_offsets = edges[:-1], edges[1:]
+        members = [member for members in self.teleport_networks for member in members if start <= member < stop]
+        if not members:
+            return offsets, teleport_offsets, targets, costs
+
+        # Splice each teleport's exits in after its knight moves, and shift the cells after it along
+        exit_counts = [0] * count
+        spliced_targets, spliced_costs = array("l"), array("l")
+        copied = 0  # knight moves copied so far
+        for member in sorted(members):
+            knight_end = teleport_offsets[member - start] - first_edge
+            spliced_targets.extend(targets[copied:knight_end])
+            spliced_costs.extend(costs[copied:knight_end])
+            copied = knight_end
+            exits = [target for target in self.teleport_networks[self.network_of[member]] if target != member]
+            spliced_targets.extend(exits)
+            spliced_costs.extend(landing_costs[target] for target in exits)
+            exit_counts[member - start] = len(exits)
+        spliced_targets.extend(targets[copied:])
+        spliced_costs.extend(costs[copied:])
+
+        shifts = list(accumulate(exit_counts))
+        offsets = array("l", [offset + shift - exits for offset, shift, exits in zip(offsets, shifts, exit_counts)])
+        teleport_offsets = array("l", [offset + shift - exits
+                                       for offset, shift, exits in zip(teleport_offsets, shifts, exit_counts)])
+        return offsets, teleport_offsets, spliced_targets, spliced_costs
+
+    def sync(self, game_engine):
+        """
+        Bring the graph up to date with the board, like MoveMasks.sync(): the edits are read from the board's journal,
+        and an edit can only change the moves of the cells within 2 rows and columns of it (and the exits of the
+        teleports in its network, if it was or is now a teleport), so only the board rows around each edit are
+        compiled again, and spliced into the arrays in place.
+
+        Returns:
+            False if the board has been reloaded or reset since (or edited more than its journal remembers), in which
+            case the graph is left as it is, and needs compiling from scratch.
+        """
+        board = self.board
+        if self.version == board.version:
+            return True
+        edits = board.edits_since(self.version)
+        if edits is None:
+            return False
+        masks = game_engine.get_move_masks()
+        height, width = self.height, self.width
+
+        blocked_values = (Pieces.BARRIER.value, Pieces.ROCK.value)
+        cells = []  # (start, stop) of each range of cells to compile again
+        teleports_edited = False
+        for index in dict.fromkeys(edits):
+            value = board.get_value_at(index)
+            self.landing_costs[index] = -1 if value in blocked_values else game_engine.get_cost(value)
+            teleports_edited = teleports_edited or self.network_of[index] >= 0 or teleport_network(value) is not None
+            row = index // width
+            cells.append((max(row - 2, 0) * width, min(row + 3, height) * width))
+
+        if teleports_edited:
+            cells.extend((member, member + 1) for members in self.teleport_networks for member in members)
+            for members in self.teleport_networks:
+                for member in members:
+                    self.network_of[member] = -1
+            self.teleport_networks = game_engine.teleport_networks()
+            for network, members in enumerate(self.teleport_networks):
+                for member in members:
+                    self.network_of[member] = network
+                    cells.append((member, member + 1))
+
+        merged = []
+        for start, stop in sorted(cells):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+
+        # Working forwards, so the cells after each range are shifted along by the edges it gained (or lost)
+        offsets, teleport_offsets = self.offsets, self.teleport_offsets
+        shift = 0
+        shifted = 0  # cells before this have been shifted
+        for start, stop in merged:
+            self._shift(shifted, start, shift)
+            first, last = offsets[start] + shift, offsets[stop] + shift
+            new_offsets, new_teleport_offsets, targets, costs = self._compile_cells(masks, start, stop, first)
+            self.targets[first:last] = targets
+            self.costs[first:last] = costs
+            offsets[start:stop] = new_offsets
+            teleport_offsets[start:stop] = new_teleport_offsets
+            if self._adjacency is not None:
+                ends = list(new_offsets[1:]) + [first + len(targets)]
+                self._adjacency[start:stop] = [tuple(targets[begin - first:end - first])
+                                               for begin, end in zip(new_offsets, ends)]
+            shift += len(targets) - (last - first)
+            shifted = stop
+        self._shift(shifted, self.size, shift)
+        offsets[self.size] += shift
+
+        self.version = board.version
+        return True
+
+    def _shift(self, start, stop, shift):
+        """
+        Move the edges of cells start to stop - 1 along by shift.
+        """
+        if shift and start < stop:
+            self.offsets[start:stop] = _shifted(self.offsets[start:stop], shift)
+            self.teleport_offsets[start:stop] = _shifted(self.teleport_offsets[start:stop], shift)
+
+    def index(self, pos):
+        """
+        Convert a GridPos to a cell index.
+        """
+        return pos.x * self.width + pos.y
+
+    def pos(self, index):
+        """
+        Convert a cell index to a GridPos.
+        """
+        return self.board.pos(index)
+
+    def adjacency(self):
+        """
+        Moves out of every cell, as a list of tuples (adjacency[index] == tuple(neighbors(index))). Tuples are the
+        fastest thing for python to iterate over, which matters for the tour searches. Built once, then cached.
+        """
+        if self._adjacency is None:
+            targets, offsets = self.targets, self.offsets
+            self._adjacency = [tuple(targets[offsets[index]:offsets[index + 1]]) for index in range(self.size)]
+        return self._adjacency
+
+    def neighbors(self, index):
+        """
+        Cell indices of all legal moves from a cell (same order as GameEngine.get_possible_moves()).
+        """
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def get_possible_moves(self, pos):
+        """
+        GridPos equivalent of GameEngine.get_possible_moves(), answered from the compiled graph.
+        """
+        return [self.pos(target) for target in self.neighbors(self.index(pos))]
@@ -0,0 +1,199 @@
+"""
+Purpose: One byte per cell, with a bit for each of the 8 knight moves out of it that the rules allow.
+
+GameEngine used to re-derive every move from the board each time it was asked: check the target is on the board, and
+isn't a barrier or rock, then walk both L-shaped paths, cell by cell, looking for barriers. The answers only change
+when the board does, so MoveMasks works them out up front: bit m of masks[index] is set if KNIGHT_MOVES[m] is legal
+from that cell. Listing the moves out of a cell is then a single lookup (MASK_MOVES lists the moves in each mask).
+
+Edits: changing a cell can only change the moves that land on it (from 8 cells), and the moves that pass over it
+(from the cells 1 or 2 steps away), and only if it changed whether the cell is blocked (barrier or rock) or a
+barrier: eg: '.' to 'W' changes nothing. So only those bits are recomputed (about 24 cells' worth). The edits are read
+from the board's journal (Board.edits_since()), so the masks catch up lazily, the next time they're used. If the board
+has been reloaded or reset since (or edited more than its journal remembers), they're compiled from scratch.
+
+Barrier rules: a move is legal if at least one of its paths is clear of barriers. The paths are the two L shapes (see
+GameEngine.validate_barrier_clear()), and optionally (staircase=True) a third: the staircase through the middle, one
+long step, the short step, then the other long step. Eg: 2 down and 1 right passes over (1, 0) and (1, 1). All three
+look the same in reverse, and under rotations and reflections, so the moves stay reversible (see extension.py) and
+symmetric (see symmetry.py) either way.
+"""
+from .move_graph import KNIGHT_MOVES
+from .pieces import Pieces
+
+# The moves set in each of the 256 masks, as indices into KNIGHT_MOVES
+MASK_MOVES = [tuple(move for move in range(len(KNIGHT_MOVES)) if mask >> move & 1) for mask in range(256)]
+
+
+def move_paths(d_row, d_col, staircase=False):
+    """
+    The paths a knight could take for a move, as lists of (d_row, d_col) steps from the start. The start is excluded,
+    and so is the final position, since a barrier there would already make the move illegal.
+    """
+    sign_row = 1 if d_row > 0 else -1
+    sign_col = 1 if d_col > 0 else -1
+    rows = [sign_row * i for i in range(1, abs(d_row) + 1)]
+    cols = [sign_col * i for i in range(1, abs(d_col) + 1)]
+
+    rows_first = [(row, 0) for row in rows] + [(d_row, col) for col in cols]
+    cols_first = [(0, col) for col in cols] + [(row, d_col) for row in rows]
+    paths = [rows_first[:-1], cols_first[:-1]]
+    if staircase:
+        if abs(d_row) == 2:
+            paths.append([(sign_row, 0), (sign_row, d_col)])
+        else:
+            paths.append([(0, sign_col), (d_row, sign_col)])
+    return paths
+
+
+class MoveMasks:
+    """
+    The legal knight moves out of every cell of a board, as one byte per cell. See module notes.
+
+    Attributes:
+        masks: bytearray, one mask per cell (in cell index order). Teleports aren't included (see GameEngine).
+        move_offsets: Change in cell index of each move in KNIGHT_MOVES.
+        version: board.version the masks are up to date with.
+    """
+
+    def __init__(self, board, staircase=False):
+        """
+        Inputs:
+            board: Board to follow.
+            staircase: Also allow the staircase path (see module notes), as well as the two L shapes.
+        """
+        self.board = board
+        self.staircase = staircase
+        self._compile()
+
+    def _compile(self):
+        """
+        Work out every mask from scratch.
+        """
+        board = self.board
+        self.version = board.version
+        self.height, self.width = board.get_height(), board.get_width()
+        width = self.width
+        self.move_offsets = [d_row * width + d_col for d_row, d_col in KNIGHT_MOVES]
+
+        # For each move: (d_row, d_col, d_index, paths, as lists of d_index)
+        self._moves = []
+        # (move, d_row, d_col) of every step of a path: a barrier at a cell affects move from (d_row, d_col) before it
+        crossings = set()
+        for move, (d_row, d_col) in enumerate(KNIGHT_MOVES):
+            paths = move_paths(d_row, d_col, self.staircase)
+            self._moves.append((d_row, d_col, d_row * width + d_col,
+                                [[row * width + col for row, col in path] for path in paths]))
+            crossings.update((move, row, col) for path in paths for row, col in path)
+        self._crossings = sorted(crossings)
+
+        self._blocked = board.cell_flags((Pieces.BARRIER.value, Pieces.ROCK.value))
+        self._barriers = board.cell_flags((Pieces.BARRIER.value,))
+        self.masks = self._compile_masks(self._blocked, self._barriers)
+
+    def _compile_masks(self, blocked, barriers):
+        """
+        Every mask, worked out a whole board at a time rather than cell by cell: each condition of a move (stays on the
+        board, lands on an open cell, has a path clear of barriers) is a byte per cell, 0 or 1, and the bytes are
+        combined as big integers, so python does the work in C. Shifting an array by a move's change in cell index
+        lines each cell up with the cell that move lands on (or passes over).
+        """
+        size, height, width = len(blocked), self.height, self.width
+        if size == 0:
+            return bytearray()
+
+        def to_int(cells):
+            return int.from_bytes(cells, "big")
+
+        def shifted(cells, d_index):
+            # cells[index + d_index] for every index (0 where that's off the end)
+            if d_index >= 0:
+                return cells[d_index:] + bytes(min(d_index, size))
+            return bytes(min(-d_index, size)) + cells[:size + d_index]
+
+        open_cells = bytes(blocked).translate(bytes([1, 0]) + bytes(254))
+        clear_cells = bytes(barriers).translate(bytes([1, 0]) + bytes(254))
+        any_barriers = any(barriers)
+        masks = 0
+        for move, (d_row, d_col, d_index, paths) in enumerate(self._moves):
+            # Cells the move stays on the board from
+            rows = bytes(width * max(0, -d_row)) + bytes([1]) * (width * max(0, height - abs(d_row))) + \
+                bytes(width * max(0, d_row))
+            cols = bytes(1 if 0 <= col + d_col < width else 0 for col in range(width)) * height
+            legal = to_int(rows[:size]) & to_int(cols) & to_int(shifted(open_cells, d_index))
+            if any_barriers:
+                clear = 0
+                for path in paths:
+                    path_clear = -1  # all ones
+                    for step in path:
+                        path_clear &= to_int(shifted(clear_cells, step))
+                    clear |= path_clear
+                legal &= clear
+            masks |= legal << move  # each cell's byte is 0 or 1, so this sets bit move of its mask
+        return bytearray(masks.to_bytes(size, "big"))
+
+    def _is_legal(self, index, move):
+        """
+        Whether move (an index into KNIGHT_MOVES) is legal from cell index.
+        """
+        d_row, d_col, d_index, paths = self._moves[move]
+        row, col = divmod(index, self.width)
+        if not (0 <= row + d_row < self.height and 0 <= col + d_col < self.width):
+            return False
+        if self._blocked[index + d_index]:
+            return False
+        barriers = self._barriers
+        return any(all(not barriers[index + step] for step in path) for path in paths)
+
+    def _update_bit(self, row, col, move):
+        """
+        Recompute one bit: move out of (row, col), if that cell is on the board.
+        """
+        if 0 <= row < self.height and 0 <= col < self.width:
+            index = row * self.width + col
+            if self._is_legal(index, move):
+                self.masks[index] |= 1 << move
+            else:
+                self.masks[index] &= ~(1 << move) & 0xFF
+
+    def _update_cell(self, index):
+        """
+        Catch up with an edit of cell index: recompute the bits of the moves landing on it, or passing over it, if
+        it's changed in a way that could affect them.
+        """
+        value = self.board.get_value_at(index)
+        blocked = value in (Pieces.BARRIER.value, Pieces.ROCK.value)
+        barrier = value == Pieces.BARRIER.value
+        row, col = divmod(index, self.width)
+
+        if blocked != self._blocked[index]:
+            self._blocked[index] = blocked
+            for move, (d_row, d_col) in enumerate(KNIGHT_MOVES):
+                self._update_bit(row - d_row, col - d_col, move)
+
+        if barrier != self._barriers[index]:
+            self._barriers[index] = barrier
+            for move, d_row, d_col in self._crossings:
+                self._update_bit(row - d_row, col - d_col, move)
+
+    def sync(self):
+        """
+        Bring the masks up to date with the board (see module notes).
+        """
+        board = self.board
+        if self.version == board.version:
+            return
+        edits = board.edits_since(self.version)
+        if edits is None:
+            self._compile()
+            return
+        for index in dict.fromkeys(edits):
+            self._update_cell(index)
+        self.version = board.version
+
+    def targets(self, index):
+        """
+        Cell indices of the knight moves out of cell index, in KNIGHT_MOVES order.
+        """
+        move_offsets = self.move_offsets
+        return [index + move_offsets[move] for move in MASK_MOVES[self.masks[index]]]
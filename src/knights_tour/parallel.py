@@ -0,0 +1,200 @@
+"""
+Purpose: Run longest path searches on several cores at once.
+
+Portfolio search: Each heuristic in LongestPathSearchHeuristics shines on some boards and flounders on others, and
+the random ones vary from seed to seed. Rather than guessing, run a portfolio of (heuristic, seed) pairs in a process
+pool, and keep the best path any of them finds.
+
+Split search: Run a single heuristic, but split its search tree across cores. The first few levels of the tree are
+enumerated up front (TourSearch.split()), and each path reaching the split depth becomes an independent subproblem.
+Subproblems are queued in heuristic priority order, and each worker takes the next one as soon as it finishes its
+last, so a worker that draws a small subtree just does more of them.
+
+Either way, all workers share a single multiprocessing.Value holding the best cost found so far, so they can all stop
+as soon as one of them reaches cost_acceptance_thresh.
+
+Processes (rather than threads) are used, since the search is pure python, and threads would all wait on the GIL.
+Anything handed to a worker is pickled, so heuristics are named (eg: "dense_search_heuristic"), not passed as methods.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .gameengine import GameEngine
+from .heuristics import LongestPathSearchHeuristics as Heuristics
+from .tour_search import TourSearch
+
+# Deterministic heuristics first, then as many random seeds as there are workers left over
+BASE_PORTFOLIO = [("dense_search_heuristic", None), ("sparse_search_heuristic", None), ("identity_heuristic", None)]
+
+# Set in each worker process by the pool initializer
+_shared_best = None
+_graph = None
+
+
+def default_portfolio(size):
+    """
+    The first `size` entries of: dense, sparse and identity heuristics, then the random heuristic with seeds 0, 1, ...
+    """
+    portfolio = BASE_PORTFOLIO[:size]
+    for seed in range(size - len(portfolio)):
+        portfolio.append(("random_search_heuristic", seed))
+    return portfolio
+
+
+def _init_worker(shared_best):
+    """
+    Runs once in each worker. Synchronized values can't be pickled into each task, but can be inherited this way.
+    """
+    global _shared_best  # pylint: disable=global-statement
+    _shared_best = shared_best
+
+
+def _portfolio_worker(board, start, heuristic_name, seed, deadline, cost_acceptance_thresh, prune, bound, staircase):
+    """
+    Run one search of the portfolio, until the shared deadline (time.time() value) or an acceptable path is found.
+    Returns a dict describing the result, with the path as cell indices.
+    """
+    graph = GameEngine(board, staircase=staircase).get_move_graph()
+    heuristic = getattr(Heuristics(seed=seed), heuristic_name)
+    search = TourSearch(graph, start, heuristic,
+                        time_allowed=max(0, deadline - time.time()),
+                        cost_acceptance_thresh=cost_acceptance_thresh,
+                        shared_best=_shared_best,
+                        prune=prune,
+                        bound=bound)
+    search.run()
+    return {
+        "heuristic": heuristic_name,
+        "seed": seed,
+        "cost": search.optimal_cost,
+        "path": search.optimal_path,
+        "nodes": search.nodes,
+        "complete": search.complete,
+        "pid": os.getpid(),
+    }
+
+
+def run_portfolio(board, start, time_allowed, cost_acceptance_thresh, portfolio=None, max_workers=None,
+                  prune=False, bound=False, staircase=False):
+    """
+    Run a portfolio of searches in parallel, and return a list of their results (see _portfolio_worker()), best first.
+
+    Inputs:
+        board: Board to search (each worker compiles its own MoveGraph).
+        start: Cell index the paths start from.
+        time_allowed: Seconds for the whole portfolio. Searches that are queued behind others (more searches than
+            workers) only get whatever time is left when they start.
+        cost_acceptance_thresh: Every search stops once any of them finds a path this good.
+        portfolio: List of (heuristic name, seed) pairs. Default: default_portfolio(max_workers).
+        max_workers: Number of processes (default: one per core).
+        prune: Skip branches that can no longer complete a full tour (see TourSearch).
+        bound: Skip branches that can't beat the best cost found by any of the searches (see TourSearch).
+        staircase: Barrier rules of the board (see GameEngine).
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if portfolio is None:
+        portfolio = default_portfolio(max_workers)
+
+    shared_best = multiprocessing.Value("q", 0)
+    deadline = time.time() + time_allowed
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(shared_best,)) as pool:
+        futures = [pool.submit(_portfolio_worker, board, start, heuristic_name, seed, deadline,
+                               cost_acceptance_thresh, prune, bound, staircase)
+                   for heuristic_name, seed in portfolio]
+        results = [future.result() for future in futures]
+
+    return sorted(results, key=lambda result: result["cost"], reverse=True)
+
+
+def _init_split_worker(shared_best, board, staircase):
+    """
+    Runs once in each worker: every subproblem is on the same board, so only compile the MoveGraph once.
+    """
+    global _graph  # pylint: disable=global-statement
+    _init_worker(shared_best)
+    _graph = GameEngine(board, staircase=staircase).get_move_graph()
+
+
+def _split_worker(path, heuristic_name, seed, deadline, cost_acceptance_thresh, prune, bound):
+    """
+    Search one subproblem created by TourSearch.split(), until the shared deadline or an acceptable path is found.
+    """
+    heuristic = getattr(Heuristics(seed=seed), heuristic_name)
+    search = TourSearch(_graph, path[-1], heuristic,
+                        time_allowed=max(0, deadline - time.time()),
+                        cost_acceptance_thresh=cost_acceptance_thresh,
+                        shared_best=_shared_best,
+                        prefix=path[:-1],
+                        prune=prune,
+                        bound=bound)
+    search.run()
+    return {
+        "cost": search.optimal_cost,
+        "path": search.optimal_path,
+        "nodes": search.nodes,
+        "complete": search.complete,
+        "pid": os.getpid(),
+    }
+
+
+def run_split(board, start, time_allowed, cost_acceptance_thresh, heuristic_name="identity_heuristic", seed=None,
+              split_depth=3, max_workers=None, prune=False, bound=False, staircase=False):
+    """
+    Run a single search, with its tree split across processes. Without pruning, an exhaustive search expands exactly
+    the same nodes as TourSearch.run() would on its own.
+
+    Inputs:
+        board, start, time_allowed, cost_acceptance_thresh: see run_portfolio()
+        heuristic_name, seed: The heuristic (a LongestPathSearchHeuristics method name), and its random seed.
+        split_depth: Number of moves enumerated up front. Deeper gives more, smaller subproblems: better balanced,
+            at the cost of more overhead. There should be several subproblems per worker.
+        max_workers: Number of processes (default: one per core).
+        prune: Skip branches that can no longer complete a full tour (see TourSearch). Only the subproblems are
+            pruned, not the levels above the split.
+        bound: Skip branches that can't beat the best cost found by any of the workers (see TourSearch).
+        staircase: Barrier rules of the board (see GameEngine).
+
+    Returns: dict with
+        cost, path: The best path found (cell indices), and its cost.
+        nodes: Total nodes expanded (including those above the split).
+        complete: Whether every subproblem was searched to completion.
+        subproblems: Number of subproblems.
+        worker_nodes: {pid: nodes expanded} for each worker process.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    deadline = time.time() + time_allowed
+    graph = GameEngine(board, staircase=staircase).get_move_graph()
+    top = TourSearch(graph, start, getattr(Heuristics(seed=seed), heuristic_name),
+                     cost_acceptance_thresh=cost_acceptance_thresh)
+    subproblems = top.split(split_depth)
+    best = {"cost": top.optimal_cost, "path": top.optimal_path}
+    worker_nodes = {}
+    complete = top.optimal_cost < top.cost_acceptance_thresh
+
+    if subproblems and top.optimal_cost < top.cost_acceptance_thresh:
+        shared_best = multiprocessing.Value("q", top.optimal_cost)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_split_worker,
+                                 initargs=(shared_best, board, staircase)) as pool:
+            futures = [pool.submit(_split_worker, path, heuristic_name, seed, deadline, top.cost_acceptance_thresh,
+                                   prune, bound)
+                       for path in subproblems]
+            for future in futures:
+                result = future.result()
+                worker_nodes[result["pid"]] = worker_nodes.get(result["pid"], 0) + result["nodes"]
+                complete = complete and result["complete"]
+                if result["cost"] > best["cost"]:
+                    best = result
+
+    return {
+        "cost": best["cost"],
+        "path": best["path"],
+        "nodes": top.nodes + sum(worker_nodes.values()),
+        "complete": complete,
+        "subproblems": len(subproblems),
+        "worker_nodes": worker_nodes,
+    }
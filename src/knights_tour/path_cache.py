@@ -0,0 +1,93 @@
+"""
+Purpose: Reuse shortest path trees across queries on the same board.
+
+A Dijkstra search that runs to completion, rather than stopping at end_pos, finds the lowest cost route from
+start_pos to every reachable cell: its journey_map is a shortest path tree, and reconstruct_path() can read the route
+to any end_pos from it. So when many (start, end) queries are asked of the same few boards, one tree per start answers
+every end, without planning again.
+
+Trees are stored under (board, board.version, staircase, start, cost table): any edit to the board (or different rules)
+makes a new key, so a stale tree is never handed out; it just stops being used, and is evicted in time. Boards are
+matched by identity (a copy, or the same file loaded again, is a different board), and each entry keeps its board
+alive until it's evicted.
+
+Memory is capped: each tree is a CostLayer and a ParentLayer (8 bytes per cell), and when the total goes over
+max_bytes, the least recently used trees are dropped.
+"""
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class PathTreeCache:
+    """
+    LRU cache of shortest path trees (cost_map, journey_map), keyed by board, version, rules and start. See module
+    notes.
+
+    Attributes:
+        max_bytes: Most memory the trees can take, in total.
+        nbytes: Memory the trees take now.
+        hits, misses: Number of calls to get() that found, or didn't find, a tree.
+        evictions: Number of trees dropped to stay under max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._trees = OrderedDict()  # key -> (board, cost_map, journey_map, nbytes), least recently used first
+
+    @staticmethod
+    def key(game_engine, start_pos):
+        """
+        Key of the tree from start_pos, on the game engine's board as it is now.
+        """
+        board = game_engine.board
+        return (id(board), board.version, game_engine.staircase, board.index(start_pos), game_engine.cost_table())
+
+    def get(self, key):
+        """
+        The (cost_map, journey_map) stored for key, or None. The maps are shared by every caller, so treat them as
+        read only.
+        """
+        entry = self._trees.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._trees.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key, board, cost_map, journey_map):
+        """
+        Store a tree, then evict the least recently used trees until the cache is back under max_bytes. A tree that
+        doesn't fit on its own isn't stored.
+        """
+        nbytes = sum(layer.values.itemsize * len(layer.values) for layer in (cost_map, journey_map))
+        if nbytes > self.max_bytes:
+            return
+        if key in self._trees:
+            self.nbytes -= self._trees.pop(key)[3]
+        # The entry holds the board, so its id (in the key) can't be reused by another board while the tree is stored
+        self._trees[key] = (board, cost_map, journey_map, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, _, _, evicted_bytes) = self._trees.popitem(last=False)
+            self.nbytes -= evicted_bytes
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every tree (the counters are kept).
+        """
+        self._trees.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._trees)
+
+
+# Shared by every Knight that doesn't pass its own cache (see Knight.plan_shortest_path_cached())
+PATH_TREES = PathTreeCache()
@@ -13,3 +13,15 @@ class Pieces(Enum):
     ROCK = "R"
     TELEPORT = "T"
     LAVA = "L"
+
+
+def teleport_network(value):
+    """
+    Teleports are linked into networks: landing on one lets the knight jump to any other teleport in the same network.
+    A plain 'T' belongs to the default network (id ''), and 'T<id>' (eg: 'T1', 'T12') to network <id>.
+
+    Returns the network id of a teleport, or None if value isn't a teleport.
+    """
+    if isinstance(value, str) and value.startswith(Pieces.TELEPORT.value):
+        return value[len(Pieces.TELEPORT.value):]
+    return None
@@ -0,0 +1,104 @@
+"""
+Purpose: Randomized restarts for the longest path search, with node budgets following the Luby sequence.
+
+The run time of a backtracking search like TourSearch is heavy tailed: with one move order it finds a tour in a few
+hundred nodes, and with another (differing only in how ties were broken early on) it's stuck under a bad early move
+for longer than anyone will wait. Rather than one long run, RestartSearch makes many short ones, each with a freshly
+seeded random tie-break (random_dense_search_heuristic by default), and keeps the best path found by any of them.
+
+How long should each run be? Too short, and no run ever gets far enough to finish; too long, and we're back to
+waiting out the tail. The Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, 1, ...
+(times a unit number of nodes) is within a log factor of the best fixed budget, without knowing what that is
+(Luby, Sinclair and Zuckerman, 1993): every budget is tried, with the total time spent on each size roughly equal.
+
+Runs are seeded from a single seed, and limited by nodes rather than time, so a search that finishes within its time
+allowed is reproducible.
+"""
+import random
+import time
+
+from .heuristics import LongestPathSearchHeuristics as Heuristics
+from .tour_search import TourSearch
+
+
+def luby(index):
+    """
+    The index-th term (from 1) of the Luby sequence: 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    power = 1
+    while (1 << power) - 1 < index:
+        power += 1
+    # The sequence ends each block of 2^power - 1 terms on 2^(power - 1), and repeats itself before that
+    while index != (1 << power) - 1:
+        index -= (1 << (power - 1)) - 1
+        power = 1
+        while (1 << power) - 1 < index:
+            power += 1
+    return 1 << (power - 1)
+
+
+class RestartSearch:
+    """
+    Repeated TourSearch runs, each with its own random tie-break, under Luby node budgets. See module notes.
+
+    Attributes (results):
+        optimal_path: List of cell indices of the best path found by any run.
+        optimal_cost: Cost of optimal_path (sum of landing costs, including the start).
+        nodes: Number of nodes expanded, over all runs.
+        restarts: Number of runs started.
+    """
+
+    def __init__(self, graph, start, time_allowed=10, cost_acceptance_thresh=None, seed=None, unit=1000,
+                 heuristic_name="random_dense_search_heuristic", prune=False):
+        """
+        Inputs:
+            graph: MoveGraph of the board.
+            start: Cell index the path starts from.
+            time_allowed: Seconds before giving up, over all runs.
+            cost_acceptance_thresh: Stop as soon as a path this good is found (default: every cell visited).
+            seed: Seeds every run's heuristic, so a search is reproducible (as long as time_allowed doesn't cut it
+                short).
+            unit: Nodes per unit of the Luby sequence (the budget of the shortest runs).
+            heuristic_name: Name of a random LongestPathSearchHeuristics method, taking (degree, move) tuples.
+            prune: see TourSearch.
+        """
+        self.graph = graph
+        self.start = start
+        self.time_allowed = time_allowed
+        if cost_acceptance_thresh is None:
+            cost_acceptance_thresh = sum(cost for cost in graph.landing_costs if cost > 0)
+        self.cost_acceptance_thresh = cost_acceptance_thresh
+        self.seed = seed
+        self.unit = unit
+        self.heuristic_name = heuristic_name
+        self.prune = prune
+
+        self.optimal_path = [start]
+        self.optimal_cost = graph.landing_costs[start]
+        self.nodes = 0
+        self.restarts = 0
+
+    def run(self):
+        """
+        Run searches until one reaches cost_acceptance_thresh, or time runs out. Results are stored in
+        optimal_path/optimal_cost.
+        """
+        rng = random.Random(self.seed)
+        deadline = time.time() + self.time_allowed
+        while self.optimal_cost < self.cost_acceptance_thresh and time.time() < deadline:
+            self.restarts += 1
+            heuristic = getattr(Heuristics(seed=rng.getrandbits(32)), self.heuristic_name)
+            search = TourSearch(self.graph, self.start, heuristic,
+                                time_allowed=deadline - time.time(),
+                                cost_acceptance_thresh=self.cost_acceptance_thresh,
+                                optimal_cost=self.optimal_cost,
+                                prune=self.prune,
+                                node_limit=self.unit * luby(self.restarts))
+            search.run()
+            self.nodes += search.nodes
+            if search.optimal_cost > self.optimal_cost:
+                self.optimal_cost = search.optimal_cost
+                self.optimal_path = search.optimal_path
+            if search.complete:
+                break  # explored every path: another run can't do better
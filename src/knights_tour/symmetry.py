@@ -0,0 +1,98 @@
+"""
+Purpose: Symmetries of a board (rotations and reflections), for cutting down searches and sharing cached results.
+
+A rectangle can be rotated and reflected 8 ways (the dihedral group D4), or 4 if it isn't square (the rest would
+swap its height and width). Knight moves look the same under all of them, and so do the other rules (barriers block
+both L-shaped paths or neither, teleports stay in their networks), so if the pieces on the board are unchanged by a
+transform, every path has a mirror image with the same cost. The classic 8x8 board, empty, is unchanged by all 8.
+
+Uses:
+    - Searches: if a transform also leaves the path so far where it is (eg: the start is in a corner, on the
+        diagonal it's reflected in), then the moves it maps onto each other lead to mirror image subtrees, so only
+        one of them needs exploring (see TourSearch). From the center of an open odd board, that's 8x fewer paths.
+    - Caches: the 8 transforms of a board (and start) all have the same answer, up to the transform, so results can
+        be stored under the smallest of them (canonical_form()), and found again from any of the others.
+
+Transforms are given as permutations of cell indices: permutation[index] is the index of the cell it moves to,
+in the transformed board (which has its height and width swapped, for transforms that turn the board sideways).
+"""
+
+# Where each transform sends (row, col), on a height x width board
+TRANSFORMS = {
+    "identity": lambda row, col, height, width: (row, col),
+    "rotate_90": lambda row, col, height, width: (col, height - 1 - row),
+    "rotate_180": lambda row, col, height, width: (height - 1 - row, width - 1 - col),
+    "rotate_270": lambda row, col, height, width: (width - 1 - col, row),
+    "flip_rows": lambda row, col, height, width: (height - 1 - row, col),
+    "flip_cols": lambda row, col, height, width: (row, width - 1 - col),
+    "transpose": lambda row, col, height, width: (col, row),
+    "anti_transpose": lambda row, col, height, width: (width - 1 - col, height - 1 - row),
+}
+SIDEWAYS = {"rotate_90", "rotate_270", "transpose", "anti_transpose"}  # transforms that swap height and width
+
+
+def transformed_shape(name, height, width):
+    """
+    (height, width) of a height x width board after the transform.
+    """
+    return (width, height) if name in SIDEWAYS else (height, width)
+
+
+def permutation(name, height, width):
+    """
+    The transform as a permutation of cell indices (see module notes).
+    """
+    transform = TRANSFORMS[name]
+    new_width = transformed_shape(name, height, width)[1]
+    perm = []
+    for row in range(height):
+        for col in range(width):
+            new_row, new_col = transform(row, col, height, width)
+            perm.append(new_row * new_width + new_col)
+    return perm
+
+
+def symmetries(values, height, width):
+    """
+    Permutations (see module notes) of the transforms that leave the board unchanged, other than the identity.
+    values: The board's pieces, in cell index order (see Board.values()).
+    """
+    found = []
+    for name in TRANSFORMS:
+        if name == "identity" or (name in SIDEWAYS and height != width):
+            continue
+        perm = permutation(name, height, width)
+        if all(values[perm[index]] == value for index, value in enumerate(values)):
+            found.append(perm)
+    return found
+
+
+def canonical_form(values, height, width, start):
+    """
+    The smallest of the 8 transforms of a board and start, so that every transform of them has the same form (eg:
+    for cache keys). values can be any per cell data (eg: pieces, or landing costs), as long as it's comparable.
+
+    Returns: (form, perm), where form = (height, width, start, values) after the transform, and perm is the
+    transform's permutation (see module notes): map a path to the canonical board with perm[index], and back with
+    inverse(perm).
+    """
+    best_form, best_perm = None, None
+    for name in TRANSFORMS:
+        perm = permutation(name, height, width)
+        new_values = [None] * len(values)
+        for index, value in enumerate(values):
+            new_values[perm[index]] = value
+        form = transformed_shape(name, height, width) + (perm[start], tuple(new_values))
+        if best_form is None or form < best_form:
+            best_form, best_perm = form, perm
+    return best_form, best_perm
+
+
+def inverse(perm):
+    """
+    Inverse of a permutation.
+    """
+    inv = [0] * len(perm)
+    for index, image in enumerate(perm):
+        inv[image] = index
+    return inv
@@ -0,0 +1,552 @@
+"""
+Purpose: The search core for the longest (highest cost) path problem, aka the knight's tour.
+
+Knight._find_longest_path_recursive() marks visited positions by writing rocks into the shared board, and keeps the
+degree of every position (the number of moves still available from it) in a Board of python ints. Every lookup goes
+through get_value(), and every move list through get_possible_moves(). TourSearch runs the same depth first search,
+node for node, on flat data instead:
+    - moves come from the compiled MoveGraph, as a tuple of cell indices per cell
+    - visited positions are a bytearray bitboard (1 byte per cell), so the caller's Board is never touched
+    - degrees are a flat int array, updated through the precomputed neighbor tuples
+
+Positions are cell indices (see MoveGraph.index()) throughout, including in the (degree, move) tuples handed to the
+heuristic, so heuristics should only rely on the order of the moves and their degrees.
+
+Pruning (optional): When the goal is a full tour, the search can blow up long after a branch became hopeless, by
+cutting off an island of cells (see dense_search_heuristic). With prune=True, a node's children are not explored when:
+    - an unvisited cell has no unvisited neighbors left, and isn't next to the current cell (it's unreachable)
+    - more than one unvisited cell has a single way in (each of them would have to be the end of the path)
+    - the unvisited cells (plus the current cell) are no longer connected (an island)
+Counts of degree 0 and 1 cells are kept up to date as degrees change, so the first two rules cost O(moves). For
+the third, note that the only cell removed from the graph since the last node is the previous cell, so the graph
+can only have split if the previous cell's other neighbors are now cut off from the current one. A BFS from the
+current cell stops as soon as it reaches all of them, which is usually within a few cells (they're close by), and
+only falls back to covering the whole component when the graph really is split.
+These rules only hold for full tours (of every cell reachable from start), so only prune when that is the goal: paths
+in the pruned branches are never explored, even if they would have beaten a partial path.
+
+Branch and bound (optional): For the highest cost path on a weighted board (eg: water and lava), bound=True cuts any
+branch that can't beat the best path found so far, even if it collected every cell it could still reach:
+    bound = cost so far + cost of the unvisited cells reachable from start - cost of the dead cells
+where dead cells are those with no unvisited neighbors left (and not next to the current cell). Both sums are kept
+up to date along with the degree counts, so the bound is O(1) per node. Unlike pruning, this never cuts the best
+path, so a search that runs to completion has found the optimal path (see TourSearch.complete).
+
+Symmetry (optional): Given the rotations/reflections that leave the board unchanged (Board.symmetries()), the
+search keeps track of those that also leave the path so far in place. Moves that they map onto each other lead to
+mirror image subtrees, so only the first of each set is explored. Usually only the first few moves are affected (eg:
+from a corner, only the first move, since no knight move stays on the diagonal), and the bookkeeping stops as soon
+as no transform is left.
+
+End constraint (optional): With end set, only paths that finish on end count, and a path stops as soon as it gets
+there. Branches that can no longer get to end through unvisited cells are cut, which is what makes this far faster
+than searching freely and throwing away paths that end elsewhere. Reachability is kept up cheaply: end was reachable
+from the previous cell, so it's still reachable unless leaving that cell split the unvisited cells (the same
+connectivity check as pruning). Only then is end searched for, best first by its distance map (BFS from end, computed
+once), so a search that can get there usually heads straight for it.
+"""
+import heapq
+import time
+from array import array
+from collections import deque
+
+
+class TourSearch:
+    """
+    Depth first search for the highest cost path from start, on an explicit stack.
+
+    Attributes (results):
+        optimal_path: List of cell indices of the best path found.
+        optimal_cost: Cost of optimal_path (sum of landing costs, including the start).
+        nodes: Number of nodes expanded.
+        degrees: Number of unvisited moves out of each cell (-1 for cells that can't be visited). Between searches,
+            this is the degree of every cell on the empty board.
+    """
+
+    # How often (in nodes) to sync with shared_best. Often enough to stop promptly, rare enough to cost nothing.
+    SHARED_SYNC_INTERVAL = 1024
+
+    def __init__(self, graph, start, heuristic, time_allowed=10, cost_acceptance_thresh=None, optimal_cost=0,
+                 shared_best=None, prefix=(), prune=False, bound=False, symmetries=None, node_limit=None, end=None):
+        """
+        Inputs:
+            graph: MoveGraph of the board.
+            start: Cell index the path starts from.
+            heuristic: Sorts [(degree, move), ...] into the order moves should be explored
+                (see LongestPathSearchHeuristics).
+            time_allowed: Seconds before the search gives up, and keeps the best path found so far.
+            cost_acceptance_thresh: Stop as soon as a path this good is found (default: every cell visited).
+            optimal_cost: Only record paths that beat this cost (eg: the best from a previous search).
+            shared_best: Optional multiprocessing.Value shared by searches running in parallel. Our best cost is
+                published to it, and the search stops once any of them reaches cost_acceptance_thresh.
+            prefix: Cells already on the path before start (first cell first), eg: a subproblem created by split().
+                The search only explores paths that begin with prefix + [start].
+            prune: Skip branches that can no longer complete a full tour (see module notes).
+            bound: Skip branches that can't beat optimal_cost (see module notes).
+            symmetries: Transforms that leave the board unchanged (see Board.symmetries()). Moves that are mirror
+                images of each other, under a transform that also leaves the path so far in place, lead to mirror
+                image subtrees (same costs), so only the first of them (in heuristic order) is explored.
+            node_limit: Give up after expanding this many nodes (like time_allowed, but reproducible), eg: for
+                restarts (see restarts.py).
+            end: Cell index the path must end on (see module notes). By default, paths can end anywhere.
+        """
+        self.graph = graph
+        self.start = start
+        self.heuristic = heuristic
+        self.time_allowed = time_allowed
+        self.node_limit = node_limit
+        if cost_acceptance_thresh is None:
+            cost_acceptance_thresh = sum(cost for cost in graph.landing_costs if cost > 0)
+        self.cost_acceptance_thresh = cost_acceptance_thresh
+
+        self.adjacency = graph.adjacency()
+        self.landing_costs = list(graph.landing_costs)
+        self.visited = bytearray(graph.size)
+        self.degrees = array("i", [len(moves) if landing_cost >= 0 else -1
+                                   for moves, landing_cost in zip(self.adjacency, self.landing_costs)])
+        self.path = None  # the path being explored, while searching (for heuristics)
+        attach = getattr(getattr(heuristic, "__self__", heuristic), "attach", None)
+        if attach is not None:
+            attach(self)  # heuristics that read the search state as it changes (see LongestPathSearchHeuristics)
+
+        self.optimal_cost = optimal_cost
+        self.prefix = list(prefix)
+        self.optimal_path = self.prefix + [start]
+        self.nodes = 0
+        self.start_time = None
+        self.shared_best = shared_best
+        self._stop = False
+
+        self.complete = False  # whether the last run() explored every branch (rather than stopping early)
+
+        self.prune = prune
+        self.bound = bound
+        self.symmetries = list(symmetries or ())
+        self.mirrored = 0  # number of moves skipped, as mirror images of moves that were explored
+        self.pruned = 0  # number of nodes whose children were pruned (or cut by the bound)
+        # Best cost found by this search, or any search sharing shared_best
+        self._best_known = optimal_cost if shared_best is None else max(optimal_cost, shared_best.value)
+        # Unvisited cells reachable from start: counts, of degree 0 and 1, and costs, of all of them and of degree 0
+        self._zeros = self._ones = self._remaining = 0
+        self._remaining_cost = self._dead_cost = 0
+        self._seen = None
+        self._seen_stamp = 0
+
+        self.end = end
+        self.end_distances = None  # moves from each cell to end, on the empty board (-1: can't get there)
+        if end is not None:
+            self.end_distances = self._distances_to(end)
+            self._seen = array("i", [0]) * graph.size
+
+    def _sync_shared_best(self):
+        """
+        Publish our best cost to shared_best, and stop if another search has already found an acceptable path.
+        """
+        with self.shared_best.get_lock():
+            if self.optimal_cost > self.shared_best.value:
+                self.shared_best.value = self.optimal_cost
+            self._best_known = max(self._best_known, self.shared_best.value)
+            if self.shared_best.value >= self.cost_acceptance_thresh:
+                self._stop = True
+
+    def run(self):
+        """
+        Run the search. Results are stored in optimal_path/optimal_cost (only updated if the search beats the
+        optimal_cost it started with).
+
+        Matches Knight._find_longest_path_recursive(): on entering a node, its unvisited moves are sorted by the
+        heuristic, the degree of each is decremented (this node is no longer available to them), and the node's
+        landing cost is added. Leaving the node undoes all of that.
+        """
+        adjacency, landing_costs, visited, degrees = self.adjacency, self.landing_costs, self.visited, self.degrees
+        heuristic = self.heuristic
+        self.start_time = time.time()
+        deadline = self.start_time + self.time_allowed
+
+        cost = self._enter_prefix()
+        path = self.path = self.prefix + [self.start]
+        prune = self.prune or self.bound
+        if prune:
+            self._init_pruning()
+        stack = []  # frames: [moves to explore, index of next move, cost, moves entered (to undo)]
+        # Transforms that leave the path so far in place, for each frame from the root, for as long as there are any
+        groups = []
+        end = self.end
+        root_group = [perm for perm in self.symmetries
+                      if all(perm[cell] == cell for cell in path) and (end is None or perm[end] == end)]
+        best_len = 0  # if > 0, the best path is path[:best_len], and hasn't been copied into optimal_path yet
+        node_limit = self.node_limit if self.node_limit is not None else float("inf")
+
+        while True:
+            # ### Enter the node at the end of the path
+            if time.time() <= deadline and self.optimal_cost < self.cost_acceptance_thresh and not self._stop \
+                    and self.nodes < node_limit:
+                self.nodes += 1
+                if self.shared_best is not None and self.nodes % self.SHARED_SYNC_INTERVAL == 0:
+                    self._sync_shared_best()
+                curr = path[-1]
+
+                if end is not None and (curr == end or not self._end_reachable(path)):
+                    moves = []  # the path ends here, or can never get to end
+                else:
+                    moves = [move[1] for move in heuristic([(degrees[move], move) for move in adjacency[curr]
+                                                            if not visited[move]])]
+                if prune:
+                    moves = self._enter_pruned(path, moves, cost + landing_costs[curr])
+                else:
+                    for move in moves:
+                        degrees[move] -= 1
+
+                cost += landing_costs[curr]
+                visited[curr] = 1
+
+                if cost > self.optimal_cost and (end is None or curr == end):
+                    best_len = len(path)
+                    self.optimal_cost = cost
+                    if cost > self._best_known:
+                        self._best_known = cost
+
+                explore = moves
+                if root_group and len(groups) == len(stack):
+                    group = [perm for perm in groups[-1] if perm[curr] == curr] if stack else root_group
+                    if group:
+                        groups.append(group)
+                        explore = self._skip_mirrored(moves, group)
+                stack.append([explore, 0, cost, moves])
+            elif stack:
+                # This node returned immediately, so just step back to its parent
+                path.pop()
+            else:
+                break
+
+            # ### Take the next move of the deepest unfinished node, backtracking out of any finished ones
+            while stack:
+                frame = stack[-1]
+                moves, move_index, cost, entered = frame
+                if move_index < len(moves):
+                    frame[1] += 1
+                    path.append(moves[move_index])
+                    break
+
+                # Backtrack and cleanup
+                if len(path) == best_len:
+                    self.optimal_path = list(path)
+                    best_len = 0
+
+                if prune:
+                    self._exit_pruned(path[-1], entered)
+                else:
+                    for move in entered:
+                        degrees[move] += 1
+                visited[path.pop()] = 0
+                if len(groups) == len(stack):
+                    groups.pop()
+                stack.pop()
+
+            if not stack:
+                break
+
+        self.complete = time.time() <= deadline and self.optimal_cost < self.cost_acceptance_thresh \
+            and not self._stop and self.nodes < node_limit
+        self._exit_prefix()
+        if self.shared_best is not None:
+            self._sync_shared_best()
+
+    def _skip_mirrored(self, moves, group):
+        """
+        The moves worth exploring, given the transforms in group leave the path so far in place: the first move of
+        each set of mirror images.
+        """
+        explore = []
+        mirrored = set()
+        for move in moves:
+            if move not in mirrored:
+                explore.append(move)
+                mirrored.update(perm[move] for perm in group)
+        self.mirrored += len(moves) - len(explore)
+        return explore
+
+    def _init_pruning(self):
+        """
+        Count the unvisited cells reachable from start, and how many of them have degree 0 and 1 (and their costs).
+        """
+        adjacency, visited, degrees = self.adjacency, self.visited, self.degrees
+        counted = bytearray(len(visited))
+        counted[self.start] = 1
+        cells = [self.start]
+        queue = deque(cells)
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if not visited[move] and not counted[move]:
+                    counted[move] = 1
+                    cells.append(move)
+                    queue.append(move)
+
+        self._remaining = len(cells)
+        self._zeros = sum(1 for cell in cells if degrees[cell] == 0)
+        self._ones = sum(1 for cell in cells if degrees[cell] == 1)
+        self._remaining_cost = sum(self.landing_costs[cell] for cell in cells)
+        self._dead_cost = sum(self.landing_costs[cell] for cell in cells if degrees[cell] == 0)
+        self._seen = array("i", [0]) * len(visited)
+
+    def _enter_pruned(self, path, moves, cost):
+        """
+        Enter the node at the end of path, like run() does (decrementing the degree of its moves), keeping the
+        pruning counts up to date. cost includes the node's landing cost.
+        Returns moves, or no moves at all if the node is pruned.
+        """
+        degrees, landing_costs = self.degrees, self.landing_costs
+        curr = path[-1]
+
+        # curr is being visited, so it no longer counts
+        self._remaining -= 1
+        self._remaining_cost -= landing_costs[curr]
+        degree = degrees[curr]
+        if degree == 0:
+            self._zeros -= 1
+            self._dead_cost -= landing_costs[curr]
+        elif degree == 1:
+            self._ones -= 1
+
+        move_zeros = move_ones = move_zeros_cost = 0
+        for move in moves:
+            degree = degrees[move] - 1
+            degrees[move] = degree
+            if degree == 1:
+                self._ones += 1
+                move_ones += 1
+            elif degree == 0:
+                self._ones -= 1
+                self._zeros += 1
+                self._dead_cost += landing_costs[move]
+                move_zeros += 1
+                move_zeros_cost += landing_costs[move]
+
+        # Cells next to curr still have a way in (from curr), so only count those with no other way in
+        if self.bound and cost + self._remaining_cost - (self._dead_cost - move_zeros_cost) <= self._best_known:
+            pruned = True
+        elif self.prune:
+            dead_cells = self._zeros - move_zeros
+            dead_ends = move_zeros + self._ones - move_ones
+            pruned = (dead_cells > 0 or dead_ends > 1 or (move_zeros and self._remaining > 1)
+                      or (len(path) > 1 and not self._is_connected(path[-2], curr)))
+        else:
+            pruned = False
+
+        if pruned:
+            self.pruned += 1
+            self._increment_degrees(moves)
+            return []
+        return moves
+
+    def _exit_pruned(self, curr, moves):
+        """
+        Undo _enter_pruned().
+        """
+        self._increment_degrees(moves)
+        self._remaining += 1
+        self._remaining_cost += self.landing_costs[curr]
+        degree = self.degrees[curr]
+        if degree == 0:
+            self._zeros += 1
+            self._dead_cost += self.landing_costs[curr]
+        elif degree == 1:
+            self._ones += 1
+
+    def _increment_degrees(self, moves):
+        degrees = self.degrees
+        for move in moves:
+            degree = degrees[move] + 1
+            degrees[move] = degree
+            if degree == 1:
+                self._zeros -= 1
+                self._ones += 1
+                self._dead_cost -= self.landing_costs[move]
+            elif degree == 2:
+                self._ones -= 1
+
+    def _is_connected(self, prev, curr):
+        """
+        Whether every unvisited neighbor of prev can still be reached from curr, through unvisited cells.
+        (curr has not been marked visited yet.)
+
+        Bidirectional: a search from curr and one from the neighbor take turns expanding a cell, until they meet
+        (connected) or either one runs out of cells (cut off). That costs at most about twice the size of the
+        smaller side, so cutting off a small island is cheap to spot, even on a big board.
+        """
+        adjacency, visited, seen = self.adjacency, self.visited, self._seen
+        self._seen_stamp += 1
+        main = self._seen_stamp  # stamp of cells known to be connected to curr
+        connected = {main}
+
+        seen[curr] = main
+        main_queue, main_next = [curr], 0
+        for target in adjacency[prev]:
+            if visited[target] or seen[target] in connected:
+                continue
+
+            self._seen_stamp += 1
+            stamp = self._seen_stamp
+            seen[target] = stamp
+            queue, queue_next = [target], 0
+            met = False
+            while not met:
+                # Expand one cell of the search from the target
+                if queue_next == len(queue):
+                    return False
+                for move in adjacency[queue[queue_next]]:
+                    if visited[move] or seen[move] == stamp:
+                        continue
+                    if seen[move] in connected:
+                        met = True
+                        break
+                    seen[move] = stamp
+                    queue.append(move)
+                queue_next += 1
+                if met:
+                    break
+
+                # Expand one cell of the search from curr
+                if main_next == len(main_queue):
+                    return False
+                for move in adjacency[main_queue[main_next]]:
+                    if visited[move] or seen[move] == main:
+                        continue
+                    if seen[move] == stamp:
+                        met = True
+                    seen[move] = main
+                    main_queue.append(move)
+                main_next += 1
+            connected.add(stamp)
+        return True
+
+    def _distances_to(self, target):
+        """
+        Number of moves from every cell to target, on the empty board (-1 if there's no way there): a BFS out from
+        target, since every move can be made in both directions.
+        """
+        adjacency = self.adjacency
+        distances = array("i", [-1]) * self.graph.size
+        distances[target] = 0
+        queue = deque([target])
+        while queue:
+            curr = queue.popleft()
+            for move in adjacency[curr]:
+                if distances[move] < 0:
+                    distances[move] = distances[curr] + 1
+                    queue.append(move)
+        return distances
+
+    def _end_reachable(self, path):
+        """
+        Whether end can still be reached from the end of path, through unvisited cells. (The last cell on the path
+        has not been marked visited yet.)
+
+        Checked in order of cost: a move straight there, whether end has any unvisited neighbors left (its degree),
+        then whether the previous cell's removal split the graph at all (_is_connected(), which is usually settled
+        within a few cells). Only when it did is end searched for directly.
+        """
+        adjacency, end = self.adjacency, self.end
+        curr = path[-1]
+        if end in adjacency[curr]:
+            return True
+        if self.degrees[end] <= 0 or self.end_distances[curr] < 0:
+            return False
+        if len(path) > len(self.prefix) + 1 and self._is_connected(path[-2], curr):
+            return True  # end was reachable from the previous cell, and nothing has been cut off since
+        return self._search_end(curr)
+
+    def _search_end(self, curr):
+        """
+        Whether end can be reached from curr, through unvisited cells: best first, by distance to end (see
+        end_distances), so it usually heads straight there, and only covers the whole component when end is cut off.
+        """
+        adjacency, visited, seen, end_distances, end = self.adjacency, self.visited, self._seen, self.end_distances, \
+            self.end
+        self._seen_stamp += 1
+        stamp = self._seen_stamp
+        seen[curr] = stamp
+        frontier = [(end_distances[curr], curr)]
+        while frontier:
+            _, cell = heapq.heappop(frontier)
+            for move in adjacency[cell]:
+                if move == end:
+                    return True
+                if not visited[move] and seen[move] != stamp:
+                    seen[move] = stamp
+                    heapq.heappush(frontier, (end_distances[move], move))
+        return False
+
+    def _enter_prefix(self):
+        """
+        Walk the prefix, as if the search had entered each of its nodes. Returns the cost of the prefix.
+        The order the heuristic would have explored moves in doesn't matter here, since every unvisited move has
+        its degree decremented either way.
+        """
+        adjacency, landing_costs, visited, degrees = self.adjacency, self.landing_costs, self.visited, self.degrees
+        cost = 0
+        for curr in self.prefix:
+            for move in adjacency[curr]:
+                if not visited[move]:
+                    degrees[move] -= 1
+            cost += landing_costs[curr]
+            visited[curr] = 1
+        return cost
+
+    def _exit_prefix(self):
+        """
+        Undo _enter_prefix(), in reverse order.
+        """
+        adjacency, visited, degrees = self.adjacency, self.visited, self.degrees
+        for curr in reversed(self.prefix):
+            visited[curr] = 0
+            for move in adjacency[curr]:
+                if not visited[move]:
+                    degrees[move] += 1
+
+    def split(self, depth):
+        """
+        Split the search tree into independent subproblems, for searching in parallel (see parallel.py).
+
+        Enumerates the tree down to depth moves from start, in the order run() would explore it. Every path that
+        reaches that depth is returned as a subproblem: the last cell is the start of the subproblem, and the cells
+        before it are its prefix. Nodes above the split (including dead ends that never reach it) are expanded and
+        scored here, exactly as run() would, so running every subproblem covers the same tree, node for node.
+
+        Returns: List of paths (lists of cell indices), in heuristic priority order.
+        """
+        subproblems = []
+        cost = self._enter_prefix()
+        self.path = self.prefix + [self.start]
+        self._split(self.path, cost, len(self.prefix) + depth, subproblems)
+        self._exit_prefix()
+        return subproblems
+
+    def _split(self, path, cost, depth, subproblems):
+        if len(path) > depth:
+            subproblems.append(list(path))
+            return
+
+        adjacency, visited, degrees = self.adjacency, self.visited, self.degrees
+        self.nodes += 1
+        curr = path[-1]
+        moves = [move[1] for move in self.heuristic([(degrees[move], move) for move in adjacency[curr]
+                                                     if not visited[move]])]
+        for move in moves:
+            degrees[move] -= 1
+        cost += self.landing_costs[curr]
+        visited[curr] = 1
+
+        if cost > self.optimal_cost:
+            self.optimal_cost = cost
+            self.optimal_path = list(path)
+
+        for move in moves:
+            path.append(move)
+            self._split(path, cost, depth, subproblems)
+            path.pop()
+
+        for move in moves:
+            degrees[move] += 1
+        visited[curr] = 0
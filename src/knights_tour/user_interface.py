@@ -6,7 +6,6 @@ Future Improvements:
     - Add GUI
     - Formalize interface (or ABC)
 """
-import copy
 import abc
 
 from .grid_pos import GridPos
@@ -48,16 +47,15 @@ class TextUI(AbstractUI):
                 Too large a value may cause print to start wrapping.
         """
 
-        # build a new one, so we don't just create a reference and muck up the original
-        board = copy.deepcopy(board)
-        if pieces is not None:
-            for pos, val in pieces.items():
-                board.set_element(pos, val)
+        # Overlay pieces while printing, rather than copying the board and writing them into it
+        if pieces is None:
+            pieces = {}
 
         board_str = ""
         for row_index in range(board.get_height()):
             for col_index in range(board.get_width()):
-                element = board.get_value(GridPos(row_index, col_index))
+                pos = GridPos(row_index, col_index)
+                element = pieces[pos] if pos in pieces else board.get_value(pos)
                 board_str += '{:{width}}'.format(str(element)[:value_width], width=str(value_width+1))
 
             board_str = board_str[:-1]  # remove trailing ' '
@@ -128,8 +128,8 @@ def prompt5():
     print("\n\n\nThis problem reduces to the hamiltonian path problem, which is NP-complete, so we don't solve it. "
           "\nHowever, we can use some heuristics to improve on brute force in the simpler cases. We can also get "
           "\nsome high scores, even if we can't guarantee highest. These solutions don't force the endpoint to match."
-          "\nIn order to ensure that, you need to run plan_shortest_path(), and then continually pop entries off the end of the"
-          "path, until a solution is found. But it's a lot less interesting than this!")
+          "\nIn order to ensure that, pass constrain_end=True to find_longest_path_entry(), which only keeps paths that"
+          "\nend on the end position (and backtracks as soon as it's cut off from it).")
 
 if __name__ == '__main__':
     print("*"*50)
@@ -1,3 +1,4 @@
+import copy
 import unittest
 
 # local imports
@@ -5,7 +6,7 @@ from src.knights_tour.grid_pos import GridPos
 from src.knights_tour.pieces import Pieces
 
 # test target
-from src.knights_tour.board import Board
+from src.knights_tour.board import Board, CostLayer, ParentLayer
 
 # pylint: disable=protected-access
 class BoardTester(unittest.TestCase):
@@ -105,4 +106,121 @@ class BoardTester(unittest.TestCase):
 
         self.B._board_grid = self.board_ground_truth
         self.B.set_element(pos, value)
+        self.board_ground_truth[2][7] = value  # the board keeps its own storage, rather than a reference to the list
         self.assertEqual(self.board_ground_truth, self.B._board_grid)
+        self.assertEqual(self.B.get_value(pos), value)
+
+    def test_get_value__out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.B.get_value(GridPos(8, 0))
+        with self.assertRaises(IndexError):
+            self.B.get_value(GridPos(-1, 0))
+
+    def test_flat_index(self):
+        pos = GridPos(2, 1)
+        index = self.B.index(pos)
+        self.assertEqual(index, 2 * 8 + 1)
+        self.assertEqual(self.B.pos(index), pos)
+        self.assertEqual(self.B.get_value_at(index), Pieces.START.value)
+        self.assertEqual(self.B.values()[index], Pieces.START.value)
+
+    def test_copy(self):
+        board_copy = copy.deepcopy(self.B)
+        board_copy.set_element(GridPos(0, 0), Pieces.ROCK.value)
+        self.assertEqual(board_copy.get_value(GridPos(0, 0)), Pieces.ROCK.value)
+        self.assertEqual(self.B.get_value(GridPos(0, 0)), Pieces.EMPTY.value)
+
+    def test_version(self):
+        version = self.B.version
+        self.B.set_element(GridPos(0, 0), Pieces.ROCK.value)
+        self.assertGreater(self.B.version, version)
+
+    def test_cost_layer(self):
+        layer = CostLayer(7, 8)
+        self.assertIsNone(layer.get_value(GridPos(6, 7)))
+        layer.set_element(GridPos(6, 7), 12)
+        self.assertEqual(layer.get_value(GridPos(6, 7)), 12)
+        layer.reset_board()
+        self.assertIsNone(layer.get_value(GridPos(6, 7)))
+        self.assertEqual((layer.get_height(), layer.get_width()), (7, 8))
+
+    def test_parent_layer(self):
+        layer = ParentLayer(8, 8)
+        layer.set_element(GridPos(3, 2), GridPos(1, 1))
+        self.assertEqual(layer.get_value(GridPos(3, 2)), GridPos(1, 1))
+        layer_copy = copy.deepcopy(layer)
+        layer_copy.set_element(GridPos(3, 2), None)
+        self.assertIsNone(layer_copy.get_value(GridPos(3, 2)))
+        self.assertEqual(layer.get_value(GridPos(3, 2)), GridPos(1, 1))
+
+    def test_pos_interned(self):
+        self.assertIs(self.B.pos(17), self.B.pos(17))
+        self.assertIs(self.B.find_all_elements(Pieces.START.value)[0], self.B.pos(self.B.index(GridPos(2, 1))))
+
+    def test_grid_pos_packed_index(self):
+        pos = GridPos(3, 5)
+        self.assertEqual(pos.to_index(8), 29)
+        self.assertEqual(GridPos.from_index(29, 8), pos)
+        self.assertFalse(hasattr(pos, "__dict__"))  # __slots__
+
+    def test_symmetries(self):
+        self.assertEqual(self.B.symmetries(), [])  # S and E break every symmetry
+        self.B.reset_board(Pieces.EMPTY.value)
+        self.assertEqual(len(self.B.symmetries()), 7)  # all of D4, except the identity
+
+        # Only the diagonal reflection is left
+        self.B.set_element(GridPos(0, 0), Pieces.WATER.value)
+        self.B.set_element(GridPos(2, 5), Pieces.LAVA.value)
+        self.B.set_element(GridPos(5, 2), Pieces.LAVA.value)
+        symmetries = self.B.symmetries()
+        self.assertEqual(len(symmetries), 1)
+        self.assertEqual(symmetries[0][self.B.index(GridPos(1, 6))], self.B.index(GridPos(6, 1)))
+
+        # A rectangle can't be turned sideways
+        self.B._board_grid = [[Pieces.EMPTY.value] * 6 for _ in range(4)]
+        self.assertEqual(len(self.B.symmetries()), 3)
+
+    def test_piece_index(self):
+        """
+        find_all_elements is answered from the piece index, which must follow every edit.
+        """
+        def scan(value):
+            return [self.B.pos(index) for index, element in enumerate(self.B.values()) if element == value]
+
+        T = Pieces.TELEPORT.value
+        self.B.set_element(GridPos(7, 7), T)
+        self.B.set_element(GridPos(0, 3), T)
+        self.B.set_element(GridPos(2, 1), T)  # replaces the start
+        self.B.set_element(GridPos(0, 3), T)  # no change
+        board_copy = self.B.copy()
+        self.B.set_element(GridPos(7, 7), Pieces.EMPTY.value)
+        for value in [T, Pieces.START.value, Pieces.END.value, Pieces.EMPTY.value, Pieces.ROCK.value]:
+            self.assertEqual(self.B.find_all_elements(value), scan(value))
+        self.assertEqual(self.B.find_all_elements(T), [GridPos(0, 3), GridPos(2, 1)])
+        self.assertEqual(board_copy.find_all_elements(T), [GridPos(0, 3), GridPos(2, 1), GridPos(7, 7)])
+
+        self.B.reset_board(Pieces.WATER.value)
+        self.assertEqual(self.B.find_all_elements(T), [])
+        self.assertEqual(len(self.B.find_all_elements(Pieces.WATER.value)), 64)
+        self.B.set_element(GridPos(4, 4), Pieces.EMPTY.value)
+        self.assertEqual(self.B.find_all_elements(Pieces.EMPTY.value), [GridPos(4, 4)])
+
+    def test_edits_since(self):
+        version = self.B.version
+        self.assertEqual(self.B.edits_since(version), [])
+        self.B.set_element(GridPos(0, 1), Pieces.ROCK.value)
+        board_copy = self.B.copy()
+        self.B.set_element(GridPos(7, 7), Pieces.WATER.value)
+        self.B.set_element(GridPos(0, 1), Pieces.EMPTY.value)
+        self.assertEqual(self.B.edits_since(version), [1, 63, 1])
+        self.assertEqual(self.B.edits_since(version + 1), [63, 1])
+        self.assertEqual(board_copy.edits_since(version), [1])
+
+        self.B.reset_board(Pieces.EMPTY.value)
+        self.assertIsNone(self.B.edits_since(version))
+        self.assertEqual(self.B.edits_since(self.B.version), [])
+
+    def test_cell_flags(self):
+        flags = self.B.cell_flags([Pieces.START.value, Pieces.END.value, Pieces.LAVA.value])
+        self.assertEqual(len(flags), 64)
+        self.assertEqual([index for index, flag in enumerate(flags) if flag], [2 * 8 + 1, 4 * 8 + 5])
@@ -0,0 +1,95 @@
+import unittest
+
+from src.knights_tour.constructive import build_tour, closed_tour_exists, knight_tour_exists, _BlockSolver
+
+# pylint: disable=protected-access
+class ConstructiveTester(unittest.TestCase):
+    def assert_tour(self, height, width, start, tour):
+        """
+        Every cell exactly once, starting at start, and every step a knight's move. Closed, if the board has a closed
+        tour.
+        """
+        self.assertEqual(sorted(tour), list(range(height * width)))
+        self.assertEqual(tour[0], start[0] * width + start[1])
+        steps = list(zip(tour, tour[1:]))
+        if closed_tour_exists(height, width):
+            steps.append((tour[-1], tour[0]))
+        for curr, nxt in steps:
+            (row, col), (next_row, next_col) = divmod(curr, width), divmod(nxt, width)
+            self.assertEqual(sorted((abs(row - next_row), abs(col - next_col))), [1, 2])
+
+    def test_knight_tour_exists(self):
+        for height, width in [(1, 1), (3, 4), (3, 7), (4, 5), (5, 5), (8, 8), (4, 3), (1000, 1000)]:
+            self.assertTrue(knight_tour_exists(height, width))
+        for height, width in [(1, 2), (2, 8), (3, 3), (3, 5), (3, 6), (4, 4), (6, 3)]:
+            self.assertFalse(knight_tour_exists(height, width))
+
+    def test_closed_tour_exists(self):
+        for height, width in [(3, 10), (5, 6), (6, 6), (8, 8), (7, 12), (1000, 1000), (999, 1000)]:
+            self.assertTrue(closed_tour_exists(height, width))
+        for height, width in [(1, 1), (3, 4), (8, 3), (4, 100), (5, 5), (999, 999), (2, 10)]:
+            self.assertFalse(closed_tour_exists(height, width))
+
+    def test_knight_tour_exists__start(self):
+        self.assertTrue(knight_tour_exists(5, 5, (0, 0)))
+        self.assertFalse(knight_tour_exists(5, 5, (0, 1)))  # minority color, on an odd number of cells
+        self.assertTrue(knight_tour_exists(8, 8, (0, 1)))
+        self.assertTrue(knight_tour_exists(4, 5, (3, 2)))
+        self.assertFalse(knight_tour_exists(4, 5, (1, 2)))  # inner rows of 4 x n
+        self.assertFalse(knight_tour_exists(6, 4, (2, 1)))
+
+    def test_build_tour(self):
+        """
+        Corner starts on every board up to 20x20 that has a tour (blocks, strips, and single blocks). The block tours
+        are shared between boards, as they would be on a single large board.
+        """
+        solver = _BlockSolver()
+        for height in range(1, 21):
+            for width in range(1, 21):
+                for start in [(0, 0), (height - 1, width - 1)]:
+                    if knight_tour_exists(height, width, start):
+                        self.assert_tour(height, width, start, build_tour(height, width, start, solver))
+
+    def test_build_tour__starts(self):
+        """
+        Every start on every board up to 10x10. The only starts without a tour are on 3 x n boards, which the
+        existence conditions don't catch.
+        """
+        solver = _BlockSolver()
+        no_tour = {(3, 4): [(0, 1), (0, 2), (1, 1), (1, 2), (2, 1), (2, 2)], (3, 7): [(1, 3)], (3, 8): [(1, 2), (1, 5)]}
+        for height in range(1, 11):
+            for width in range(1, 11):
+                starts = no_tour.get((height, width), [])
+                starts += [start[::-1] for start in no_tour.get((width, height), [])]
+                for row in range(height):
+                    for col in range(width):
+                        if not knight_tour_exists(height, width, (row, col)):
+                            continue
+                        if (row, col) in starts:
+                            with self.assertRaises(ValueError):
+                                build_tour(height, width, (row, col), solver)
+                        else:
+                            self.assert_tour(height, width, (row, col), build_tour(height, width, (row, col), solver))
+
+    def test_build_tour__strips(self):
+        """
+        Starts anywhere along 3 x n and 4 x n strips, including the ones in the middle, which sweep out and back.
+        """
+        for height, width in [(3, 8), (3, 31), (4, 30), (3, 40), (31, 4)]:
+            for row in range(height):
+                for col in range(width):
+                    if knight_tour_exists(height, width, (row, col)) and (height, width, row) != (3, 8, 1):
+                        self.assert_tour(height, width, (row, col), build_tour(height, width, (row, col)))
+
+    def test_build_tour__large(self):
+        for height, width, start in [(500, 400, (0, 0)), (1000, 1000, (500, 500)), (301, 299, (150, 148)),
+                                     (3, 2000, (1, 999)), (3, 2001, (0, 1000)), (2001, 4, (1000, 3))]:
+            self.assert_tour(height, width, start, build_tour(height, width, start))
+
+    def test_build_tour__no_tour(self):
+        with self.assertRaises(ValueError):
+            build_tour(4, 4, (0, 0))
+        with self.assertRaises(ValueError):
+            build_tour(5, 5, (0, 1))
+        with self.assertRaises(ValueError):
+            build_tour(3, 4, (1, 1))  # the board has a tour, but not from here
@@ -69,11 +69,39 @@ class GameEngineTester(unittest.TestCase):
         """
         Verify that a poorly formed board is detected.
         """
-        teleport_in = [11, 26]
+        teleport_in = GridPos(11, 26)
         self.game_engine = GameEngine(Board("Boards/32x32_board.txt"))
-        self.game_engine.board._board_grid[15][20] = Pieces.TELEPORT.value
-        with self.assertRaises(Exception):
-            self.game_engine.teleport(teleport_in)
+        self.game_engine.board.set_element(GridPos(15, 20), Pieces.TELEPORT.value)
+        with self.assertRaises(ValueError):
+            self.game_engine.teleport(teleport_in)  # 2 exits: teleport() only handles pairs
+
+    def test_teleport_exits__networks(self):
+        """
+        Teleports jump to every other teleport in their own network ('T' and 'T<id>'), and nowhere else.
+        """
+        board = self.game_engine.board
+        board.reset_board(Pieces.EMPTY.value)
+        network_1 = [GridPos(0, 0), GridPos(3, 3), GridPos(7, 2)]
+        network_2 = [GridPos(0, 7), GridPos(5, 5)]
+        for pos in network_1:
+            board.set_element(pos, "T1")
+        for pos in network_2:
+            board.set_element(pos, "T2")
+        board.set_element(GridPos(6, 6), "T3")  # alone: leads nowhere
+
+        self.assertEqual(self.game_engine.teleport_exits(GridPos(3, 3)), [GridPos(0, 0), GridPos(7, 2)])
+        self.assertEqual(self.game_engine.teleport_exits(GridPos(5, 5)), [GridPos(0, 7)])
+        self.assertEqual(self.game_engine.teleport(GridPos(5, 5)), GridPos(0, 7))
+        self.assertEqual(self.game_engine.teleport_exits(GridPos(6, 6)), [])
+        self.assertEqual(self.game_engine.teleport_exits(GridPos(1, 1)), [])
+        self.assertEqual(self.game_engine.get_cost("T2"), self.game_engine.get_cost(Pieces.TELEPORT.value))
+        self.assertEqual(self.game_engine.get_possible_moves(GridPos(3, 3)),
+                         [GridPos(1, 2), GridPos(1, 4), GridPos(2, 1), GridPos(2, 5), GridPos(4, 1), GridPos(4, 5),
+                          GridPos(5, 2), GridPos(5, 4), GridPos(0, 0), GridPos(7, 2)])
+
+        # Edits are picked up (the table is recompiled when the board changes)
+        board.set_element(GridPos(0, 0), Pieces.EMPTY.value)
+        self.assertEqual(self.game_engine.teleport_exits(GridPos(3, 3)), [GridPos(7, 2)])
 
     def test_validate_within_bounds(self):
         self.assertTrue(self.game_engine.validate_within_bounds(GridPos(0, 0)))
@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from src.knights_tour.board import Board
+from src.knights_tour.gameengine import GameEngine
+from src.knights_tour.grid_pos import GridPos
+from src.knights_tour.knight import Knight
+from src.knights_tour.pieces import Pieces
+
+# test target
+from src.knights_tour.incremental import IncrementalPlanner
+
+
+class IncrementalPlannerTester(unittest.TestCase):
+    def assert_matches_astar(self, knight):
+        """
+        The route must be legal, and cost the same as a fresh A* plan of the same board.
+        """
+        board = knight.game_engine.board
+        fresh = Knight(GameEngine(board.copy(), staircase=knight.game_engine.staircase), start_pos=knight.start_pos, end_pos=knight.end_pos)
+        fresh.plan_shortest_path_astar()
+        expected_cost = fresh.cost_map.get_value(knight.end_pos)
+        self.assertEqual(knight.cost_map.get_value(knight.end_pos), expected_cost)
+        if expected_cost is None:
+            return
+
+        path = knight.reconstruct_path()
+        self.assertEqual(path[0], knight.start_pos)
+        self.assertEqual(path[-1], knight.end_pos)
+        path_cost = 0
+        for prev_pos, pos in zip(path, path[1:]):
+            self.assertIn(pos, knight.game_engine.get_possible_moves(prev_pos))
+            path_cost += knight.game_engine.get_cost(board.get_value(pos))
+        self.assertEqual(path_cost, expected_cost)
+
+    def test_replan_after_edits(self):
+        """
+        Edits of every kind (costs going up and down, barriers, rocks, teleports coming and going), a few at a time.
+        """
+        rng = random.Random(0)
+        values = [Pieces.EMPTY.value, Pieces.WATER.value, Pieces.LAVA.value, Pieces.BARRIER.value, Pieces.ROCK.value,
+                  "T", "T1", "T2"]
+        for staircase in [False, True]:
+            knight = Knight(GameEngine(Board("Boards/32x32_board.txt"), staircase=staircase),
+                            start_pos=GridPos(2, 2), end_pos=GridPos(29, 28))
+            board = knight.game_engine.board
+            knight.plan_shortest_path_incremental()
+            self.assert_matches_astar(knight)
+            planner = knight.incremental_planner
+            for _ in range(25):
+                for _ in range(rng.randint(1, 6)):
+                    pos = GridPos(rng.randrange(32), rng.randrange(32))
+                    if pos not in (knight.start_pos, knight.end_pos):
+                        board.set_element(pos, rng.choice(values))
+                knight.plan_shortest_path_incremental()
+                self.assertIs(knight.incremental_planner, planner)
+                self.assert_matches_astar(knight)
+
+    def test_replan_on_route(self):
+        """
+        Lava along the route forces a detour, and a wall of rocks cuts end_pos off (until it's taken down again).
+        """
+        board = Board("Boards/8x8_board.txt")
+        board.reset_board(Pieces.EMPTY.value)
+        knight = Knight(GameEngine(board), start_pos=GridPos(0, 0), end_pos=GridPos(7, 7))
+        knight.plan_shortest_path_incremental()
+        self.assertEqual(knight.cost_map.get_value(knight.end_pos), 6)
+
+        for pos in knight.reconstruct_path()[1:-1]:
+            board.set_element(pos, Pieces.LAVA.value)
+        knight.plan_shortest_path_incremental()
+        self.assert_matches_astar(knight)
+
+        # Walled off: no route at all, until the wall comes down again
+        walls = [GridPos(row, col) for row in range(8) for col in range(3, 5)]
+        for pos in walls:
+            board.set_element(pos, Pieces.ROCK.value)
+        knight.plan_shortest_path_incremental()
+        self.assertIsNone(knight.incremental_planner.cost)
+        self.assertIsNone(knight.cost_map.get_value(knight.end_pos))
+        for pos in walls:
+            board.set_element(pos, Pieces.EMPTY.value)
+        knight.plan_shortest_path_incremental()
+        self.assert_matches_astar(knight)
+
+    def test_small_edit_expands_less(self):
+        game_engine = GameEngine(Board("Boards/32x32_board.txt"))
+        planner = IncrementalPlanner(game_engine, GridPos(2, 2), GridPos(29, 28))
+        planner.replan()
+        initial_expanded = planner.expanded_nodes
+
+        planner.replan()
+        self.assertEqual(planner.expanded_nodes, 0)  # nothing changed
+
+        route = planner.route()
+        game_engine.board.set_element(game_engine.board.pos(route[len(route) // 2]), Pieces.LAVA.value)
+        planner.replan()
+        self.assertLess(planner.expanded_nodes, initial_expanded)
+
+    def test_new_planner_when_start_changes(self):
+        knight = Knight(GameEngine(Board("Boards/32x32_board.txt")), start_pos=GridPos(2, 2), end_pos=GridPos(29, 28))
+        knight.plan_shortest_path_incremental()
+        planner = knight.incremental_planner
+        knight.start_pos = GridPos(3, 3)
+        knight.plan_shortest_path_incremental()
+        self.assertIsNot(knight.incremental_planner, planner)
+        self.assert_matches_astar(knight)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import copy
 
@@ -9,6 +11,9 @@ from src.knights_tour.grid_pos import GridPos
 from src.knights_tour.gameengine import GameEngine
 from src.knights_tour.board import Board
 from src.knights_tour.user_interface import UI
+from src.knights_tour.heuristics import knight_distance
+from src.knights_tour.heuristics import LongestPathSearchHeuristics as Heuristics, RegionHeuristic
+from src.knights_tour.restarts import luby
 
 # pylint: disable=protected-access
 class KnightTester(unittest.TestCase):
@@ -125,4 +130,552 @@ class KnightTester(unittest.TestCase):
         self.k.plan_shortest_path()
         # path = self.k.reconstruct_path()
         # for step in path:
-        #     my_str = "Cost: %i \t" % self.k.cost_map.get_piece(step)
\ No newline at end of file
+        #     my_str = "Cost: %i \t" % self.k.cost_map.get_piece(step)
+
+    def test_plan_shortest_path_dijkstra__matches_flood(self):
+        """
+        Dijkstra (heap and bucket queue) must find the same lowest cost as the flood-fill planner.
+        """
+        for board_path in ["Boards/32x32_board.txt", "Boards/32x32_board_mod.txt"]:
+            for end_pos in [GridPos(31, 31), GridPos(30, 2), GridPos(5, 20)]:
+                flood = Knight(GameEngine(Board(board_path)), start_pos=GridPos(2, 2), end_pos=end_pos)
+                flood.plan_shortest_path()
+                expected_cost = flood.cost_map.get_value(end_pos)
+
+                for bucket_queue in [False, True]:
+                    self.k = Knight(GameEngine(Board(board_path)), start_pos=GridPos(2, 2), end_pos=end_pos)
+                    self.k.plan_shortest_path_dijkstra(bucket_queue=bucket_queue)
+                    self.assertEqual(self.k.cost_map.get_value(end_pos), expected_cost)
+
+                    path = self.k.reconstruct_path()
+                    self.assertEqual(path[0], GridPos(2, 2))
+                    self.assertEqual(path[-1], end_pos)
+                    for prev_pos, pos in zip(path, path[1:]):  # includes teleports, unlike validate_pos_sequence
+                        self.assertIn(pos, self.k.game_engine.get_possible_moves(prev_pos))
+
+    def test_plan_shortest_path_dijkstra__early_exit(self):
+        """
+        Positions more expensive than end_pos should never be reached.
+        """
+        self.k = Knight(GameEngine(Board("Boards/32x32_board.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(2, 1))
+        self.k.plan_shortest_path_dijkstra()
+        self.assertEqual(self.k.cost_map.get_value(GridPos(2, 1)), 1)
+        self.assertIsNone(self.k.cost_map.get_value(GridPos(31, 31)))
+
+    def test_plan_shortest_path_astar__matches_dijkstra(self):
+        """
+        A* must find the same lowest cost (including routes through the teleports), while expanding fewer nodes.
+        """
+        for board_path in ["Boards/32x32_board.txt", "Boards/32x32_board_mod.txt"]:
+            for end_pos in [GridPos(31, 31), GridPos(30, 2), GridPos(5, 20), GridPos(23, 27)]:
+                dijkstra = Knight(GameEngine(Board(board_path)), start_pos=GridPos(2, 2), end_pos=end_pos)
+                dijkstra.plan_shortest_path_dijkstra()
+
+                self.k = Knight(GameEngine(Board(board_path)), start_pos=GridPos(2, 2), end_pos=end_pos)
+                self.k.plan_shortest_path_astar()
+                self.assertEqual(self.k.cost_map.get_value(end_pos), dijkstra.cost_map.get_value(end_pos))
+                self.assertLessEqual(self.k.expanded_nodes, dijkstra.expanded_nodes)
+                self.assertEqual(self.k.reconstruct_path()[-1], end_pos)
+
+    def test_plan_shortest_path_astar__near_on_huge_board(self):
+        """
+        Between nearby cells of a 1024x1024 board, A* expands a handful of nodes, and never compiles the MoveGraph
+        (O(board size)), before or after an edit.
+        """
+        board = self.open_board(1024, 1024)
+        end_pos = GridPos(516, 518)
+        self.k = Knight(GameEngine(board), start_pos=GridPos(512, 512), end_pos=end_pos)
+        for edit in [None, GridPos(0, 0)]:
+            if edit is not None:
+                board.set_element(edit, "B")
+            self.k.plan_shortest_path_astar()
+            self.assertEqual(self.k.cost_map.get_value(end_pos), knight_distance(4, 6))
+            self.assertLess(self.k.expanded_nodes, 10)
+            self.assertIsNone(self.k.game_engine._move_graph)
+
+    def test_plan_shortest_path__teleport_networks(self):
+        """
+        With several teleport networks ('T<id>', of 1 to 6 teleports) on top of the board's own pair, the planners
+        that route teleports through a hub per network must match the flood-fill planner, which takes every exit.
+        """
+        board = Board("Boards/32x32_board.txt")
+        empty_cells = board.find_all_elements(".")
+        for network in range(1, 7):
+            for pos in empty_cells[network * 11::130][:network]:  # spread over the board
+                board.set_element(pos, f"T{network}")
+
+        for end_pos in [GridPos(31, 31), GridPos(30, 2), GridPos(5, 20), GridPos(23, 27)]:
+            flood = Knight(GameEngine(board.copy()), start_pos=GridPos(2, 2), end_pos=end_pos)
+            flood.plan_shortest_path()
+            expected_cost = flood.cost_map.get_value(end_pos)
+
+            for plan in [lambda knight: knight.plan_shortest_path_dijkstra(),
+                         lambda knight: knight.plan_shortest_path_dijkstra(bucket_queue=True),
+                         lambda knight: knight.plan_shortest_path_astar()]:
+                self.k = Knight(GameEngine(board.copy()), start_pos=GridPos(2, 2), end_pos=end_pos)
+                plan(self.k)
+                self.assertEqual(self.k.cost_map.get_value(end_pos), expected_cost)
+
+                path = self.k.reconstruct_path()
+                self.assertEqual(path[0], GridPos(2, 2))
+                self.assertEqual(path[-1], end_pos)
+                path_cost = 0
+                for prev_pos, pos in zip(path, path[1:]):  # includes teleports, unlike validate_pos_sequence
+                    self.assertIn(pos, self.k.game_engine.get_possible_moves(prev_pos))
+                    path_cost += self.k.game_engine.get_cost(board.get_value(pos))
+                self.assertEqual(path_cost, expected_cost)
+
+    def test_knight_distance(self):
+        """
+        Compare the closed form knight distance against a breadth first search on an open board.
+        """
+        size, center = 41, 20
+        distances = {GridPos(center, center): 0}
+        active_list = [GridPos(center, center)]
+        moves = [GridPos(dx, dy) for dx, dy in [(1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1)]]
+        while active_list:
+            pos = active_list.pop(0)
+            for move in moves:
+                new_pos = pos + move
+                if 0 <= new_pos.x < size and 0 <= new_pos.y < size and new_pos not in distances:
+                    distances[new_pos] = distances[pos] + 1
+                    active_list.append(new_pos)
+
+        # Stay away from the edges, where the finite board makes some routes longer
+        for x in range(center - 10, center + 11):
+            for y in range(center - 10, center + 11):
+                self.assertEqual(knight_distance(x - center, y - center), distances[GridPos(x, y)])
+
+    @staticmethod
+    def open_board(height, width):
+        """
+        Board of any size, with no obstacles.
+        """
+        board = Board("Boards/8x8_board.txt")
+        board._board_grid = [["."] * width for _ in range(height)]
+        return board
+
+    def test_find_longest_path_iterative__matches_recursive(self):
+        """
+        Exhaustive searches (unreachable threshold) must give identical results with and without recursion.
+        """
+        for heuristic in [Heuristics().identity_heuristic,
+                          Heuristics().dense_search_heuristic,
+                          Heuristics().sparse_search_heuristic]:
+            results = []
+            for recursive in [True, False]:
+                self.k = Knight(GameEngine(self.open_board(3, 4)), start_pos=GridPos(0, 0), end_pos=GridPos(2, 3))
+                self.k.find_longest_path_entry(time_allowed=60, heuristic=heuristic, cost_acceptance_thresh=1000,
+                                               recursive=recursive)
+                results.append((self.k.optimal_cost, self.k.optimal_path))
+                self.assertEqual(self.k.game_engine.board._board_grid, [["."] * 4] * 3)  # board restored
+            self.assertEqual(results[0], results[1])
+
+    def test_find_longest_path_iterative__deep_path(self):
+        """
+        A full tour of a 32x32 board is deeper than python's recursion limit.
+        """
+        self.k = Knight(GameEngine(self.open_board(32, 32)), start_pos=GridPos(0, 0), end_pos=GridPos(31, 31))
+        self.k.find_longest_path_entry(time_allowed=30, heuristic=Heuristics().dense_search_heuristic)
+        self.assertEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+        self.assertEqual(len(set(self.k.optimal_path)), len(self.k.optimal_path))
+
+    def test_find_longest_path__board_not_modified(self):
+        """
+        The search core keeps visited positions to itself, so the board isn't edited (not even temporarily).
+        """
+        version = self.k.game_engine.board.version
+        self.k.find_longest_path_entry(time_allowed=5, heuristic=Heuristics().dense_search_heuristic)
+        self.assertEqual(self.k.game_engine.board.version, version)
+        self.assertGreater(self.k.nodes_expanded, 0)
+
+    def test_find_longest_path__matches_recursive_with_teleports(self):
+        """
+        Stop both searches at the same cost threshold on a board with barriers, rocks, lava, water and teleports.
+        """
+        results = []
+        for recursive in [True, False]:
+            self.k = Knight(GameEngine(Board("Boards/32x32_board_mod.txt")), start_pos=GridPos(6, 13),
+                            end_pos=GridPos(30, 30))
+            self.k.find_longest_path_entry(time_allowed=30, heuristic=Heuristics().dense_search_heuristic,
+                                           cost_acceptance_thresh=300, recursive=recursive)
+            results.append((self.k.optimal_cost, self.k.optimal_path))
+        self.assertEqual(results[0], results[1])
+
+    def test_find_longest_path_portfolio(self):
+        self.k.find_longest_path_portfolio(time_allowed=10, max_workers=2,
+                                           portfolio=[("dense_search_heuristic", None),
+                                                      ("random_search_heuristic", 3)])
+        self.assertEqual(len(self.k.portfolio_results), 2)
+        self.assertEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)  # dense finds a full tour on 8x8
+        self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+        self.assertEqual(len(set(self.k.optimal_path)), len(self.k.optimal_path))
+
+    def test_find_longest_path_split__matches_iterative(self):
+        """
+        An exhaustive split search covers the same tree as the single process search, node for node.
+        """
+        results = []
+        for split in [False, True]:
+            self.k = Knight(GameEngine(self.open_board(3, 4)), start_pos=GridPos(0, 0), end_pos=GridPos(2, 3))
+            if split:
+                self.k.find_longest_path_split(time_allowed=60, heuristic_name="dense_search_heuristic",
+                                               split_depth=3, max_workers=2, cost_acceptance_thresh=1000)
+                self.assertGreater(sum(self.k.worker_nodes.values()), 0)
+            else:
+                self.k.find_longest_path_entry(time_allowed=60, heuristic=Heuristics().dense_search_heuristic,
+                                               cost_acceptance_thresh=1000)
+            results.append((self.k.optimal_cost, self.k.optimal_path, self.k.nodes_expanded))
+        self.assertEqual(results[0], results[1])
+
+    def test_find_longest_path_entry__prune(self):
+        """
+        Pruning dead ends and islands finds the same full tour with far fewer nodes.
+        """
+        nodes = []
+        for prune in [False, True]:
+            self.k = Knight(GameEngine(self.open_board(6, 6)), start_pos=GridPos(0, 0), end_pos=GridPos(5, 5))
+            self.k.find_longest_path_entry(time_allowed=60, prune=prune)
+            self.assertEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)
+            self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+            nodes.append(self.k.nodes_expanded)
+        self.assertLess(nodes[1], nodes[0] / 10)
+
+    def test_find_longest_path_entry__prune_finds_tours(self):
+        """
+        Pruning only skips branches that can't complete a full tour, so an exhaustive search still finds one from
+        every start that has one (and none from those that don't). A full tour of 5x5 costs 25, since the start is '.'.
+        """
+        for start in [GridPos(0, 0), GridPos(1, 1), GridPos(2, 2), GridPos(1, 2)]:
+            found = []
+            for prune in [False, True]:
+                self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=start, end_pos=GridPos(4, 4))
+                self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=25, prune=prune)
+                found.append(self.k.optimal_cost == 25)
+            self.assertEqual(found[0], found[1])
+
+    def test_find_longest_path_entry__prune_recursive(self):
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_entry(prune=True, recursive=True)
+
+    def test_find_longest_path_entry__bound(self):
+        """
+        Branch and bound finds the same optimal cost as an exhaustive search, in fewer nodes, on a weighted board.
+        """
+        grid = [[".", "W", ".", "L", "."],
+                ["L", ".", "B", ".", "W"],
+                [".", ".", "W", ".", "."],
+                ["W", "L", ".", ".", "L"],
+                [".", ".", ".", "W", "."]]
+        results = []
+        for bound in [False, True]:
+            self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+            self.k.game_engine.board._board_grid = grid
+            self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, bound=bound)
+            self.assertTrue(self.k.optimal_proven)
+            self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+            results.append((self.k.optimal_cost, self.k.nodes_expanded))
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertLess(results[1][1], results[0][1])
+
+    def test_find_tour_constructive(self):
+        self.k.find_tour_constructive()
+        self.assertEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)
+        self.assertTrue(self.k.optimal_proven)
+        self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+        self.assertEqual(len(set(self.k.optimal_path)), 64)
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+        # Any start: 8x8 has a closed tour, which is walked from the start
+        self.k = Knight(GameEngine(self.open_board(8, 8)), start_pos=GridPos(4, 3), end_pos=GridPos(0, 0))
+        self.k.find_tour_constructive()
+        self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path + [self.k.start_pos]))
+
+    def test_find_tour_constructive__no_tour(self):
+        self.k = Knight(GameEngine(self.open_board(3, 3)), start_pos=GridPos(0, 0), end_pos=GridPos(2, 2))
+        with self.assertRaises(ValueError):
+            self.k.find_tour_constructive()
+        self.k = Knight(GameEngine(Board("Boards/32x32_board.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(31, 31))
+        with self.assertRaises(ValueError):
+            self.k.find_tour_constructive()  # barriers, rocks and teleports
+
+    def test_find_tour_constructive__matches_search(self):
+        """
+        Same cost as a full tour found by searching, on a weighted board.
+        """
+        grid = [[".", "W", ".", "L", "."],
+                ["L", ".", "W", ".", "W"],
+                [".", ".", "W", ".", "."],
+                ["W", "L", ".", ".", "L"],
+                [".", ".", ".", "W", "."]]
+        costs = []
+        for constructive in [False, True]:
+            self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+            self.k.game_engine.board._board_grid = grid
+            if constructive:
+                self.k.find_tour_constructive()
+            else:
+                self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, prune=True)
+            costs.append(self.k.optimal_cost)
+        self.assertEqual(costs[0], costs[1])
+
+    def test_find_longest_path_exact(self):
+        """
+        The exact search proves the same optimum as an exhaustive branch and bound search, and caches it.
+        """
+        grid = [[".", "W", ".", "L", "."],
+                ["L", ".", "B", ".", "W"],
+                [".", ".", "W", ".", "."],
+                ["W", "L", ".", ".", "L"],
+                [".", ".", ".", "W", "."]]
+        self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+        self.k.game_engine.board._board_grid = grid
+        self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, bound=True)
+        expected = self.k.optimal_cost
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "exact_cache.json")
+            for cached in [False, True]:
+                self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+                self.k.game_engine.board._board_grid = grid
+                self.k.find_longest_path_exact(cache_path=cache_path)
+                self.assertEqual(self.k.optimal_cost, expected)
+                self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+                self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+                self.assertEqual(len(set(self.k.optimal_path)), len(self.k.optimal_path))
+                if cached:
+                    self.assertEqual(self.k.nodes_expanded, 0)
+                else:
+                    self.assertGreater(self.k.nodes_expanded, 0)
+
+        # Without a cache_path, nothing is kept: the same board is searched again
+        for _ in range(2):
+            self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+            self.k.game_engine.board._board_grid = grid
+            self.k.find_longest_path_exact()
+            self.assertEqual(self.k.optimal_cost, expected)
+            self.assertGreater(self.k.nodes_expanded, 0)
+
+    def test_find_longest_path_exact__too_many_cells(self):
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_exact()
+
+    def test_find_longest_path_entry__symmetry(self):
+        """
+        From the center of an open 5x5 board, all 8 first moves are mirror images of each other: the same tour, from
+        an eighth of the nodes.
+        """
+        results = []
+        for symmetry in [False, True]:
+            self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(2, 2), end_pos=GridPos(4, 4))
+            self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, symmetry=symmetry)
+            self.assertTrue(self.k.optimal_proven)
+            self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+            results.append((self.k.optimal_cost, self.k.nodes_expanded))
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertLess(results[1][1], results[0][1] / 7)
+
+    def test_find_longest_path_exact__symmetric_cache(self):
+        """
+        A reflected board (and start) finds the cached result of the original.
+        """
+        grid = [[".", "W", ".", "L"],
+                ["L", ".", "B", "."],
+                [".", ".", "W", "."],
+                ["W", "L", ".", "."],
+                [".", ".", ".", "W"]]
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "exact_cache.json")
+            results = []
+            for reflect in [False, True]:
+                start = GridPos(0, 3) if reflect else GridPos(0, 0)
+                self.k = Knight(GameEngine(self.open_board(5, 4)), start_pos=start, end_pos=GridPos(4, 3))
+                self.k.game_engine.board._board_grid = [row[::-1] for row in grid] if reflect else grid
+                self.k.find_longest_path_exact(cache_path=cache_path)
+                self.assertEqual(self.k.optimal_path[0], start)
+                self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+                results.append((self.k.optimal_cost, self.k.nodes_expanded))
+            self.assertEqual(results[0][0], results[1][0])
+            self.assertEqual(results[1][1], 0)
+
+    def test_find_longest_path_entry__extend(self):
+        """
+        The identity heuristic times out far short of the 920 cells reachable on the 32x32 board; rotations collect
+        the rest (some through the teleports). The path is still valid, from the start, and its cost is counted like
+        the search's.
+        """
+        self.k = Knight(GameEngine(Board("Boards/32x32_board.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(31, 31))
+        self.k.find_longest_path_entry(time_allowed=3, heuristic=Heuristics().identity_heuristic, extend_time=2)
+        self.assertGreater(self.k.cells_gained, 0)
+        self.assertEqual(len(self.k.optimal_path), 920)
+        self.assertEqual(len(set(self.k.optimal_path)), len(self.k.optimal_path))
+        self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+        for prev_pos, pos in zip(self.k.optimal_path, self.k.optimal_path[1:]):  # includes teleports
+            self.assertIn(pos, self.k.game_engine.get_possible_moves(prev_pos))
+        graph = self.k.game_engine.get_move_graph()
+        self.assertEqual(self.k.optimal_cost, sum(graph.landing_costs[graph.index(pos)] for pos in self.k.optimal_path))
+
+    def test_extend_longest_path__from_start(self):
+        self.k = Knight(GameEngine(self.open_board(10, 10)), start_pos=GridPos(0, 0), end_pos=GridPos(9, 9))
+        self.assertEqual(self.k.extend_longest_path(time_allowed=5, seed=0), 99)
+        self.assertEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_beam(self):
+        for size in [5, 8, 10]:
+            self.k = Knight(GameEngine(self.open_board(size, size)), start_pos=GridPos(0, 0), end_pos=GridPos(1, 1))
+            self.k.find_longest_path_beam(width=4, cost_acceptance_thresh=size * size)
+            self.assertEqual(self.k.optimal_cost, size * size)
+            self.assertEqual(len(set(self.k.optimal_path)), size * size)
+            self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_beam__irregular(self):
+        """
+        Beam search runs to completion on 32x32_board_mod.txt, well beyond where the depth first search gets stuck.
+        """
+        self.k = Knight(GameEngine(Board("Boards/32x32_board_mod.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+        self.k.find_longest_path_beam(width=16, cost_acceptance_thresh=10 ** 6)
+        self.assertGreater(self.k.optimal_cost, 1100)
+        self.assertEqual(self.k.optimal_path[0], self.k.start_pos)
+        self.assertEqual(len(set(self.k.optimal_path)), len(self.k.optimal_path))
+        for prev_pos, pos in zip(self.k.optimal_path, self.k.optimal_path[1:]):  # includes teleports
+            self.assertIn(pos, self.k.game_engine.get_possible_moves(prev_pos))
+        graph = self.k.game_engine.get_move_graph()
+        self.assertEqual(self.k.optimal_cost, sum(graph.landing_costs[graph.index(pos)] for pos in self.k.optimal_path))
+
+    def test_luby(self):
+        self.assertEqual([luby(index) for index in range(1, 16)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+    def test_find_longest_path_restarts(self):
+        """
+        A single dense search from (0, 0) on the 32x32 board is stuck well short of cost_acceptance_thresh for its
+        whole time_allowed. Restarts get there, and the same seed gets the same path.
+        """
+        paths = []
+        for _ in range(2):
+            self.k = Knight(GameEngine(Board("Boards/32x32_board.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            self.k.find_longest_path_restarts(time_allowed=30, seed=3)
+            self.assertGreaterEqual(self.k.optimal_cost, self.k.cost_acceptance_thresh)
+            self.assertGreater(self.k.restarts, 1)
+            for prev_pos, pos in zip(self.k.optimal_path, self.k.optimal_path[1:]):  # includes teleports
+                self.assertIn(pos, self.k.game_engine.get_possible_moves(prev_pos))
+            paths.append(self.k.optimal_path)
+        self.assertEqual(paths[0], paths[1])
+
+    def test_find_longest_path_entry__tie_breaking(self):
+        """
+        With ties broken by distance from the center (or by looking ahead), Warnsdorff's rule tours these boards
+        without a single backtrack.
+        """
+        for heuristic, size, start in [(Heuristics().center_tiebreak_heuristic, 64, GridPos(0, 0)),
+                                       (Heuristics().center_tiebreak_heuristic, 64, GridPos(32, 32)),
+                                       (Heuristics().lookahead_heuristic, 32, GridPos(0, 0)),
+                                       (Heuristics().lookahead_heuristic, 32, GridPos(13, 20))]:
+            self.k = Knight(GameEngine(self.open_board(size, size)), start_pos=start, end_pos=start)
+            self.k.find_longest_path_entry(time_allowed=30, heuristic=heuristic, cost_acceptance_thresh=size * size)
+            self.assertEqual(self.k.optimal_cost, size * size)
+            self.assertEqual(self.k.nodes_expanded, size * size)
+            self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_entry__tie_breaking_unsupported(self):
+        """
+        The tie-breaking heuristics read the state of the iterative search, which the others don't have.
+        """
+        for heuristic in [Heuristics().center_tiebreak_heuristic, Heuristics().lookahead_heuristic]:
+            with self.assertRaises(ValueError):
+                self.k.find_longest_path_entry(time_allowed=1, heuristic=heuristic, recursive=True)
+            with self.assertRaises(ValueError):
+                self.k.find_longest_path_beam(time_allowed=1, heuristic=heuristic)
+
+    def test_find_longest_path_entry__region_heuristic(self):
+        """
+        Open fields get the dense heuristic and cells next to barriers the sparse one (the edges of the board don't
+        count as barriers). On an open board, that's dense everywhere: the same search as dense_search_heuristic.
+        """
+        self.k = Knight(GameEngine(Board("Boards/32x32_board_mod.txt")), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+        heuristic = RegionHeuristic()
+        self.k.find_longest_path_entry(time_allowed=1, heuristic=heuristic)
+        board = self.k.game_engine.board
+        self.assertIs(heuristic.regions[board.index(GridPos(0, 0))], heuristic.open_heuristic)
+        self.assertIs(heuristic.regions[board.index(GridPos(5, 7))], heuristic.constrained_heuristic)  # next to a B
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+        results = []
+        for heuristic in [Heuristics().dense_search_heuristic, RegionHeuristic()]:
+            self.k = Knight(GameEngine(self.open_board(4, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(0, 0))
+            self.k.find_longest_path_entry(time_allowed=60, heuristic=heuristic, cost_acceptance_thresh=1000)
+            results.append((self.k.optimal_path, self.k.nodes_expanded))
+        self.assertEqual(results[0], results[1])
+
+        # It needs to know where the knight is, which only the iterative search tells it
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_entry(time_allowed=1, heuristic=RegionHeuristic(), recursive=True)
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_beam(time_allowed=1, heuristic=RegionHeuristic())
+
+    def test_find_longest_path_entry__constrain_end(self):
+        """
+        Highest cost paths that finish on end_pos (found by brute force), with and without the bound. Every other
+        path the search comes across is ignored.
+        """
+        grid = [[".", "W", ".", "L"],
+                ["L", ".", "B", "."],
+                [".", ".", "W", "."],
+                ["W", "L", ".", "."],
+                [".", ".", ".", "W"]]
+        for end_pos, expected_cost in [(GridPos(4, 3), 34), (GridPos(3, 0), 34), (GridPos(2, 2), 29)]:
+            for bound in [False, True]:
+                self.k = Knight(GameEngine(self.open_board(5, 4)), start_pos=GridPos(0, 0), end_pos=end_pos)
+                self.k.game_engine.board._board_grid = grid
+                self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, bound=bound,
+                                               constrain_end=True)
+                self.assertEqual(self.k.optimal_cost, expected_cost)
+                self.assertTrue(self.k.optimal_proven)
+                self.assertEqual(self.k.optimal_path[-1], end_pos)
+                self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_entry__constrain_end_after_free_search(self):
+        """
+        A constrained search on a Knight that has already searched freely mustn't keep the free search's best path,
+        which ends somewhere else.
+        """
+        grid = [[".", "W", ".", "L"],
+                ["L", ".", "B", "."],
+                [".", ".", "W", "."],
+                ["W", "L", ".", "."],
+                [".", ".", ".", "W"]]
+        self.k = Knight(GameEngine(self.open_board(5, 4)), start_pos=GridPos(0, 0), end_pos=GridPos(2, 2))
+        self.k.game_engine.board._board_grid = grid
+        self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000)
+        self.assertGreater(self.k.optimal_cost, 29)
+        self.assertNotEqual(self.k.optimal_path[-1], GridPos(2, 2))
+
+        self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, constrain_end=True)
+        self.assertEqual(self.k.optimal_cost, 29)
+        self.assertTrue(self.k.optimal_proven)
+        self.assertEqual(self.k.optimal_path[-1], GridPos(2, 2))
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_entry__constrain_end_unreachable(self):
+        self.k = Knight(GameEngine(self.open_board(5, 5)), start_pos=GridPos(0, 0), end_pos=GridPos(4, 4))
+        for pos in [GridPos(2, 3), GridPos(3, 2)]:  # the only moves onto (4, 4)
+            self.k.game_engine.board.set_element(pos, "R")
+        self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000)  # a free search still works
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_entry(time_allowed=60, cost_acceptance_thresh=1000, constrain_end=True)
+        self.assertEqual(self.k.optimal_path, [])
+
+    def test_find_longest_path_entry__constrain_end_tour(self):
+        self.k = Knight(GameEngine(self.open_board(32, 32)), start_pos=GridPos(0, 0), end_pos=GridPos(16, 15))
+        self.k.find_longest_path_entry(time_allowed=30, heuristic=Heuristics().dense_search_heuristic,
+                                       cost_acceptance_thresh=32 * 32, constrain_end=True)
+        self.assertEqual(len(set(self.k.optimal_path)), 32 * 32)
+        self.assertEqual(self.k.optimal_path[-1], GridPos(16, 15))
+        self.assertTrue(self.k.game_engine.validate_pos_sequence(self.k.optimal_path))
+
+    def test_find_longest_path_entry__constrain_end_recursive(self):
+        with self.assertRaises(ValueError):
+            self.k.find_longest_path_entry(recursive=True, constrain_end=True)
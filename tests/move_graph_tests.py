@@ -0,0 +1,115 @@
+import random
+import unittest
+
+from src.knights_tour.board import Board
+from src.knights_tour.gameengine import GameEngine
+from src.knights_tour.grid_pos import GridPos
+from src.knights_tour.move_graph import COMPILE_CELLS, MoveGraph
+from src.knights_tour.pieces import Pieces
+
+# pylint: disable=protected-access
+class MoveGraphTester(unittest.TestCase):
+    def setUp(self):
+        """
+        Setup the board with barriers, rocks, lava, water and teleports.
+        """
+        self.game_engine = GameEngine(Board("Boards/32x32_board.txt"))
+
+    def assert_graph_matches_game_engine(self):
+        """
+        Every compiled move list must exactly match (including order) what the game engine derives from the rules.
+        """
+        graph = self.game_engine.get_move_graph()
+        board = self.game_engine.board
+        for row in range(board.get_height()):
+            for col in range(board.get_width()):
+                pos = GridPos(row, col)
+                if board.get_value(pos) in (Pieces.BARRIER.value, Pieces.ROCK.value):
+                    continue
+                self.assertEqual(graph.get_possible_moves(pos), self.game_engine.get_possible_moves(pos))
+
+    def test_matches_get_possible_moves(self):
+        for board_path in ["Boards/8x8_board.txt", "Boards/32x32_board.txt", "Boards/32x32_board_mod.txt"]:
+            self.game_engine = GameEngine(Board(board_path))
+            self.assert_graph_matches_game_engine()
+
+    def test_matches_across_blocks(self):
+        """
+        A board big enough to be compiled in more than one block of cells (see COMPILE_CELLS), with barriers, rocks,
+        costs and teleports scattered at random.
+        """
+        rng = random.Random(0)
+        height, width = 300, 301
+        self.assertGreater(height * width, COMPILE_CELLS)
+        board = self.game_engine.board
+        board._board_grid = [[rng.choice(". . . . . . B R W L".split(" ")) for _ in range(width)]
+                             for _ in range(height)]
+        for index in rng.sample(range(height * width), 6) + [COMPILE_CELLS - 1, COMPILE_CELLS]:
+            board.set_element(board.pos(index), rng.choice(["T", "T1"]))
+        graph = self.game_engine.get_move_graph()
+        for index in range(graph.size):
+            if graph.landing_costs[index] >= 0:
+                expected = [board.index(pos) for pos in self.game_engine.get_possible_moves(board.pos(index))]
+                self.assertEqual(list(graph.neighbors(index)), expected)
+            else:
+                self.assertEqual(len(graph.neighbors(index)), 0)
+
+    def test_landing_costs(self):
+        graph = self.game_engine.get_move_graph()
+        for edge, target in enumerate(graph.targets):
+            value = self.game_engine.board.get_value(graph.pos(target))
+            self.assertEqual(graph.costs[edge], self.game_engine.get_cost(value))
+
+    def test_patched_after_edits(self):
+        """
+        Edits are patched into the cached graph (and its adjacency lists) in place, rather than compiling a new graph,
+        and the result matches compiling one from scratch. Only a reset board is compiled again.
+        """
+        graph = self.game_engine.get_move_graph()
+        adjacency = graph.adjacency()
+        self.assertIs(self.game_engine.get_move_graph(), graph)
+
+        board = self.game_engine.board
+        board.set_element(GridPos(1, 2), Pieces.BARRIER.value)
+        self.assertIs(self.game_engine.get_move_graph(), graph)
+        self.assertNotIn(GridPos(1, 2), graph.get_possible_moves(GridPos(0, 0)))
+        self.assert_graph_matches_game_engine()
+
+        rng = random.Random(0)
+        values = [Pieces.EMPTY.value, Pieces.BARRIER.value, Pieces.ROCK.value, Pieces.WATER.value, Pieces.LAVA.value,
+                  Pieces.TELEPORT.value, "T1", "T2"]
+        for _ in range(20):
+            for _ in range(rng.randint(1, 4)):
+                board.set_element(GridPos(rng.randrange(32), rng.randrange(32)), rng.choice(values))
+            self.assertIs(self.game_engine.get_move_graph(), graph)
+            compiled = MoveGraph(self.game_engine)
+            for name in ["offsets", "teleport_offsets", "targets", "costs", "landing_costs", "network_of"]:
+                self.assertEqual(getattr(graph, name), getattr(compiled, name))
+            self.assertEqual(graph.teleport_networks, compiled.teleport_networks)
+            self.assertIs(graph.adjacency(), adjacency)
+            self.assertEqual(adjacency, compiled.adjacency())
+        self.assert_graph_matches_game_engine()
+
+        board.reset_board(Pieces.EMPTY.value)
+        self.assertIsNot(self.game_engine.get_move_graph(), graph)
+
+    def test_teleport_networks(self):
+        """
+        Networks of 1 to 4 teleports ('T<id>'), alongside the board's own pair ('T'). Exits come after the knight
+        moves, and each network is also kept whole, for the planners' hubs.
+        """
+        board = self.game_engine.board
+        empty_cells = board.find_all_elements(Pieces.EMPTY.value)
+        for network in range(1, 5):
+            for pos in empty_cells[network * 7::200][:network]:
+                board.set_element(pos, f"T{network}")
+        self.assert_graph_matches_game_engine()
+
+        graph = self.game_engine.get_move_graph()
+        self.assertEqual(len(graph.teleport_networks), 4)  # T, T2, T3, T4 (T1 is alone)
+        for network, members in enumerate(graph.teleport_networks):
+            for member in members:
+                self.assertEqual(graph.network_of[member], network)
+                exits = graph.targets[graph.teleport_offsets[member]:graph.offsets[member + 1]]
+                self.assertEqual(list(exits), [other for other in members if other != member])
+        self.assertEqual(sum(network >= 0 for network in graph.network_of), 2 + 2 + 3 + 4)
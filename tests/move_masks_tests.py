@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from src.knights_tour.board import Board
+from src.knights_tour.gameengine import GameEngine
+from src.knights_tour.grid_pos import GridPos
+from src.knights_tour.pieces import Pieces
+
+# test target
+from src.knights_tour.move_masks import MoveMasks, MASK_MOVES
+from src.knights_tour.move_graph import KNIGHT_MOVES
+
+# pylint: disable=protected-access
+class MoveMasksTester(unittest.TestCase):
+    def assert_masks_match_rules(self, game_engine, masks):
+        """
+        Every mask must match the rules, as GameEngine checks them move by move (bounds, landing, barriers).
+        """
+        board = game_engine.board
+        for index in range(board.get_height() * board.get_width()):
+            row, col = divmod(index, board.get_width())
+            expected = 0
+            for move, (d_row, d_col) in enumerate(KNIGHT_MOVES):
+                if game_engine._is_open(row + d_row, col + d_col) and \
+                        game_engine._is_barrier_clear(row, col, row + d_row, col + d_col):
+                    expected |= 1 << move
+            self.assertEqual(masks.masks[index], expected, f"cell {GridPos(row, col)}")
+
+    def test_matches_rules(self):
+        for board_path in ["Boards/8x8_board.txt", "Boards/32x32_board.txt", "Boards/32x32_board_mod.txt"]:
+            for staircase in [False, True]:
+                game_engine = GameEngine(Board(board_path), staircase=staircase)
+                self.assert_masks_match_rules(game_engine, game_engine.get_move_masks())
+
+    def test_mask_moves(self):
+        self.assertEqual(MASK_MOVES[0], ())
+        self.assertEqual(MASK_MOVES[0b10000101], (0, 2, 7))
+        self.assertEqual(len(MASK_MOVES[255]), 8)
+
+    def test_staircase(self):
+        """
+        Barriers on both L-shaped paths of a move block it, unless the staircase through the middle is allowed.
+        """
+        board = Board("Boards/8x8_board.txt")
+        board.reset_board(Pieces.EMPTY.value)
+        # Moving 2 down and 1 right from (2, 2): the L paths pass over (3, 2), (4, 2) and (2, 3), (3, 3)
+        board.set_element(GridPos(4, 2), Pieces.BARRIER.value)
+        board.set_element(GridPos(2, 3), Pieces.BARRIER.value)
+        for staircase in [False, True]:
+            game_engine = GameEngine(board, staircase=staircase)
+            self.assertEqual(GridPos(4, 3) in game_engine.get_possible_moves(GridPos(2, 2)), staircase)
+            self.assertEqual(GridPos(2, 2) in game_engine.get_possible_moves(GridPos(4, 3)), staircase)  # reversible
+
+        # Blocking the middle of the staircase blocks it too
+        board.set_element(GridPos(3, 3), Pieces.BARRIER.value)
+        game_engine = GameEngine(board, staircase=True)
+        self.assertNotIn(GridPos(4, 3), game_engine.get_possible_moves(GridPos(2, 2)))
+
+    def test_incremental_updates(self):
+        """
+        After edits, the masks must match a fresh compile, without having been compiled again themselves.
+        """
+        rng = random.Random(0)
+        values = [Pieces.EMPTY.value, Pieces.BARRIER.value, Pieces.ROCK.value, Pieces.WATER.value, "T1"]
+        for staircase in [False, True]:
+            game_engine = GameEngine(Board("Boards/32x32_board.txt"), staircase=staircase)
+            board = game_engine.board
+            masks = game_engine.get_move_masks()
+            barriers = masks._barriers
+            for _ in range(20):
+                for _ in range(rng.randint(1, 5)):
+                    board.set_element(GridPos(rng.randrange(32), rng.randrange(32)), rng.choice(values))
+                self.assertIs(game_engine.get_move_masks(), masks)
+                self.assertEqual(masks.masks, MoveMasks(board, staircase=staircase).masks)
+            self.assertIs(masks._barriers, barriers)  # never recompiled
+            self.assert_masks_match_rules(game_engine, masks)
+
+    def test_recompiled_after_reset(self):
+        game_engine = GameEngine(Board("Boards/32x32_board.txt"))
+        masks = game_engine.get_move_masks()
+        game_engine.board.reset_board(Pieces.EMPTY.value)
+        self.assertIs(game_engine.get_move_masks(), masks)
+        self.assertEqual(masks.masks, MoveMasks(game_engine.board).masks)
+        self.assertEqual(len(game_engine.get_possible_moves(GridPos(15, 15))), 8)
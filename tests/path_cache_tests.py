@@ -0,0 +1,77 @@
+import unittest
+
+from src.knights_tour.board import Board
+from src.knights_tour.gameengine import GameEngine
+from src.knights_tour.grid_pos import GridPos
+from src.knights_tour.knight import Knight
+from src.knights_tour.pieces import Pieces
+
+# test target
+from src.knights_tour.path_cache import PathTreeCache
+
+
+class PathTreeCacheTester(unittest.TestCase):
+    def setUp(self):
+        self.cache = PathTreeCache()
+        self.game_engine = GameEngine(Board("Boards/32x32_board.txt"))
+
+    def plan(self, start_pos, end_pos, game_engine=None):
+        knight = Knight(game_engine or self.game_engine, start_pos=start_pos, end_pos=end_pos)
+        knight.plan_shortest_path_cached(self.cache)
+        return knight
+
+    def test_answers_every_end(self):
+        """
+        One tree per start answers queries to any end, for the same cost as planning each of them.
+        """
+        start_pos = GridPos(2, 2)
+        for end_pos in [GridPos(31, 31), GridPos(30, 2), GridPos(5, 20), GridPos(23, 27)]:
+            knight = self.plan(start_pos, end_pos)
+            planned = Knight(GameEngine(self.game_engine.board.copy()), start_pos=start_pos, end_pos=end_pos)
+            planned.plan_shortest_path_dijkstra()
+            self.assertEqual(knight.cost_map.get_value(end_pos), planned.cost_map.get_value(end_pos))
+
+            path = knight.reconstruct_path()
+            self.assertEqual(path[0], start_pos)
+            self.assertEqual(path[-1], end_pos)
+            for prev_pos, pos in zip(path, path[1:]):
+                self.assertIn(pos, self.game_engine.get_possible_moves(prev_pos))
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 3))
+        self.assertEqual(knight.expanded_nodes, 0)  # read from the tree, without planning
+        self.assertEqual(len(self.cache), 1)
+
+    def test_keyed_by_start_version_and_rules(self):
+        self.plan(GridPos(2, 2), GridPos(31, 31))
+        self.plan(GridPos(3, 3), GridPos(31, 31))  # new start
+        self.assertEqual(self.cache.misses, 2)
+
+        self.game_engine.board.set_element(GridPos(10, 10), Pieces.LAVA.value)  # new version
+        self.plan(GridPos(2, 2), GridPos(31, 31))
+        self.plan(GridPos(2, 2), GridPos(31, 31), GameEngine(self.game_engine.board, staircase=True))  # new rules
+        self.assertEqual(self.cache.misses, 4)
+
+        class LavaWalker(GameEngine):
+            def get_cost(self, value):
+                return 1 if value == Pieces.LAVA.value else super().get_cost(value)
+
+        self.plan(GridPos(2, 2), GridPos(31, 31), LavaWalker(self.game_engine.board))  # new costs
+        self.assertEqual((self.cache.misses, self.cache.hits), (5, 0))
+
+    def test_lru_eviction(self):
+        tree_bytes = 2 * 4 * 32 * 32  # cost and parent layers, 4 bytes per cell each
+        self.cache = PathTreeCache(max_bytes=2 * tree_bytes)
+        starts = [GridPos(2, 2), GridPos(3, 3), GridPos(4, 4)]
+        self.plan(starts[0], GridPos(31, 31))
+        self.plan(starts[1], GridPos(31, 31))
+        self.plan(starts[0], GridPos(30, 2))  # starts[0] is now the most recently used
+        self.plan(starts[2], GridPos(31, 31))  # evicts starts[1]
+        self.assertEqual((len(self.cache), self.cache.nbytes, self.cache.evictions), (2, 2 * tree_bytes, 1))
+
+        self.plan(starts[0], GridPos(5, 20))
+        self.assertEqual(self.cache.hits, 2)
+        self.plan(starts[1], GridPos(5, 20))
+        self.assertEqual(self.cache.misses, 4)
+
+        too_small = PathTreeCache(max_bytes=tree_bytes - 1)
+        Knight(self.game_engine, start_pos=starts[0], end_pos=GridPos(31, 31)).plan_shortest_path_cached(too_small)
+        self.assertEqual(len(too_small), 0)